@@ -120,6 +120,7 @@
 from __future__ import annotations
 
 import os
+import re
 import sys
 from logging.config import fileConfig
 
@@ -139,9 +140,12 @@ except Exception:
 # Alembic Config object, provides access to .ini values
 config = context.config
 
+# Connection handed over by `app.db.migrate` (already holds the advisory lock)
+external_connection = config.attributes.get("connection")
+
 # ---- Resolve database URL and force sync driver for Alembic ----
 db_url = os.getenv("DATABASE_URL") or config.get_main_option("sqlalchemy.url", "")
-if not db_url:
+if not db_url and external_connection is None:
     raise RuntimeError("DATABASE_URL not set and sqlalchemy.url is empty")
 
 # If the app uses asyncpg, swap to psycopg (sync) for Alembic
@@ -153,15 +157,38 @@ config.set_main_option("sqlalchemy.url", db_url)
 
 # ---- Logging ----
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 # ---- Metadata target ----
 from app.db.base import Base  # after sys.path is set
 # Import models so tables are registered on Base.metadata
-from app.models import book  # noqa: F401
+from app.models import author, book, card, job, loan  # noqa: F401
+from app.db.partitions import LOANS_TABLE
+from app.db.types import bytewise
 
 target_metadata = Base.metadata
 
+# SQLAlchemy does not reflect index collations, so a `bytewise` (`COLLATE "C"`)
+# index always looks changed to autogenerate; these are left out of comparison
+_COLLATED_INDEXES = frozenset(
+    index.name
+    for table in target_metadata.tables.values()
+    for index in table.indexes
+    if any(isinstance(expr, bytewise) for expr in index.expressions)
+)
+
+
+# Monthly `loans` partitions are created at runtime (`app.db.partitions`),
+# not declared in the metadata
+_LOANS_PARTITION = re.compile(rf"{LOANS_TABLE}_\d{{4}}_\d{{2}}")
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    """Autogenerate filter: skip objects that are not (comparably) in the models."""
+    if type_ == "table" and reflected and _LOANS_PARTITION.fullmatch(name or ""):
+        return False
+    return not (type_ == "index" and name in _COLLATED_INDEXES)
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
@@ -172,6 +199,20 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         compare_type=True,   # detect column type changes
         compare_server_default=True,
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run_with_connection(connection) -> None:
+    """Configure the migration context on `connection` and run migrations."""
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        compare_type=True,
+        compare_server_default=True,
+        include_object=include_object,
     )
     with context.begin_transaction():
         context.run_migrations()
@@ -179,20 +220,16 @@ def run_migrations_offline() -> None:
 
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode' (sync engine)."""
+    if external_connection is not None:
+        _run_with_connection(external_connection)
+        return
     connectable = engine_from_config(
         config.get_section(config.config_ini_section) or {},
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
     )
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection,
-            target_metadata=target_metadata,
-            compare_type=True,
-            compare_server_default=True,
-        )
-        with context.begin_transaction():
-            context.run_migrations()
+        _run_with_connection(connection)
 
 
 if context.is_offline_mode():
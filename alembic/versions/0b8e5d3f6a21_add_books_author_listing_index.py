@@ -0,0 +1,35 @@
+"""add books author listing index
+
+Revision ID: 0b8e5d3f6a21
+Revises: f4a1c7d2e9b5
+Create Date: 2026-10-19 17:53:06.774310
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from app.db.migrate import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b8e5d3f6a21'
+down_revision: Union[str, Sequence[str], None] = 'f4a1c7d2e9b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_index_concurrently(
+        'idx_books_author_listing',
+        'books',
+        ['author_id', sa.text('created_at DESC'), 'serial_number'],
+        unique=False,
+        postgresql_include=['is_borrowed'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('idx_books_author_listing', 'books')
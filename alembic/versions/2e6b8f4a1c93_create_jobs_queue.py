@@ -0,0 +1,55 @@
+"""create jobs queue
+
+Revision ID: 2e6b8f4a1c93
+Revises: 7c3d9a1e5f20
+Create Date: 2026-10-19 10:49:49.937626
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e6b8f4a1c93'
+down_revision: Union[str, Sequence[str], None] = '7c3d9a1e5f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('jobs',
+    sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+    sa.Column('kind', sa.Text(), nullable=False),
+    sa.Column('status', sa.Text(), server_default='queued', nullable=False),
+    sa.Column('params', sa.JSON(), nullable=False),
+    sa.Column('done', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total', sa.Integer(), nullable=True),
+    sa.Column('result', sa.LargeBinary(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('started_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    sa.Column('heartbeat_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    sa.CheckConstraint("kind IN ('audit', 'export', 'import')", name=op.f('ck_jobs_kind_valid')),
+    sa.CheckConstraint("status IN ('queued', 'running', 'succeeded', 'failed')", name=op.f('ck_jobs_status_valid')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_jobs')),
+    )
+    op.create_index(
+        'idx_jobs_queued', 'jobs', ['id'], unique=False,
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+    op.create_index(
+        'idx_jobs_running_heartbeat', 'jobs', ['heartbeat_at'], unique=False,
+        postgresql_where=sa.text("status = 'running'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_jobs_running_heartbeat', table_name='jobs')
+    op.drop_index('idx_jobs_queued', table_name='jobs')
+    op.drop_table('jobs')
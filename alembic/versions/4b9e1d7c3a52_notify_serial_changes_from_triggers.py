@@ -0,0 +1,53 @@
+"""notify serial changes from triggers
+
+Revision ID: 4b9e1d7c3a52
+Revises: 2e6b8f4a1c93
+Create Date: 2026-10-19 16:05:31.274918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b9e1d7c3a52'
+down_revision: Union[str, Sequence[str], None] = '2e6b8f4a1c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION books_notify_serials() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM pg_notify('books_serials', '+' || serial_number) FROM new_books;
+            ELSE
+                PERFORM pg_notify('books_serials', '-' || serial_number) FROM old_books;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER books_notify_inserted AFTER INSERT ON books"
+        " REFERENCING NEW TABLE AS new_books"
+        " FOR EACH STATEMENT EXECUTE FUNCTION books_notify_serials()"
+    )
+    op.execute(
+        "CREATE TRIGGER books_notify_deleted AFTER DELETE ON books"
+        " REFERENCING OLD TABLE AS old_books"
+        " FOR EACH STATEMENT EXECUTE FUNCTION books_notify_serials()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER books_notify_deleted ON books")
+    op.execute("DROP TRIGGER books_notify_inserted ON books")
+    op.execute("DROP FUNCTION books_notify_serials()")
@@ -0,0 +1,35 @@
+"""add books listing covering index
+
+Revision ID: 5c1e8a7d2b94
+Revises: 0259971e226b
+Create Date: 2026-10-19 09:12:40.118203
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from app.db.migrate import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e8a7d2b94'
+down_revision: Union[str, Sequence[str], None] = '0259971e226b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_index_concurrently(
+        'idx_books_listing',
+        'books',
+        [sa.text('created_at DESC'), 'serial_number'],
+        unique=False,
+        postgresql_include=['title', 'is_borrowed'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('idx_books_listing', 'books')
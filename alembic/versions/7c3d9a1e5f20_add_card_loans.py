@@ -0,0 +1,40 @@
+"""add card loans counters
+
+Revision ID: 7c3d9a1e5f20
+Revises: 0b8e5d3f6a21
+Create Date: 2026-10-19 19:04:12.518207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3d9a1e5f20'
+down_revision: Union[str, Sequence[str], None] = '0b8e5d3f6a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('card_loans',
+    sa.Column('borrower_card', sa.CHAR(length=6), nullable=False),
+    sa.Column('active', sa.Integer(), server_default='0', nullable=False),
+    sa.CheckConstraint("borrower_card ~ '^[0-9]{6}$'", name=op.f('ck_card_loans_borrower_card_six_digits')),
+    sa.CheckConstraint('active >= 0', name=op.f('ck_card_loans_active_not_negative')),
+    sa.PrimaryKeyConstraint('borrower_card', name=op.f('pk_card_loans')),
+    )
+    # Current loans per card
+    op.execute(
+        "INSERT INTO card_loans (borrower_card, active)"
+        " SELECT borrower_card, count(*) FROM books"
+        " WHERE borrower_card IS NOT NULL GROUP BY borrower_card"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('card_loans')
@@ -0,0 +1,43 @@
+"""add books sort indexes
+
+Revision ID: 9a4f3c6e1d27
+Revises: 5c1e8a7d2b94
+Create Date: 2026-10-19 11:05:12.530417
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from app.db.migrate import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4f3c6e1d27'
+down_revision: Union[str, Sequence[str], None] = '5c1e8a7d2b94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_index_concurrently(
+        'idx_books_title_serial', 'books', ['title', 'serial_number'], unique=False
+    )
+    create_index_concurrently(
+        'idx_books_author_serial', 'books', ['author', 'serial_number'], unique=False
+    )
+    create_index_concurrently(
+        'idx_books_borrowed_at_serial',
+        'books',
+        ['borrowed_at', 'serial_number'],
+        unique=False,
+        postgresql_where=sa.text('is_borrowed'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('idx_books_borrowed_at_serial', 'books')
+    drop_index_concurrently('idx_books_author_serial', 'books')
+    drop_index_concurrently('idx_books_title_serial', 'books')
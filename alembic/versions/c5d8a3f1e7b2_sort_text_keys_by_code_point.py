@@ -0,0 +1,49 @@
+"""sort text keys by code point
+
+Revision ID: c5d8a3f1e7b2
+Revises: 4b9e1d7c3a52
+Create Date: 2026-10-19 17:42:08.615204
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from app.db.migrate import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d8a3f1e7b2'
+down_revision: Union[str, Sequence[str], None] = '4b9e1d7c3a52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_index_concurrently(
+        'idx_books_title_c_serial',
+        'books',
+        [sa.text('title COLLATE "C"'), 'serial_number'],
+        unique=False,
+    )
+    create_index_concurrently(
+        'idx_books_author_c_serial',
+        'books',
+        [sa.text('author COLLATE "C"'), 'serial_number'],
+        unique=False,
+    )
+    drop_index_concurrently('idx_books_author_serial', 'books')
+    drop_index_concurrently('idx_books_title_serial', 'books')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    create_index_concurrently(
+        'idx_books_title_serial', 'books', ['title', 'serial_number'], unique=False
+    )
+    create_index_concurrently(
+        'idx_books_author_serial', 'books', ['author', 'serial_number'], unique=False
+    )
+    drop_index_concurrently('idx_books_author_c_serial', 'books')
+    drop_index_concurrently('idx_books_title_c_serial', 'books')
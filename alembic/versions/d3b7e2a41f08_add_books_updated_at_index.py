@@ -0,0 +1,27 @@
+"""add books updated_at index
+
+Revision ID: d3b7e2a41f08
+Revises: 9a4f3c6e1d27
+Create Date: 2026-10-19 14:22:47.108733
+
+"""
+from typing import Sequence, Union
+
+from app.db.migrate import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3b7e2a41f08'
+down_revision: Union[str, Sequence[str], None] = '9a4f3c6e1d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_index_concurrently('idx_books_updated_at', 'books', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('idx_books_updated_at', 'books')
@@ -0,0 +1,74 @@
+"""create loans ledger
+
+Revision ID: e6c2f8a09b13
+Revises: d3b7e2a41f08
+Create Date: 2026-10-19 16:40:03.912556
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6c2f8a09b13'
+down_revision: Union[str, Sequence[str], None] = 'd3b7e2a41f08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('loans',
+    sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+    sa.Column('serial_number', sa.CHAR(length=6), nullable=False),
+    sa.Column('borrower_card', sa.CHAR(length=6), nullable=False),
+    sa.Column('action', sa.Text(), nullable=False),
+    sa.Column('occurred_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.CheckConstraint("serial_number ~ '^[0-9]{6}$'", name=op.f('ck_loans_serial_number_six_digits')),
+    sa.CheckConstraint("borrower_card ~ '^[0-9]{6}$'", name=op.f('ck_loans_borrower_card_six_digits')),
+    sa.CheckConstraint("action IN ('borrow', 'return')", name=op.f('ck_loans_action_valid')),
+    sa.PrimaryKeyConstraint('id', 'occurred_at', name=op.f('pk_loans')),
+    postgresql_partition_by='RANGE (occurred_at)',
+    )
+    # New (empty) table: plain CREATE INDEX, propagated to every partition
+    op.create_index(
+        'idx_loans_card_occurred', 'loans',
+        ['borrower_card', sa.text('occurred_at DESC'), sa.text('id DESC')], unique=False,
+    )
+    op.create_index(
+        'idx_loans_serial_occurred', 'loans',
+        ['serial_number', sa.text('occurred_at DESC'), sa.text('id DESC')], unique=False,
+    )
+    # The current UTC month and the next three (`loans_YYYY_MM`), as
+    # `app.db.partitions` created them when this revision was written; later
+    # months are created at runtime
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            first timestamp := date_trunc('month', now() AT TIME ZONE 'UTC');
+            lower timestamp;
+        BEGIN
+            FOR i IN 0..3 LOOP
+                lower := first + make_interval(months => i);
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF loans'
+                    ' FOR VALUES FROM (%L) TO (%L)',
+                    'loans_' || to_char(lower, 'YYYY_MM'),
+                    to_char(lower, 'YYYY-MM-DD') || ' 00:00:00+00',
+                    to_char(lower + interval '1 month', 'YYYY-MM-DD') || ' 00:00:00+00'
+                );
+            END LOOP;
+        END
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_loans_serial_occurred', table_name='loans')
+    op.drop_index('idx_loans_card_occurred', table_name='loans')
+    op.drop_table('loans')
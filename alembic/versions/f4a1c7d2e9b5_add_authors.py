@@ -0,0 +1,129 @@
+"""add authors
+
+Revision ID: f4a1c7d2e9b5
+Revises: e6c2f8a09b13
+Create Date: 2026-10-19 17:52:41.208133
+
+"""
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a1c7d2e9b5'
+down_revision: Union[str, Sequence[str], None] = 'e6c2f8a09b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Books linked per UPDATE (each its own transaction)
+BATCH_SIZE = 10_000
+
+
+def _author_key(name: str) -> str:
+    # Frozen copy of `app.repositories.authors.author_key` as of this revision
+    # (casefold() has no SQL equivalent, so the keys are computed here)
+    return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
+
+
+def _link_books(bind: sa.engine.Connection) -> None:
+    """Create the authors of books without `author_id` and link them, in batches."""
+    counts = bind.execute(
+        sa.text("SELECT author, count(*) FROM books WHERE author_id IS NULL GROUP BY author")
+    ).all()
+    if not counts:
+        return
+    keys = {name: _author_key(name) for name, _ in counts}
+    new: dict[str, str] = {}
+    # New authors are displayed in their most common spelling
+    for name, _ in sorted(counts, key=lambda row: (-row[1], row[0])):
+        new.setdefault(keys[name], name)
+    bind.execute(
+        sa.text(
+            "INSERT INTO authors (name, name_key) VALUES (:name, :name_key)"
+            " ON CONFLICT (name_key) DO NOTHING"
+        ),
+        [{"name": name, "name_key": key} for key, name in new.items()],
+    )
+    ids = dict(bind.execute(sa.text("SELECT name_key, id FROM authors")).all())
+    bind.execute(
+        sa.text(
+            "CREATE TEMPORARY TABLE author_map (author TEXT PRIMARY KEY, author_id INTEGER NOT NULL)"
+        )
+    )
+    bind.execute(
+        sa.text("INSERT INTO author_map (author, author_id) VALUES (:author, :author_id)"),
+        [{"author": name, "author_id": ids[key]} for name, key in keys.items()],
+    )
+    after = ''
+    while True:
+        upper = bind.execute(
+            sa.text(
+                "SELECT max(serial_number) FROM (SELECT serial_number FROM books"
+                " WHERE serial_number > :after ORDER BY serial_number LIMIT :limit) AS batch"
+            ),
+            {"after": after, "limit": BATCH_SIZE},
+        ).scalar()
+        if upper is None:
+            break
+        bind.execute(
+            sa.text(
+                "UPDATE books SET author_id = m.author_id FROM author_map AS m"
+                " WHERE books.serial_number > :after AND books.serial_number <= :upper"
+                " AND books.author_id IS NULL AND books.author = m.author"
+            ),
+            {"after": after, "upper": upper},
+        )
+        after = upper
+    bind.execute(sa.text("DROP TABLE author_map"))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('authors',
+    sa.Column('id', sa.Integer(), sa.Identity(), nullable=False),
+    sa.Column('name', sa.Text(), nullable=False),
+    sa.Column('name_key', sa.Text(collation='C'), nullable=False),
+    sa.CheckConstraint("name_key != ''", name=op.f('ck_authors_name_key_not_empty')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_authors')),
+    sa.UniqueConstraint('name_key', name=op.f('uq_authors_name_key')),
+    if_not_exists=True,
+    )
+    op.add_column(
+        'books', sa.Column('author_id', sa.Integer(), nullable=True), if_not_exists=True
+    )
+    # Every statement below commits on its own, so `books` is never locked
+    # for longer than one batch or one catalog change:
+    # - NOT VALID constraints only check new rows; VALIDATE scans under a
+    #   lock that still allows reads and writes;
+    # - SET NOT NULL trusts the validated CHECK instead of scanning again.
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        _link_books(bind)
+        bind.execute(
+            sa.text(
+                "ALTER TABLE books ADD CONSTRAINT ck_books_author_id_not_null"
+                " CHECK (author_id IS NOT NULL) NOT VALID"
+            )
+        )
+        # Books inserted (without an author) while the first pass ran
+        _link_books(bind)
+        bind.execute(sa.text("ALTER TABLE books VALIDATE CONSTRAINT ck_books_author_id_not_null"))
+        bind.execute(sa.text("ALTER TABLE books ALTER COLUMN author_id SET NOT NULL"))
+        bind.execute(sa.text("ALTER TABLE books DROP CONSTRAINT ck_books_author_id_not_null"))
+        bind.execute(
+            sa.text(
+                "ALTER TABLE books ADD CONSTRAINT fk_books_author_id_authors"
+                " FOREIGN KEY (author_id) REFERENCES authors (id) NOT VALID"
+            )
+        )
+        bind.execute(sa.text("ALTER TABLE books VALIDATE CONSTRAINT fk_books_author_id_authors"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(op.f('fk_books_author_id_authors'), 'books', type_='foreignkey')
+    op.drop_column('books', 'author_id')
+    op.drop_table('authors')
@@ -0,0 +1,67 @@
+"""Cancel in-flight work when the HTTP client disconnects.
+
+Starlette keeps running a handler after the client has gone away, so a slow
+query would keep executing in Postgres and keep holding a pool connection.
+`cancel_on_disconnect` races the handler's awaitable against the ASGI
+`http.disconnect` message and cancels the awaitable when the client leaves.
+Cancelling an asyncpg query sends a cancel request to the server, and the
+request-scoped session then returns the connection to the pool on exit.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections.abc import Awaitable
+from typing import TypeVar
+
+from fastapi import Request
+
+from app.common.exceptions import ClientDisconnected
+
+T = TypeVar("T")
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    """Block until the ASGI server reports `http.disconnect`.
+
+    Must only be used after the request body has been consumed (or for
+    requests without a body), otherwise body chunks would be swallowed.
+    """
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T]) -> T:
+    """Await `awaitable`, cancelling it if the client disconnects first.
+
+    Args:
+        request (Request): Current request (used to listen for disconnect).
+        awaitable (Awaitable[T]): Work to run, typically a service call.
+
+    Returns:
+        T: Result of `awaitable`.
+
+    Raises:
+        ClientDisconnected: If the client went away before completion.
+    """
+    work = asyncio.ensure_future(awaitable)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        work.cancel()
+        raise
+    finally:
+        watcher.cancel()
+
+    if work.done():
+        return work.result()
+
+    work.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await work
+    raise ClientDisconnected()
@@ -5,17 +5,60 @@ into request handlers via FastAPI's dependency injection system.
 """
 
 
-from collections.abc import AsyncGenerator
-from fastapi import Depends
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from typing import Union
+
+from fastapi import Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import AsyncSessionLocal
+from app.common.exceptions import NotFound, ValidationError
+from app.core.config import get_settings
+from app.db.session import defer_local_statement_timeout
+from app.db.shards import ALL_BRANCHES, DEFAULT_BRANCH, get_shard_router
 from app.services.books import BookService
+from app.services.branches import BranchFanout
+from app.services.catalog_replica import get_catalog_replica
+from app.services.inventory import InventoryService
+from app.services.job_runner import get_job_runner
+from app.services.jobs import JobService
+from app.services.loans import LoanService
+from app.services.serial_index import get_serial_index
+from app.services.status_batcher import get_status_batcher
+from app.services.suggest_index import get_suggest_index
+
+
+def get_branch_selection(
+    branch: str = Query(
+        DEFAULT_BRANCH,
+        description="Library branch; `*` lists across all branches (read-only listings).",
+    ),
+) -> str:
+    """Return the branch (or `ALL_BRANCHES`) named by the `branch` query parameter.
+
+    Raises:
+        NotFound: If the branch is not configured.
+    """
+    if branch != ALL_BRANCHES and branch not in get_shard_router():
+        raise NotFound("Branch not found.")
+    return branch
+
+
+def get_branch(selection: str = Depends(get_branch_selection)) -> str:
+    """Return the single branch a request operates on.
+
+    Raises:
+        ValidationError: If `*` was given to a single-branch operation.
+    """
+    if selection == ALL_BRANCHES:
+        raise ValidationError("This operation needs a single branch.")
+    return selection
 
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
+async def get_session(branch: str = Depends(get_branch)) -> AsyncGenerator[AsyncSession, None]:
     """Provide a SQLAlchemy `AsyncSession` for a single request.
 
+    The session is bound to the request's branch database (see `app.db.shards`).
+
     Yields:
         AsyncSession: Database session bound to the current request context.
 
@@ -23,19 +66,183 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         - Connection is properly closed after use.
         - Safe usage in async environments with `async with`.
     """
-    async with AsyncSessionLocal() as session:
+    async with get_shard_router().sessionmaker(branch)() as session:
+        yield session
+
+
+async def get_read_session(
+    selection: str = Depends(get_branch_selection),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Provide an `AsyncSession` for query-only routes.
+
+    The session runs as a READ ONLY transaction or in driver-level autocommit,
+    depending on `Settings.DB_READ_MODE`. Must not be used for writes. For a
+    cross-branch request it is bound to the default branch and stays unused
+    (sessions connect lazily).
+
+    Yields:
+        AsyncSession: Read-only database session for the current request.
+    """
+    branch = DEFAULT_BRANCH if selection == ALL_BRANCHES else selection
+    async with get_shard_router().sessionmaker(branch, read_only=True)() as session:
         yield session
 
 
 async def get_book_service(
     session: AsyncSession = Depends(get_session),
+    branch: str = Depends(get_branch),
 ) -> AsyncGenerator[BookService, None]:
     """Provide a `BookService` bound to a request-scoped session.
 
+    The per-worker serial and suggest indexes mirror the default branch only.
+    Checkouts are limited to `Settings.MAX_LOANS_PER_CARD` per card, and
+    borrows/returns go through the branch's group-commit batcher if enabled.
+
     Args:
         session (AsyncSession): Injected async session from `get_session`.
+        branch (str): The request's branch.
 
     Yields:
         BookService: Service instance for handling book business logic.
     """
-    yield BookService(session)
+    max_loans = get_settings().MAX_LOANS_PER_CARD
+    batcher = get_status_batcher(branch)
+    if branch != DEFAULT_BRANCH:
+        yield BookService(session, max_loans_per_card=max_loans, status_batcher=batcher)
+        return
+    yield BookService(
+        session,
+        serial_index=get_serial_index(),
+        suggest_index=get_suggest_index(),
+        max_loans_per_card=max_loans,
+        status_batcher=batcher,
+    )
+
+
+async def get_book_query_service(
+    session: AsyncSession = Depends(get_read_session),
+    branch: str = Depends(get_branch),
+) -> AsyncGenerator[BookService, None]:
+    """Provide a `BookService` bound to a read-only session (queries only).
+
+    The serial index, catalog replica and suggest index mirror the default
+    branch only.
+
+    Args:
+        session (AsyncSession): Injected read session from `get_read_session`.
+        branch (str): The request's branch.
+
+    Yields:
+        BookService: Service instance for read-only book queries.
+    """
+    if branch != DEFAULT_BRANCH:
+        yield BookService(session)
+        return
+    yield BookService(
+        session,
+        serial_index=get_serial_index(),
+        catalog=get_catalog_replica(),
+        suggest_index=get_suggest_index(),
+    )
+
+
+async def get_book_listing(
+    session: AsyncSession = Depends(get_read_session),
+    selection: str = Depends(get_branch_selection),
+) -> AsyncGenerator[Union[BookService, BranchFanout], None]:
+    """Provide the listing source: one branch's service, or the cross-branch fan-out.
+
+    Args:
+        session (AsyncSession): Injected read session from `get_read_session`.
+        selection (str): A branch name or `ALL_BRANCHES`.
+
+    Yields:
+        BookService | BranchFanout: Object exposing `list_books_page`.
+    """
+    if selection == ALL_BRANCHES:
+        yield BranchFanout(get_shard_router(), session_info=session.info)
+    elif selection != DEFAULT_BRANCH:
+        yield BookService(session)
+    else:
+        yield BookService(session, serial_index=get_serial_index(), catalog=get_catalog_replica())
+
+
+async def get_inventory_service(
+    session: AsyncSession = Depends(get_session),
+) -> AsyncGenerator[InventoryService, None]:
+    """Provide an `InventoryService` bound to a request-scoped session.
+
+    Uses the primary session: the audit loads scans into a temporary table,
+    which a read-only transaction may not create.
+
+    Args:
+        session (AsyncSession): Injected async session from `get_session`.
+
+    Yields:
+        InventoryService: Service instance for inventory audits.
+    """
+    yield InventoryService(session)
+
+
+async def get_job_service(
+    session: AsyncSession = Depends(get_session),
+) -> AsyncGenerator[JobService, None]:
+    """Provide a `JobService` bound to a request-scoped session.
+
+    Jobs live in the `jobs` table of the request's branch. The worker's
+    in-process runner, if any, is woken when a job is queued.
+
+    Args:
+        session (AsyncSession): Injected async session from `get_session`.
+
+    Yields:
+        JobService: Service instance for queueing and inspecting jobs.
+    """
+    yield JobService(session, runner=get_job_runner())
+
+
+async def get_loan_service(
+    session: AsyncSession = Depends(get_read_session),
+    _branch: str = Depends(get_branch),
+) -> AsyncGenerator[LoanService, None]:
+    """Provide a `LoanService` bound to a read-only session (history queries).
+
+    Args:
+        session (AsyncSession): Injected read session from `get_read_session`.
+        _branch (str): Validated single branch (history does not fan out).
+
+    Yields:
+        LoanService: Service instance for loan history queries.
+    """
+    yield LoanService(session)
+
+
+def statement_timeout(
+    setting: str, *, read_only: bool = False
+) -> Callable[..., Awaitable[None]]:
+    """Build a route dependency that sets a per-route statement deadline.
+
+    Use as `dependencies=[Depends(statement_timeout(...))]`. FastAPI caches
+    the session dependency per request, so the deadline applies to the same
+    session the route's service uses. It is sent when that session begins a
+    transaction, so requests that never query the database pay nothing.
+
+    Args:
+        setting (str): Name of the `Settings` field holding the deadline in
+            milliseconds (read per request, so the router imports no settings).
+        read_only (bool): Target the query-path session (`get_read_session`).
+
+    Returns:
+        Callable: Dependency applying `SET LOCAL statement_timeout`.
+    """
+    session_dependency = get_read_session if read_only else get_session
+
+    async def _apply(session: AsyncSession = Depends(session_dependency)) -> None:
+        # No transaction to scope SET LOCAL to in autocommit mode; the
+        # connection-level default deadline applies there instead.
+        settings = get_settings()
+        if read_only and settings.DB_READ_MODE == "autocommit":
+            return
+        defer_local_statement_timeout(session, getattr(settings, setting))
+
+    return _apply
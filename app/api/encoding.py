@@ -0,0 +1,182 @@
+"""Content negotiation and compact wire formats for list responses.
+
+Supported representations (selected via `Accept`):
+  - `application/json` (default): `{"items": [...], "total": N}`
+  - `application/x-ndjson`: one item per line, total in `X-Total-Count`
+  - `application/msgpack`: MessagePack of the JSON shape (requires `msgpack`)
+  - `application/vnd.library.columnar+json`: `{"columns": {field: [...]}, "total": N}`
+
+Bodies at or above `COMPRESSION_MIN_BYTES` are compressed according to
+`Accept-Encoding` (zstd when `zstandard` is installed, otherwise gzip).
+`EncodedBody` memoizes each compressed variant, so a response cache that
+stores it compresses a given payload at most once per encoding.
+"""
+
+
+from __future__ import annotations
+
+import gzip
+import json
+from dataclasses import dataclass, field
+from functools import cache
+from importlib import import_module
+from importlib.util import find_spec
+from typing import Any, Iterable, Optional
+
+from fastapi import Request, Response
+
+from app.core.config import get_settings
+
+
+@cache
+def _optional_module(name: str) -> Any:
+    """Import an optional dependency on first use; None if not installed.
+
+    Deferred so that importing the app does not pay for codecs that a
+    worker may never serve.
+    """
+    if find_spec(name) is None:
+        return None
+    return import_module(name)
+
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+MSGPACK = "application/msgpack"
+COLUMNAR = "application/vnd.library.columnar+json"
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+@cache
+def supported_media_types() -> tuple[str, ...]:
+    """Return media types available in this environment, in preference order."""
+    types = [JSON, NDJSON, COLUMNAR]
+    if find_spec("msgpack") is not None:
+        types.append(MSGPACK)
+    return tuple(types)
+
+
+@cache
+def supported_encodings() -> tuple[str, ...]:
+    """Return content codings available in this environment, best first."""
+    return ("zstd", "gzip") if find_spec("zstandard") is not None else ("gzip",)
+
+
+def _parse_header(value: Optional[str]) -> list[tuple[str, float]]:
+    """Parse an `Accept`-style header into `(token, q)` pairs, highest q first."""
+    if not value:
+        return []
+    parsed: list[tuple[str, float]] = []
+    for part in value.split(","):
+        token, *params = (p.strip() for p in part.split(";"))
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        parsed.append((token.lower(), q))
+    # stable sort keeps the client's order for equal q
+    return sorted(parsed, key=lambda item: -item[1])
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """Pick the response media type for an `Accept` header (default JSON)."""
+    available = supported_media_types()
+    for token, q in _parse_header(accept):
+        if q <= 0:
+            continue
+        if token in available:
+            return token
+        if token == "application/x-msgpack" and MSGPACK in available:
+            return MSGPACK
+        if token in ("*/*", "application/*"):
+            return JSON
+    return JSON
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick a content coding for `Accept-Encoding`, or None for identity."""
+    offered = {token: q for token, q in _parse_header(accept_encoding)}
+    for coding in supported_encodings():
+        q = offered.get(coding, offered.get("*", 0.0))
+        if q > 0:
+            return coding
+    return None
+
+
+def accepts_encoding(accept_encoding: Optional[str], coding: str) -> bool:
+    """Return True if `Accept-Encoding` allows `coding` (by name or via `*`)."""
+    offered = {token: q for token, q in _parse_header(accept_encoding)}
+    return offered.get(coding, offered.get("*", 0.0)) > 0
+
+
+def encode_list(media_type: str, items: list[dict[str, Any]], total: int) -> bytes:
+    """Serialize a page of items (JSON-compatible dicts) in `media_type`."""
+    if media_type == NDJSON:
+        return b"".join(
+            json.dumps(item, separators=(",", ":")).encode() + b"\n" for item in items
+        )
+    if media_type == COLUMNAR:
+        names: list[str] = list(items[0]) if items else []
+        columns = {name: [item.get(name) for item in items] for name in names}
+        return json.dumps({"columns": columns, "total": total}, separators=(",", ":")).encode()
+    if media_type == MSGPACK:
+        return _optional_module("msgpack").packb({"items": items, "total": total}, use_bin_type=True)
+    return json.dumps({"items": items, "total": total}, separators=(",", ":")).encode()
+
+
+def _compress(body: bytes, coding: str) -> bytes:
+    """Compress `body` with the given content coding."""
+    if coding == "zstd":
+        return _optional_module("zstandard").ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+@dataclass
+class EncodedBody:
+    """An encoded payload plus lazily built, memoized compressed variants.
+
+    Attributes:
+        body (bytes): Uncompressed representation.
+        media_type (str): Media type of `body`.
+        headers (dict[str, str]): Extra headers that travel with the payload.
+    """
+
+    body: bytes
+    media_type: str
+    headers: dict[str, str] = field(default_factory=dict)
+    _variants: dict[str, bytes] = field(default_factory=dict, repr=False)
+
+    def variant(self, coding: Optional[str]) -> tuple[bytes, Optional[str]]:
+        """Return `(body, applied_coding)` for a negotiated content coding.
+
+        Small bodies (below `COMPRESSION_MIN_BYTES`) are always sent as-is.
+        """
+        if coding is None or len(self.body) < get_settings().COMPRESSION_MIN_BYTES:
+            return self.body, None
+        if coding not in self._variants:
+            self._variants[coding] = _compress(self.body, coding)
+        return self._variants[coding], coding
+
+    def to_response(self, request: Request, status_code: int = 200) -> Response:
+        """Build a response honouring the request's `Accept-Encoding`."""
+        body, coding = self.variant(negotiate_encoding(request.headers.get("accept-encoding")))
+        headers = {**self.headers, "Vary": "Accept, Accept-Encoding"}
+        if coding is not None:
+            headers["Content-Encoding"] = coding
+        return Response(
+            content=body, status_code=status_code, media_type=self.media_type, headers=headers
+        )
+
+
+def encode_list_body(request: Request, items: Iterable[dict[str, Any]], total: int) -> EncodedBody:
+    """Negotiate a representation for a list page and encode it once."""
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    body = encode_list(media_type, list(items), total)
+    return EncodedBody(body=body, media_type=media_type, headers={"X-Total-Count": str(total)})
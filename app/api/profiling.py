@@ -0,0 +1,299 @@
+"""Opt-in, per-request wall-clock profiling.
+
+A request is profiled when it carries `X-Profile: <PROFILE_TOKEN>` or is
+picked by `PROFILE_SAMPLE_RATE`. While it runs, a sampler thread records
+the request's stack every `PROFILE_INTERVAL_MS`:
+
+  - when the event loop is running one of the request's tasks, the thread's
+    actual stack (pydantic validation, ORM hydration, JSON encoding, ...);
+  - otherwise the request's await chain, ending in `[await]`: time spent
+    waiting for the database, the client or other requests on the loop.
+
+Tasks the request starts (for example `cancel_on_disconnect`) are followed
+too. Samples are written to `PROFILE_DIR` in the collapsed-stack format
+(`frame;frame;frame count`) read by `flamegraph.pl`, speedscope and
+inferno; at the default interval one sample is about five milliseconds.
+Requests profiled on demand get the file name in `X-Profile-File`. Only the
+newest `PROFILE_MAX_FILES` profiles are kept, so sampling cannot fill the disk.
+
+Each sample walks the stacks while holding the GIL, which pauses the event
+loop; that is why the interval is not shorter by default. The sampler reads
+`PROFILE_INTERVAL_MS` again whenever a profile starts.
+
+When neither trigger is configured, the middleware costs a settings lookup
+per request and nothing else: no thread runs and no task factory is set.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Any, Callable, Optional
+
+from app.core.config import Settings, get_settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_FILE_HEADER = b"x-profile-file"
+# Leaf of samples taken while the request was suspended
+AWAIT_FRAME = "[await]"
+
+_SLUG_RE = re.compile(r"[^A-Za-z0-9]+")
+
+# The profile of the request being handled; inherited by the tasks it starts
+_current: contextvars.ContextVar[Optional[_Profile]] = contextvars.ContextVar(
+    "request_profile", default=None
+)
+
+
+def _label(frame: FrameType) -> str:
+    """Name a frame `module:qualname`, stable across lines of one function."""
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}"
+
+
+def _await_chain(awaitable: Any) -> tuple[list[FrameType], bool]:
+    """Follow a coroutine's `await` chain down to what it is waiting on.
+
+    Returns:
+        tuple[list[FrameType], bool]: The coroutine frames, outermost first,
+        and whether the chain ends in a wait (False while it is running).
+    """
+    frames: list[FrameType] = []
+    while awaitable is not None:
+        if isinstance(awaitable, asyncio.Task):
+            awaitable = awaitable.get_coro()
+            continue
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            return frames, True  # a future, or an awaitable without frames
+        frames.append(frame)
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return frames, False
+
+
+class _Profile:
+    """Samples of one request."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, root: asyncio.Task[Any], frame: FrameType) -> None:
+        self.loop = loop
+        self.root = root
+        self.root_frame = frame
+        self.thread_id = threading.get_ident()
+        self.children: list[asyncio.Task[Any]] = []
+        self.samples: Counter[str] = Counter()
+
+    def _chain(self, task: asyncio.Task[Any]) -> tuple[list[FrameType], bool]:
+        frames, waiting = _await_chain(task.get_coro())
+        if task is self.root and self.root_frame in frames:
+            frames = frames[frames.index(self.root_frame):]
+        return frames, waiting
+
+    def sample(self, thread_frames: dict[int, FrameType]) -> None:
+        """Record where the request is now (runs on the sampler thread)."""
+        current = asyncio.current_task(self.loop)
+        children = [t for t in list(self.children) if not t.done()]
+        if current is not None and (current is self.root or current in children):
+            # Running: the thread's stack below the task's outermost coroutine
+            if current is self.root:
+                top, prefix = self.root_frame, []
+            else:
+                top = current.get_coro().cr_frame
+                prefix, _ = self._chain(self.root)
+                if top in prefix:
+                    prefix = prefix[:prefix.index(top)]
+            stack: list[FrameType] = []
+            frame: Optional[FrameType] = thread_frames.get(self.thread_id)
+            while frame is not None and frame is not top:
+                stack.append(frame)
+                frame = frame.f_back
+            if frame is None:
+                return  # switching tasks; the stack does not reach the task
+            frames = [*prefix, top, *reversed(stack)]
+            labels = [_label(f) for f in frames]
+        else:
+            # Suspended: the await chain, continued into the deepest live
+            # child task (the one doing the work, rather than a watcher)
+            frames, _ = self._chain(self.root)
+            chains = [_await_chain(t.get_coro())[0] for t in children]
+            deepest = max(chains, key=len, default=[])
+            if deepest and deepest[0] not in frames:
+                frames += deepest
+            labels = [_label(f) for f in frames] + [AWAIT_FRAME]
+        self.samples[";".join(labels)] += 1
+
+    def folded(self) -> str:
+        """Return the samples in the collapsed-stack format."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.samples.items()))
+
+
+class _Sampler:
+    """One daemon thread sampling every active profile; idle when there is none."""
+
+    def __init__(self) -> None:
+        self.interval_s = 0.0
+        self._profiles: set[_Profile] = set()
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, profile: _Profile, interval_s: float) -> None:
+        with self._lock:
+            self.interval_s = interval_s
+            self._profiles.add(profile)
+            self._active.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: _Profile) -> None:
+        with self._lock:
+            self._profiles.discard(profile)
+            if not self._profiles:
+                self._active.clear()
+
+    def _run(self) -> None:
+        while True:
+            self._active.wait()
+            with self._lock:
+                profiles = list(self._profiles)
+            frames = sys._current_frames()
+            for profile in profiles:
+                try:
+                    profile.sample(frames)
+                except Exception:  # a frame changed under us; skip this sample
+                    pass
+            del frames
+            time.sleep(self.interval_s)
+
+
+class _TaskTracker:
+    """Task factory that records tasks started by profiled requests.
+
+    Installed on the loop only while a profile is active, and chained to any
+    factory that was set before.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.previous: Optional[Callable[..., Any]] = loop.get_task_factory()
+        self.profiles = 0
+
+    def __call__(self, loop: asyncio.AbstractEventLoop, coro: Any, **kwargs: Any) -> asyncio.Task[Any]:
+        if self.previous is not None:
+            task = self.previous(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        context = kwargs.get("context")
+        profile = context.get(_current) if context is not None else _current.get(None)
+        if profile is not None:
+            profile.children.append(task)
+        return task
+
+
+_trackers: dict[asyncio.AbstractEventLoop, _TaskTracker] = {}
+
+
+def _track_tasks(loop: asyncio.AbstractEventLoop) -> None:
+    tracker = _trackers.get(loop)
+    if tracker is None:
+        tracker = _trackers[loop] = _TaskTracker(loop)
+        loop.set_task_factory(tracker)
+    tracker.profiles += 1
+
+
+def _untrack_tasks(loop: asyncio.AbstractEventLoop) -> None:
+    tracker = _trackers[loop]
+    tracker.profiles -= 1
+    if tracker.profiles == 0:
+        loop.set_task_factory(tracker.previous)
+        del _trackers[loop]
+
+
+def _profile_path(directory: str, method: str, path: str) -> Path:
+    slug = _SLUG_RE.sub("_", path).strip("_")[:60] or "root"
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    return Path(directory) / f"{stamp}-{method}-{slug}-{uuid.uuid4().hex[:8]}.folded"
+
+
+def _write(path: Path, content: str, max_files: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    if max_files > 0:
+        _prune(path.parent, max_files)
+
+
+def _prune(directory: Path, keep: int) -> None:
+    """Delete all but the `keep` newest profiles (other workers may prune too)."""
+    profiles = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".folded"):
+            with contextlib.suppress(FileNotFoundError):
+                profiles.append((entry.stat().st_mtime_ns, entry.path))
+    profiles.sort()
+    for _, name in profiles[:-keep]:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(name)
+
+
+def _requested(scope: dict[str, Any], settings: Settings) -> bool:
+    """True if the request carries the profiling token."""
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return hmac.compare_digest(value, settings.PROFILE_TOKEN.encode())
+    return False
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests on demand or at a sampling rate."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+        self._sampler: Optional[_Sampler] = None
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] == "http":
+            settings = get_settings()
+            if settings.PROFILE_TOKEN and _requested(scope, settings):
+                return await self._profiled(scope, receive, send, settings, announce=True)
+            if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+                return await self._profiled(scope, receive, send, settings, announce=False)
+        await self.app(scope, receive, send)
+
+    async def _profiled(
+        self, scope: dict[str, Any], receive: Any, send: Any, settings: Settings, *, announce: bool
+    ) -> None:
+        if self._sampler is None:
+            self._sampler = _Sampler()
+        path = _profile_path(settings.PROFILE_DIR, scope["method"], scope["path"])
+
+        async def send_with_header(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_FILE_HEADER, path.name.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        loop = asyncio.get_running_loop()
+        profile = _Profile(loop, asyncio.current_task(), sys._getframe())
+        token = _current.set(profile)
+        _track_tasks(loop)
+        self._sampler.add(profile, settings.PROFILE_INTERVAL_MS / 1000)
+        try:
+            await self.app(scope, receive, send_with_header if announce else send)
+        finally:
+            self._sampler.remove(profile)
+            _untrack_tasks(loop)
+            _current.reset(token)
+            await asyncio.to_thread(_write, path, profile.folded(), settings.PROFILE_MAX_FILES)
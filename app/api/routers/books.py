@@ -5,25 +5,61 @@ This router exposes endpoints for CRUD operations and borrow/return workflows:
 - Delete a book
 - List books with optional filters
 - Update borrow/return status
+- Find free serial numbers and bulk-add books with assigned serials
+- Resolve many serial numbers at once (batch get)
+- Catalog statistics and per-author facets
+- Title and author autocomplete
+- Every route takes a `branch` query parameter (default `main`); listings
+  accept `branch=*` to fan out across all branches
 """
 
 
-from typing import Optional
+from typing import Optional, Union
 
-from fastapi import APIRouter, Depends, status, Response
+from fastapi import APIRouter, Depends, Request, status, Response
 
-from app.api.deps import get_book_service
+from app.api.cancellation import cancel_on_disconnect
+from app.api.deps import (
+    get_book_listing,
+    get_book_query_service,
+    get_book_service,
+    get_branch,
+    get_branch_selection,
+    statement_timeout,
+)
+from app.api.encoding import encode_list_body
 from app.schemas.books import (
+    AuthorFacet,
+    AuthorFacetResponse,
+    BookAllocateRequest,
+    BookAllocateResponse,
+    BookBatchGetItem,
+    BookBatchGetRequest,
+    BookBatchGetResponse,
     BookCreate,
     BookRead,
     BookListResponse,
+    BookSparseRead,
+    BookStats,
     BookStatusUpdate,
+    FreeSerialsResponse,
+    SuggestResponse,
+    Suggestion,
 )
+from app.db.shards import ALL_BRANCHES, DEFAULT_BRANCH
 from app.services.books import BookService
+from app.services.branches import BranchFanout
 
 router = APIRouter(prefix="/books", tags=["books"])
 
 
+def _parse_fields(fields: Optional[str]) -> Optional[list[str]]:
+    """Split a `fields=` query value into unique names, preserving order."""
+    if fields is None:
+        return None
+    return list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+
+
 @router.post(
     "",
     response_model=BookRead,
@@ -35,6 +71,7 @@ async def create_book(
     data: BookCreate,
     response: Response,
     service: BookService = Depends(get_book_service),
+    branch: str = Depends(get_branch),
 ) -> BookRead:
     """Add a new book to the catalog.
 
@@ -42,6 +79,7 @@ async def create_book(
         data (BookCreate): Book payload including serial number, title, and author.
         response (Response): Used to set the `Location` header for the created book.
         service (BookService): Service layer dependency.
+        branch (str): Branch the book is added to (`branch` query parameter).
 
     Returns:
         BookRead: The created book resource.
@@ -50,10 +88,107 @@ async def create_book(
         Conflict: If a book with the same serial number already exists.
     """
     book = await service.add_book(data)
-    response.headers["Location"] = f"/api/v1/books/{book.serial_number}"
+    location = f"/api/v1/books/{book.serial_number}"
+    if branch != DEFAULT_BRANCH:
+        location += f"?branch={branch}"
+    response.headers["Location"] = location
     return BookRead.model_validate(book)
 
 
+@router.post(
+    ":batchGet",
+    response_model=BookBatchGetResponse,
+    summary="Get many books by serial number",
+)
+async def batch_get_books(
+    payload: BookBatchGetRequest,
+    service: BookService = Depends(get_book_query_service),
+) -> BookBatchGetResponse:
+    """Resolve up to `MAX_BATCH_GET` serials with a single query.
+
+    Args:
+        payload (BookBatchGetRequest): Serial numbers to resolve.
+        service (BookService): Read-only service layer dependency.
+
+    Returns:
+        BookBatchGetResponse: One item per requested serial, in request order;
+        unknown serials carry `found: false` instead of failing the batch.
+    """
+    books = await service.get_books(payload.serial_numbers)
+    return BookBatchGetResponse(
+        items=[
+            BookBatchGetItem(
+                serial_number=serial,
+                found=book is not None,
+                book=BookRead.model_validate(book) if book is not None else None,
+            )
+            for serial, book in zip(payload.serial_numbers, books)
+        ]
+    )
+
+
+@router.get(
+    "/serials/free",
+    response_model=FreeSerialsResponse,
+    summary="Find unused serial numbers",
+)
+async def find_free_serials(
+    count: int = 1,
+    start: str = "000000",
+    end: str = "999999",
+    service: BookService = Depends(get_book_query_service),
+) -> FreeSerialsResponse:
+    """Return the lowest unused serial numbers in a range.
+
+    The answer is advisory (another client may take a serial before you do);
+    use `POST /books/serials/allocate` to reserve and insert atomically.
+
+    Args:
+        count (int): Number of serials wanted (1-1000, default: 1).
+        start (str): Lowest serial to consider (inclusive).
+        end (str): Highest serial to consider (inclusive).
+        service (BookService): Read-only service layer dependency.
+
+    Returns:
+        FreeSerialsResponse: Up to `count` free serials, fewer if the range
+        is nearly full.
+
+    Raises:
+        ValidationError: On an invalid range or count.
+    """
+    serials = await service.find_free_serials(count, start=start, end=end)
+    return FreeSerialsResponse(serial_numbers=serials)
+
+
+@router.post(
+    "/serials/allocate",
+    response_model=BookAllocateResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Add books with server-assigned serial numbers",
+)
+async def allocate_books(
+    payload: BookAllocateRequest,
+    service: BookService = Depends(get_book_service),
+) -> BookAllocateResponse:
+    """Reserve free serials and insert the books in one transaction.
+
+    Intended for bulk intake: serials are assigned lowest-first within
+    `[start, end]`, so the request never fails on a serial collision.
+
+    Args:
+        payload (BookAllocateRequest): Books to add and the serial range.
+        service (BookService): Service layer dependency.
+
+    Returns:
+        BookAllocateResponse: Created books, in request order.
+
+    Raises:
+        Conflict: If the range has fewer free serials than requested books.
+    """
+    books = await service.add_books(payload.items, start=payload.start, end=payload.end)
+    return BookAllocateResponse(items=[BookRead.model_validate(b) for b in books])
+
+
 @router.delete(
     "/{serial_number}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -82,36 +217,192 @@ async def delete_book(
     response_model=BookListResponse,
     summary="List books",
     response_description="Paginated list of books",
+    dependencies=[Depends(statement_timeout("LIST_STATEMENT_TIMEOUT_MS", read_only=True))],
 )
 async def list_books(
+    request: Request,
     is_borrowed: Optional[bool] = None,
     title: Optional[str] = None,
     author: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
-    service: BookService = Depends(get_book_service),
-) -> BookListResponse:
+    fields: Optional[str] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    author_id: Optional[int] = None,
+    service: Union[BookService, BranchFanout] = Depends(get_book_listing),
+    branch: str = Depends(get_branch_selection),
+) -> Response:
     """Retrieve a paginated list of books.
 
+    Runs under `LIST_STATEMENT_TIMEOUT_MS` and is cancelled (releasing its
+    pooled connection) if the client disconnects mid-query.
+
     Args:
+        request (Request): Current request, watched for client disconnect.
         is_borrowed (Optional[bool]): Filter by borrow status.
         title (Optional[str]): Case-insensitive substring filter on title.
         author (Optional[str]): Case-insensitive substring filter on author.
         limit (int): Maximum number of items to return (default: 50).
         offset (int): Offset for pagination (default: 0).
-        service (BookService): Service layer dependency.
+        fields (Optional[str]): Comma-separated sparse fieldset, e.g.
+            `serial_number,title,is_borrowed`. Only these columns are selected
+            and serialized; omitted fields are absent from each item.
+        sort (Optional[str]): One of `-created_at` (default), `title`,
+            `author`, `borrowed_at` or `-borrowed_at` (the latter two require
+            `is_borrowed=true`). Each is served in index order.
+        cursor (Optional[str]): Keyset cursor from a previous page's
+            `X-Next-Cursor` header; continues after that page without an
+            offset scan (same filters and `sort` expected).
+        author_id (Optional[int]): Exact (normalized) author, e.g. an `id`
+            from `GET /books/facets/authors`; index-backed, unlike `author`.
+            Not available with `branch=*`.
+        service (BookService | BranchFanout): Read-only listing source.
+        branch (str): Branch to list, or `*` for all branches: each branch
+            is queried concurrently and the pages are merged in order (items
+            then carry a `branch` field; `offset + limit` is capped, use the
+            cursor for deep pages).
+
+    The representation is negotiated from `Accept` (JSON, NDJSON, MessagePack
+    or columnar JSON, see `app.api.encoding`) and compressed per
+    `Accept-Encoding` above `COMPRESSION_MIN_BYTES`.
 
     Returns:
-        BookListResponse: Paginated list of books and total count.
+        Response: Paginated list of books and total count (`BookListResponse`
+        shape for JSON; `BookSparseListResponse` shape when `fields` is given).
+        A full page carries `X-Next-Cursor` for the following one.
+
+    Raises:
+        ValidationError: If `fields` names an unknown or no field, `sort` is
+            not whitelisted, or `cursor` is invalid for this request.
+    """
+    selected = _parse_fields(fields)
+    page = await cancel_on_disconnect(
+        request,
+        service.list_books_page(
+            is_borrowed=is_borrowed,
+            title=title,
+            author=author,
+            limit=limit,
+            offset=offset,
+            fields=selected,
+            sort=sort,
+            cursor=cursor,
+            author_id=author_id,
+        ),
+    )
+    if selected is not None:
+        rows = [
+            BookSparseRead.model_validate(row).model_dump(mode="json", exclude_unset=True)
+            for row in page.items
+        ]
+    else:
+        rows = [BookRead.model_validate(b).model_dump(mode="json") for b in page.items]
+    if branch == ALL_BRANCHES:
+        rows = [{"branch": item["branch"], **row} for item, row in zip(page.items, rows)]
+    body = encode_list_body(request, rows, page.total)
+    if page.next_cursor is not None:
+        body.headers["X-Next-Cursor"] = page.next_cursor
+    return body.to_response(request)
+
+
+@router.get(
+    "/stats",
+    response_model=BookStats,
+    summary="Catalog statistics",
+    dependencies=[Depends(statement_timeout("LIST_STATEMENT_TIMEOUT_MS", read_only=True))],
+)
+async def book_stats(
+    is_borrowed: Optional[bool] = None,
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    author_id: Optional[int] = None,
+    service: BookService = Depends(get_book_query_service),
+) -> BookStats:
+    """Count the books matching the listing filters and summarize them.
+
+    Served from the in-memory catalog replica when it is enabled and fresh,
+    otherwise by one aggregate query.
+
+    Args:
+        is_borrowed (Optional[bool]): Filter by borrow status.
+        title (Optional[str]): Case-insensitive substring filter on title.
+        author (Optional[str]): Case-insensitive substring filter on author.
+        author_id (Optional[int]): Exact (normalized) author.
+        service (BookService): Read-only service layer dependency.
+
+    Returns:
+        BookStats: Totals, distinct (normalized) authors and the oldest open loan.
+    """
+    stats = await service.book_stats(
+        is_borrowed=is_borrowed, title=title, author=author, author_id=author_id
+    )
+    return BookStats(**stats)
+
+
+@router.get(
+    "/facets/authors",
+    response_model=AuthorFacetResponse,
+    summary="Book counts per author",
+    dependencies=[Depends(statement_timeout("LIST_STATEMENT_TIMEOUT_MS", read_only=True))],
+)
+async def author_facets(
+    prefix: Optional[str] = None,
+    is_borrowed: Optional[bool] = None,
+    limit: int = 50,
+    service: BookService = Depends(get_book_query_service),
+) -> AuthorFacetResponse:
+    """Count books per normalized author, most books first.
+
+    Counted from `idx_books_author_listing` (index-only) and joined to the
+    matching authors; ties are ordered by name.
+
+    Args:
+        prefix (Optional[str]): Only authors whose name starts with this,
+            ignoring case and spacing (e.g. `tolk`); served by a range scan
+            of the authors' unique key.
+        is_borrowed (Optional[bool]): Only count books in this state.
+        limit (int): Maximum number of authors (1-200, default: 50).
+        service (BookService): Read-only service layer dependency.
+
+    Returns:
+        AuthorFacetResponse: `{id, name, count}` per author; pass `id` as
+        `GET /books?author_id=` to list the books.
+    """
+    facets = await service.author_facets(prefix=prefix, is_borrowed=is_borrowed, limit=limit)
+    return AuthorFacetResponse(items=[AuthorFacet(**facet) for facet in facets])
+
+
+@router.get(
+    "/suggest",
+    response_model=SuggestResponse,
+    summary="Autocomplete titles and authors",
+    dependencies=[Depends(statement_timeout("LIST_STATEMENT_TIMEOUT_MS", read_only=True))],
+)
+async def suggest(
+    q: str,
+    limit: int = 10,
+    service: BookService = Depends(get_book_query_service),
+) -> SuggestResponse:
+    """Complete a typed prefix to the most common titles and authors.
+
+    On the default branch this is answered from the per-worker suggest
+    index without touching the database; other branches (and workers whose
+    index is still loading) run a prefix query instead.
+
+    Args:
+        q (str): Typed prefix, ignoring case and spacing (e.g. `the lo`).
+        limit (int): Maximum suggestions per field (1-20, default: 10).
+        service (BookService): Read-only service layer dependency.
+
+    Returns:
+        SuggestResponse: `titles` and `authors` as `{text, count}`, most
+        books first.
     """
-    items, total = await service.list_books(
-        is_borrowed=is_borrowed,
-        title=title,
-        author=author,
-        limit=limit,
-        offset=offset,
+    found = await service.suggest(q, limit=limit)
+    return SuggestResponse(
+        **{field: [Suggestion(**item) for item in items] for field, items in found.items()}
     )
-    return BookListResponse(items=[BookRead.model_validate(b) for b in items], total=total)
 
 
 @router.patch(
@@ -135,6 +426,10 @@ async def update_book_status(
     Returns:
         BookRead: The updated book resource.
 
+    Raises:
+        Conflict: If the book is not in the required state, or the card
+            already has `MAX_LOANS_PER_CARD` books on loan.
+
     Example payloads:
         - `{"action": "borrow", "borrower_card": "123456"}`
         - `{"action": "return"}`
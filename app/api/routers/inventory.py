@@ -0,0 +1,48 @@
+"""API routes for shelf inventory (stocktake) audits."""
+
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import get_inventory_service
+from app.api.encoding import NDJSON
+from app.schemas.inventory import InventoryAuditRequest
+from app.services.inventory import InventoryService, report_lines
+
+router = APIRouter(prefix="/inventory", tags=["inventory"])
+
+
+@router.post(
+    "/audit",
+    summary="Reconcile a shelf scan against the catalog",
+    response_description="NDJSON stream of findings followed by a summary line",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON: {}}}},
+)
+async def audit_inventory(
+    payload: InventoryAuditRequest,
+    service: InventoryService = Depends(get_inventory_service),
+) -> StreamingResponse:
+    """Compare all scanned serials with `books` in one set-based query.
+
+    The scans are bulk-loaded with COPY into a temporary table and joined
+    against the catalog once, yielding three kinds of findings:
+    `missing` (catalogued, not borrowed, not scanned), `unknown` (scanned,
+    not catalogued) and `borrowed_on_shelf` (scanned, still marked borrowed).
+
+    Args:
+        payload (InventoryAuditRequest): Scanned serial numbers.
+        service (InventoryService): Inventory service dependency.
+
+    Returns:
+        StreamingResponse: `application/x-ndjson`; each line is an
+        `AuditFinding`, and the last line is `{"summary": AuditSummary}`.
+
+    Large stocktakes can run in the background instead: see
+    `POST /jobs/audit`.
+
+    Raises:
+        ValidationError: If too many scans are submitted.
+    """
+    report = await service.audit(payload.serials)
+    return StreamingResponse(report_lines(report), media_type=NDJSON)
@@ -0,0 +1,197 @@
+"""API routes for background jobs (imports, exports and audits).
+
+Each `POST` queues a job and answers `202 Accepted` at once with the job
+and a `Location` to poll; the work runs outside the request (see
+`app.services.job_runner`). Jobs belong to the branch given by the `branch`
+query parameter, which the status and result routes take as well.
+"""
+
+
+import zlib
+from collections.abc import Iterator
+
+from fastapi import APIRouter, Depends, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import RowMapping
+
+from app.api.deps import get_branch, get_job_service
+from app.api.encoding import NDJSON, accepts_encoding
+from app.db.shards import DEFAULT_BRANCH
+from app.schemas.inventory import InventoryAuditRequest
+from app.schemas.jobs import BookImportRequest, JobRead
+from app.services.jobs import JobService
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+# Bytes of compressed result inflated per chunk for clients without gzip
+_INFLATE_CHUNK = 1 << 20
+
+
+def _job_url(job_id: int, branch: str, suffix: str = "") -> str:
+    url = f"/api/v1/jobs/{job_id}{suffix}"
+    return url if branch == DEFAULT_BRANCH else f"{url}?branch={branch}"
+
+
+def _job_read(job: RowMapping, branch: str) -> JobRead:
+    result_url = _job_url(job["id"], branch, "/result") if job["status"] == "succeeded" else None
+    return JobRead.model_validate({**job, "result_url": result_url})
+
+
+def _accepted(job: RowMapping, branch: str, response: Response) -> JobRead:
+    response.headers["Location"] = _job_url(job["id"], branch)
+    return _job_read(job, branch)
+
+
+def _inflate(result: bytes) -> Iterator[bytes]:
+    """Yield a gzip-compressed result decompressed, chunk by chunk."""
+    decompressor = zlib.decompressobj(31)
+    for start in range(0, len(result), _INFLATE_CHUNK):
+        yield decompressor.decompress(result[start:start + _INFLATE_CHUNK])
+    yield decompressor.flush()
+
+
+@router.post(
+    "/audit",
+    response_model=JobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue a shelf inventory audit",
+)
+async def queue_audit(
+    payload: InventoryAuditRequest,
+    response: Response,
+    service: JobService = Depends(get_job_service),
+    branch: str = Depends(get_branch),
+) -> JobRead:
+    """Queue `POST /inventory/audit` as a background job.
+
+    The result has the same NDJSON lines as the synchronous audit.
+
+    Args:
+        payload (InventoryAuditRequest): Scanned serial numbers.
+        response (Response): Used to set the `Location` header of the job.
+        service (JobService): Job service dependency.
+        branch (str): Branch to audit.
+
+    Returns:
+        JobRead: The queued job.
+
+    Raises:
+        ValidationError: If too many scans are submitted.
+    """
+    return _accepted(await service.enqueue_audit(payload.serials), branch, response)
+
+
+@router.post(
+    "/export",
+    response_model=JobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue an export of every book",
+)
+async def queue_export(
+    response: Response,
+    service: JobService = Depends(get_job_service),
+    branch: str = Depends(get_branch),
+) -> JobRead:
+    """Queue an export of the branch's catalog.
+
+    The result is NDJSON with one `BookRead` per line, in no particular order.
+
+    Args:
+        response (Response): Used to set the `Location` header of the job.
+        service (JobService): Job service dependency.
+        branch (str): Branch to export.
+
+    Returns:
+        JobRead: The queued job.
+    """
+    return _accepted(await service.enqueue_export(), branch, response)
+
+
+@router.post(
+    "/import",
+    response_model=JobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue a bulk import of books",
+)
+async def queue_import(
+    payload: BookImportRequest,
+    response: Response,
+    service: JobService = Depends(get_job_service),
+    branch: str = Depends(get_branch),
+) -> JobRead:
+    """Queue an import of books with caller-chosen serial numbers.
+
+    Books are added in transactions of up to 1000; serials already in use
+    are skipped. The result has one `{"serial_number", "created"}` line per
+    item, in request order.
+
+    Args:
+        payload (BookImportRequest): Books to add.
+        response (Response): Used to set the `Location` header of the job.
+        service (JobService): Job service dependency.
+        branch (str): Branch the books are added to.
+
+    Returns:
+        JobRead: The queued job.
+    """
+    return _accepted(await service.enqueue_import(payload.items), branch, response)
+
+
+@router.get("/{job_id}", response_model=JobRead, summary="Get a job's status and progress")
+async def get_job(
+    job_id: int,
+    service: JobService = Depends(get_job_service),
+    branch: str = Depends(get_branch),
+) -> JobRead:
+    """Return the status and progress (`done` of `total`) of a job.
+
+    Args:
+        job_id (int): Id returned when the job was queued.
+        service (JobService): Job service dependency.
+        branch (str): Branch the job was queued on.
+
+    Returns:
+        JobRead: The job; `result_url` is set once it succeeded.
+
+    Raises:
+        NotFound: If there is no such job (finished jobs are purged after
+            `JOB_RETENTION_HOURS`).
+    """
+    return _job_read(await service.get_job(job_id), branch)
+
+
+@router.get(
+    "/{job_id}/result",
+    summary="Download a job's result",
+    response_description="NDJSON result of the job",
+    response_class=Response,
+    responses={200: {"content": {NDJSON: {}}}},
+)
+async def get_job_result(
+    job_id: int,
+    request: Request,
+    service: JobService = Depends(get_job_service),
+) -> Response:
+    """Download the NDJSON result of a succeeded job.
+
+    Results are stored gzip-compressed and sent as such to clients that
+    accept gzip; others receive them decompressed on the fly.
+
+    Args:
+        job_id (int): Id returned when the job was queued.
+        request (Request): Used to read `Accept-Encoding`.
+        service (JobService): Job service dependency.
+
+    Returns:
+        Response: `application/x-ndjson`.
+
+    Raises:
+        NotFound: If there is no such job.
+        Conflict: If the job has not succeeded (yet).
+    """
+    result = await service.get_result(job_id)
+    headers = {"Vary": "Accept-Encoding"}
+    if accepts_encoding(request.headers.get("accept-encoding"), "gzip"):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=result, media_type=NDJSON, headers=headers)
+    return StreamingResponse(_inflate(result), media_type=NDJSON, headers=headers)
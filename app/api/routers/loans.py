@@ -0,0 +1,104 @@
+"""API routes for circulation history (the loans ledger).
+
+- History of one book
+- History of one library card
+"""
+
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Response
+
+from app.api.deps import get_loan_service, statement_timeout
+from app.schemas.loans import LoanEvent, LoanHistoryResponse
+from app.services.loans import LoanPage, LoanService
+
+router = APIRouter(tags=["loans"])
+
+_HISTORY_DEPENDENCIES = [Depends(statement_timeout("LIST_STATEMENT_TIMEOUT_MS", read_only=True))]
+
+
+def _history_response(page: LoanPage, response: Response) -> LoanHistoryResponse:
+    if page.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return LoanHistoryResponse(items=[LoanEvent.model_validate(loan) for loan in page.items])
+
+
+@router.get(
+    "/books/{serial_number}/loans",
+    response_model=LoanHistoryResponse,
+    summary="Borrow/return history of a book",
+    dependencies=_HISTORY_DEPENDENCIES,
+)
+async def book_loans(
+    serial_number: str,
+    response: Response,
+    limit: int = 50,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    service: LoanService = Depends(get_loan_service),
+) -> LoanHistoryResponse:
+    """List a book's borrows and returns, newest first.
+
+    Args:
+        serial_number (str): Six-digit book identifier (removed books keep
+            their history).
+        response (Response): Used to set `X-Next-Cursor`.
+        limit (int): Page size (1-200, default: 50).
+        since (Optional[datetime]): Only events at or after this instant.
+        until (Optional[datetime]): Only events before this instant. Bounding
+            the window limits the monthly partitions scanned.
+        cursor (Optional[str]): `X-Next-Cursor` of the previous page.
+        service (LoanService): Read-only service layer dependency.
+
+    Returns:
+        LoanHistoryResponse: Ledger entries; a full page carries `X-Next-Cursor`.
+
+    Raises:
+        ValidationError: On a malformed serial, window or cursor.
+    """
+    page = await service.history(
+        serial_number=serial_number, limit=limit, since=since, until=until, cursor=cursor
+    )
+    return _history_response(page, response)
+
+
+@router.get(
+    "/cards/{borrower_card}/loans",
+    response_model=LoanHistoryResponse,
+    summary="Borrow/return history of a library card",
+    dependencies=_HISTORY_DEPENDENCIES,
+)
+async def card_loans(
+    borrower_card: str,
+    response: Response,
+    limit: int = 50,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    service: LoanService = Depends(get_loan_service),
+) -> LoanHistoryResponse:
+    """List everything a card borrowed and returned, newest first.
+
+    Args:
+        borrower_card (str): Six-digit library card number.
+        response (Response): Used to set `X-Next-Cursor`.
+        limit (int): Page size (1-200, default: 50).
+        since (Optional[datetime]): Only events at or after this instant,
+            e.g. `2025-01-01T00:00:00Z` for "since last year".
+        until (Optional[datetime]): Only events before this instant.
+        cursor (Optional[str]): `X-Next-Cursor` of the previous page.
+        service (LoanService): Read-only service layer dependency.
+
+    Returns:
+        LoanHistoryResponse: Ledger entries; a full page carries `X-Next-Cursor`.
+
+    Raises:
+        ValidationError: On a malformed card, window or cursor.
+    """
+    page = await service.history(
+        borrower_card=borrower_card, limit=limit, since=since, until=until, cursor=cursor
+    )
+    return _history_response(page, response)
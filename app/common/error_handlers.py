@@ -7,8 +7,14 @@ into structured JSON error responses with appropriate HTTP status codes.
 
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError
 
-from app.common.exceptions import NotFound, Conflict, ValidationError
+from app.common.exceptions import ClientDisconnected, NotFound, Conflict, ValidationError
+
+# SQLSTATE raised when `statement_timeout` (or a cancel request) aborts a query.
+QUERY_CANCELED_SQLSTATE = "57014"
+# SQLite: the write lock was not granted within SQLITE_BUSY_TIMEOUT_MS
+SQLITE_BUSY = "SQLITE_BUSY"
 
 
 def add_exception_handlers(app: FastAPI) -> None:
@@ -18,6 +24,9 @@ def add_exception_handlers(app: FastAPI) -> None:
         - NotFound → HTTP 404 with `{"error": {"code": "not_found", ...}}`
         - Conflict → HTTP 409 with `{"error": {"code": "conflict", ...}}`
         - ValidationError → HTTP 422 with `{"error": {"code": "validation_error", ...}}`
+        - ClientDisconnected → HTTP 499 (never seen by the client; for access logs)
+        - DBAPIError from `statement_timeout` (or SQLite's busy timeout) → HTTP 503
+          with `{"error": {"code": "timeout", ...}}`
 
     Args:
         app (FastAPI): Application instance to register handlers on.
@@ -46,3 +55,31 @@ def add_exception_handlers(app: FastAPI) -> None:
             status_code=422,
             content={"error": {"code": "validation_error", "message": exc.message, "details": {}}},
         )
+
+    @app.exception_handler(ClientDisconnected)
+    async def client_disconnected_handler(_: Request, exc: ClientDisconnected) -> JSONResponse:
+        """Convert ClientDisconnected into a 499 (nginx "client closed request")."""
+        return JSONResponse(
+            status_code=499,
+            content={"error": {"code": "client_closed_request", "message": exc.message, "details": {}}},
+        )
+
+    @app.exception_handler(DBAPIError)
+    async def dbapi_error_handler(_: Request, exc: DBAPIError) -> JSONResponse:
+        """Convert statement/lock timeouts into HTTP 503; other DB errors into 500."""
+        sqlstate = getattr(exc.orig, "sqlstate", None) or getattr(exc.orig, "pgcode", None)
+        if sqlstate == QUERY_CANCELED_SQLSTATE or getattr(exc.orig, "sqlite_errorname", None) == SQLITE_BUSY:
+            return JSONResponse(
+                status_code=503,
+                content={
+                    "error": {
+                        "code": "timeout",
+                        "message": "Query exceeded its statement deadline.",
+                        "details": {},
+                    }
+                },
+            )
+        return JSONResponse(
+            status_code=500,
+            content={"error": {"code": "internal_error", "message": "Database error.", "details": {}}},
+        )
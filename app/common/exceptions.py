@@ -24,3 +24,10 @@ class ValidationError(Exception):
     def __init__(self, message: str = "Validation error"):
         super().__init__(message)
         self.message = message
+
+
+class ClientDisconnected(Exception):
+    """The HTTP client went away before the response was ready."""
+    def __init__(self, message: str = "Client disconnected"):
+        super().__init__(message)
+        self.message = message
@@ -3,12 +3,15 @@
 This module defines the `Settings` class, which centralizes environment-driven
 configuration according to 12-factor app principles. Settings are loaded via
 `pydantic-settings` and support both `.env` files and environment variables.
+Use `get_settings()`; settings are read on first use rather than at import.
 """
 
 
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Literal, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from sqlalchemy.engine import make_url
 
 
 class Settings(BaseSettings):
@@ -18,6 +21,9 @@ class Settings(BaseSettings):
       - Direct `DATABASE_URL` (async DSN)
       - Individual `POSTGRES_*` pieces (DB, user, password, host, port)
         which are combined into an async DSN.
+
+    The storage backend follows the DSN: PostgreSQL (`postgresql+asyncpg://`)
+    or, for single-node deployments, SQLite (`sqlite+aiosqlite:///path.db`).
     """
 
     model_config = SettingsConfigDict(
@@ -38,6 +44,111 @@ class Settings(BaseSettings):
     APP_ENV: str = "dev"
     LOG_LEVEL: str = "INFO"
 
+    # HTTP server (`python -m app.server`). Workers default to usable CPUs;
+    # each worker owns its own DB pool (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    UVICORN_WORKERS: Optional[int] = None
+    SERVER_LOOP: Literal["auto", "uvloop", "asyncio"] = "auto"
+    SERVER_HTTP: Literal["auto", "httptools", "h11"] = "auto"
+    SERVER_KEEPALIVE_S: int = 5
+    SERVER_BACKLOG: int = 2048
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = None
+    SERVER_GRACEFUL_SHUTDOWN_S: int = 30
+
+    # Connection pool. `DB_POOL_SIZE` connections are opened and primed at
+    # startup when `DB_POOL_WARMUP` is enabled; readiness waits for that.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_WARMUP: bool = True
+
+    # Set when DATABASE_URL points at pgbouncer in transaction pooling mode:
+    # prepared statements get unique names and statement caches are disabled.
+    PGBOUNCER_TRANSACTION_MODE: bool = False
+    # Direct (non-pgbouncer) DSN for session-level features: the migration
+    # advisory lock and LISTEN for the serial and suggest indexes. Defaults to the regular DSN.
+    DIRECT_DATABASE_URL: Optional[str] = None
+
+    # SQLite backend only: how long a writer waits for the database lock
+    # (writers are serialized with BEGIN IMMEDIATE) before failing with 503.
+    SQLITE_BUSY_TIMEOUT_MS: int = 5_000
+
+    # Additional branches, each in its own database with its own serial space,
+    # as a JSON object: {"north": "postgresql+asyncpg://...", ...}. The
+    # default branch ("main") is DATABASE_URL. See app.db.shards.
+    BRANCH_DATABASE_URLS: dict[str, str] = {}
+
+    # Months of `loans` partitions kept created ahead of the current one
+    # (by `python -m app.db.migrate`; see app.db.partitions)
+    LOAN_PARTITIONS_AHEAD: int = 3
+
+    # Maximum books borrowed at once per borrower card, per branch (0: no
+    # limit). Checked against the `card_loans` counters on every checkout.
+    MAX_LOANS_PER_CARD: int = 0
+
+    # Group commit for borrow/return (see app.services.status_batcher): each
+    # worker applies the changes arriving within this many milliseconds in
+    # one transaction (0 disables), at most STATUS_BATCH_MAX at a time.
+    STATUS_BATCH_WINDOW_MS: float = 0
+    STATUS_BATCH_MAX: int = 256
+
+    # Background jobs (see app.services.job_runner). Each API worker runs up
+    # to JOB_CONCURRENCY jobs at once, on up to 2 * JOB_CONCURRENCY + 1
+    # connections of its own per branch; 0 leaves the queues to
+    # `python -m app.services.job_runner`.
+    JOB_CONCURRENCY: int = 1
+    JOB_POLL_INTERVAL_S: float = 1.0
+    # A running job whose runner sent no heartbeat for this long is queued
+    # again, up to JOB_MAX_ATTEMPTS starts in all.
+    JOB_STALE_AFTER_S: float = 60.0
+    JOB_MAX_ATTEMPTS: int = 3
+    # Finished jobs and their results are deleted after this long.
+    JOB_RETENTION_HOURS: float = 24.0
+    # Statement deadline inside jobs (ms, 0 disables); STATEMENT_TIMEOUT_MS
+    # is meant for requests.
+    JOB_STATEMENT_TIMEOUT_MS: int = 0
+
+    # Per-worker bitmap of existing serial numbers (see app.services.serial_index)
+    SERIAL_INDEX_ENABLED: bool = True
+
+    # Per-worker prefix index answering `GET /books/suggest` from memory
+    # (see app.services.suggest_index)
+    SUGGEST_INDEX_ENABLED: bool = True
+
+    # Per-worker columnar replica answering default-order listings and stats
+    # from memory (see app.services.catalog_replica; needs numpy and the
+    # serial index). Listings may lag writes by up to the refresh interval.
+    # The full table is reloaded every CATALOG_REPLICA_RESYNC_S (0: never).
+    CATALOG_REPLICA_ENABLED: bool = False
+    CATALOG_REPLICA_REFRESH_S: float = 1.0
+    CATALOG_REPLICA_RESYNC_S: float = 600.0
+
+    # Transaction mode for query (read) routes:
+    #   - "read_only":  BEGIN READ ONLY transactions
+    #   - "autocommit": driver-level autocommit, no BEGIN/ROLLBACK round trips
+    #   - "default":    regular read-write transactions (pre-existing behaviour)
+    DB_READ_MODE: Literal["read_only", "autocommit", "default"] = "read_only"
+
+    # Statement deadlines (milliseconds, 0 disables). The default applies to
+    # every connection; per-route values are set with `SET LOCAL`.
+    STATEMENT_TIMEOUT_MS: int = 10_000
+    LIST_STATEMENT_TIMEOUT_MS: int = 3_000
+
+    # Responses smaller than this are never compressed (bytes).
+    COMPRESSION_MIN_BYTES: int = 1024
+
+    # Per-request profiling (see app.api.profiling): requests sent with
+    # `X-Profile: <PROFILE_TOKEN>` (unset: header ignored) and this fraction
+    # of all requests are sampled every PROFILE_INTERVAL_MS (each sample holds
+    # the GIL, so shorter intervals slow the worker down); collapsed stacks
+    # for flame graphs are written to PROFILE_DIR, which keeps the newest
+    # PROFILE_MAX_FILES of them (0: no limit).
+    PROFILE_TOKEN: Optional[str] = None
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 1000
+
     def get_async_database_url(self) -> str:
         """Return the async PostgreSQL DSN to use.
 
@@ -62,5 +173,32 @@ class Settings(BaseSettings):
             f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    def get_database_backend(self) -> Literal["postgresql", "sqlite"]:
+        """Return the storage backend selected by the configured DSN.
+
+        Returns:
+            str: "sqlite" for `sqlite+aiosqlite://` DSNs, else "postgresql".
+        """
+        backend = make_url(self.get_async_database_url()).get_backend_name()
+        return "sqlite" if backend == "sqlite" else "postgresql"
+
+    def get_direct_database_url(self) -> str:
+        """Return the DSN for session-level features (bypassing pgbouncer).
+
+        Returns:
+            str: `DIRECT_DATABASE_URL` if set, else `get_async_database_url()`.
+        """
+        return self.DIRECT_DATABASE_URL or self.get_async_database_url()
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide settings, loaded on first use (not at import)."""
+    return Settings()
+
 
-settings = Settings()
+def __getattr__(name: str) -> Any:
+    """Keep `from app.core.config import settings` working, lazily."""
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,380 @@
+"""Coordinated schema migrations for container start.
+
+Usage:
+    python -m app.db.migrate [--recount-card-loans]
+
+Replaces a bare `alembic upgrade head` in the entrypoint:
+  - Fast path: compares `alembic_version` with the script heads and exits
+    without importing `alembic/env.py`, the models or taking any lock when the
+    database is already current (the common case on every restart).
+  - Otherwise takes a Postgres session-level advisory lock so replicas rolling
+    out together do not race; whoever waits re-checks after acquiring the lock
+    and usually finds the work already done. Waiters poll
+    `pg_try_advisory_lock` between transactions rather than block in
+    `pg_advisory_lock`: a blocked call holds a snapshot, and the holder's
+    `CREATE INDEX CONCURRENTLY` waits for every older snapshot to go away,
+    so the two would deadlock.
+
+Every branch database (`BRANCH_DATABASE_URLS`, see `app.db.shards`) is
+migrated the same way after the default one, and each gets its upcoming
+monthly `loans` partitions (see `app.db.partitions`).
+
+With the SQLite backend the revisions (which use PostgreSQL-only DDL) are not
+run; the schema is created from the models instead: missing tables are
+created, and a `books` table from before `authors` gets its `author_id`
+column and backfill.
+
+`--recount-card-loans` additionally recomputes the per-card active loan
+counters from `books` (see `recount_card_loans`), e.g. after instances
+older than the counters kept serving checkouts during a rolling deploy.
+
+Index migrations on the large `books` table should use
+`create_index_concurrently` / `drop_index_concurrently` from this module,
+which run `CREATE/DROP INDEX CONCURRENTLY` outside the migration transaction
+so writes are not blocked while the index builds.
+"""
+
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, pool, text
+from sqlalchemy.engine import Connection, make_url
+
+from app.core.config import get_settings
+
+logger = logging.getLogger("app.db.migrate")
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Arbitrary, fixed bigint shared by every replica ("librmig" in ASCII).
+MIGRATION_LOCK_KEY = 0x6C6962726D6967
+
+# Seconds between attempts to take the migration lock
+MIGRATION_LOCK_POLL_S = 0.5
+
+
+def sync_database_url(url: Optional[str] = None) -> str:
+    """Return the migration DSN with the sync psycopg driver (as `alembic/env.py` does).
+
+    `DIRECT_DATABASE_URL` wins when set: the session-level advisory lock
+    is not reliable through pgbouncer in transaction pooling mode.
+
+    Args:
+        url (Optional[str]): Async DSN of another database (a branch shard)
+            to convert instead of the configured one.
+    """
+    url = url or get_settings().get_direct_database_url()
+    return url.replace("+asyncpg", "+psycopg").replace("+aiosqlite", "")
+
+
+def script_heads(config: Config) -> set[str]:
+    """Return the head revision(s) of the migration scripts."""
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+
+def current_revisions(connection: Connection) -> set[str]:
+    """Return revisions recorded in `alembic_version` (empty if not created yet)."""
+    exists = connection.execute(text("SELECT to_regclass('alembic_version')")).scalar()
+    if exists is None:
+        return set()
+    return set(connection.execute(text("SELECT version_num FROM alembic_version")).scalars())
+
+
+def acquire_migration_lock(connection: Connection, poll_s: float = MIGRATION_LOCK_POLL_S) -> None:
+    """Take the session-level migration lock, polling outside any transaction.
+
+    Each attempt is its own short transaction, so a waiting replica never
+    holds a snapshot that a concurrent index build would wait on.
+    """
+    while True:
+        acquired = connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY}
+        ).scalar()
+        connection.commit()
+        if acquired:
+            return
+        time.sleep(poll_s)
+
+
+def create_sqlite_schema(url: Optional[str] = None) -> bool:
+    """Create the schema of a SQLite database from the models if it is missing.
+
+    Args:
+        url (Optional[str]): Async DSN; defaults to the configured database.
+
+    Returns:
+        bool: True if tables were created or upgraded, False if the schema
+        was already current.
+    """
+    from app.db.base import Base
+    import app.models.book  # noqa: F401  (registers the tables)
+    import app.models.card  # noqa: F401
+    import app.models.job  # noqa: F401
+    import app.models.loan  # noqa: F401
+
+    engine = create_engine(sync_database_url(url), poolclass=pool.NullPool)
+    try:
+        with engine.begin() as connection:
+            inspector = inspect(connection)
+            tables = set(inspector.get_table_names())
+            missing = set(Base.metadata.tables) - tables
+            legacy_books = "books" in tables and "author_id" not in {
+                column["name"] for column in inspector.get_columns("books")
+            }
+            if not missing and not legacy_books:
+                logger.info("SQLite schema already present")
+                return False
+            Base.metadata.create_all(connection)
+            if missing:
+                logger.info("Created SQLite schema (%s)", ", ".join(sorted(missing)))
+            if "card_loans" in missing and "books" in tables:
+                logger.info("Counted loans of %d cards", recount_card_loans(connection))
+            if legacy_books:
+                # SQLite cannot add a NOT NULL column to existing rows; the
+                # application always sets it
+                connection.execute(
+                    text("ALTER TABLE books ADD COLUMN author_id INTEGER REFERENCES authors (id)")
+                )
+                count = backfill_author_ids(connection)
+                for index in Base.metadata.tables["books"].indexes:
+                    if index.name == "idx_books_author_listing":
+                        index.create(connection)
+                logger.info("Linked %d books to authors", count)
+            return True
+    finally:
+        engine.dispose()
+
+
+def upgrade_to_head(config: Config | None = None, url: Optional[str] = None) -> bool:
+    """Upgrade the database to head, coordinating with other replicas.
+
+    Args:
+        config (Config | None): Alembic config; defaults to the repo's `alembic.ini`.
+        url (Optional[str]): Async DSN of a branch shard; defaults to the
+            configured (default branch) database.
+
+    Returns:
+        bool: True if migrations were applied by this process, False if the
+        database was already at head.
+    """
+    if make_url(url or get_settings().get_async_database_url()).get_backend_name() == "sqlite":
+        return create_sqlite_schema(url)
+    config = config or Config(str(ALEMBIC_INI))
+    heads = script_heads(config)
+    engine = create_engine(sync_database_url(url), poolclass=pool.NullPool)
+    try:
+        with engine.connect() as connection:
+            if current_revisions(connection) == heads:
+                logger.info("Database already at head %s", ", ".join(sorted(heads)))
+                return False
+            connection.commit()
+
+            started = time.monotonic()
+            acquire_migration_lock(connection)
+            logger.info("Acquired migration lock in %.1fs", time.monotonic() - started)
+            try:
+                found = current_revisions(connection)
+                # End the implicit transaction so Alembic owns transaction control
+                # (and `autocommit_block` works); the session-level lock survives.
+                connection.commit()
+                if found == heads:
+                    logger.info("Another replica migrated to head; nothing to do")
+                    return False
+                config.attributes["connection"] = connection
+                command.upgrade(config, "head")
+                logger.info("Migrated to head %s", ", ".join(sorted(heads)))
+                return True
+            finally:
+                connection.rollback()
+                connection.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY}
+                )
+                connection.commit()
+    finally:
+        engine.dispose()
+
+
+def create_upcoming_partitions(url: Optional[str] = None) -> list[str]:
+    """Create the `loans` partitions due within `LOAN_PARTITIONS_AHEAD` months.
+
+    Runs on every start (cheap when they exist); no-op on SQLite.
+    """
+    from app.db.partitions import ensure_loan_partitions
+
+    engine = create_engine(sync_database_url(url), poolclass=pool.NullPool)
+    try:
+        with engine.begin() as connection:
+            created = ensure_loan_partitions(connection)
+    finally:
+        engine.dispose()
+    if created:
+        logger.info("Created loans partitions %s", ", ".join(created))
+    return created
+
+
+def run_card_loans_recount(url: Optional[str] = None) -> int:
+    """Run `recount_card_loans` in its own transaction on one database."""
+    engine = create_engine(sync_database_url(url), poolclass=pool.NullPool)
+    try:
+        with engine.begin() as connection:
+            return recount_card_loans(connection)
+    finally:
+        engine.dispose()
+
+
+# --- helpers for migration scripts ------------------------------------------
+
+def create_index_concurrently(
+    index_name: str, table_name: str, columns: Sequence[Any], **kw: Any
+) -> None:
+    """`CREATE INDEX CONCURRENTLY IF NOT EXISTS` from inside a migration.
+
+    Runs in an autocommit block, so it must be the only statement touching the
+    table in its migration. `IF NOT EXISTS` makes a retried migration safe;
+    an invalid index left by a failed build should be dropped first.
+    """
+    from alembic import op
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            index_name,
+            table_name,
+            list(columns),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+            **kw,
+        )
+
+
+def backfill_author_ids(connection: Connection) -> int:
+    """Create the authors of books without `author_id` and link them.
+
+    Distinct names are normalized in Python with the same `author_key` the
+    application uses, so the backfill and new writes agree on identity. The
+    name-to-id mapping is loaded into a temporary table and applied with one
+    `UPDATE ... FROM`. Used to upgrade SQLite databases; the PostgreSQL
+    revision (`f4a1c7d2e9b5`) links books in batches with its own copy.
+
+    Args:
+        connection (Connection): Sync connection inside a transaction.
+
+    Returns:
+        int: Number of books linked.
+    """
+    from app.repositories.authors import author_key
+
+    counts = connection.execute(
+        text("SELECT author, count(*) FROM books WHERE author_id IS NULL GROUP BY author")
+    ).all()
+    if not counts:
+        return 0
+    keys = {name: author_key(name) for name, _ in counts}
+    ids = dict(connection.execute(text("SELECT name_key, id FROM authors")).all())
+    new: dict[str, str] = {}
+    # New authors are displayed in their most common spelling
+    for name, _ in sorted(counts, key=lambda row: (-row[1], row[0])):
+        if keys[name] not in ids:
+            new.setdefault(keys[name], name)
+    if new:
+        connection.execute(
+            text("INSERT INTO authors (name, name_key) VALUES (:name, :name_key)"),
+            [{"name": name, "name_key": key} for key, name in new.items()],
+        )
+        ids = dict(connection.execute(text("SELECT name_key, id FROM authors")).all())
+
+    connection.execute(
+        text("CREATE TEMPORARY TABLE author_map (author TEXT PRIMARY KEY, author_id INTEGER NOT NULL)")
+    )
+    connection.execute(
+        text("INSERT INTO author_map (author, author_id) VALUES (:author, :author_id)"),
+        [{"author": name, "author_id": ids[key]} for name, key in keys.items()],
+    )
+    result = connection.execute(
+        text(
+            "UPDATE books SET author_id = m.author_id FROM author_map AS m"
+            " WHERE books.author = m.author AND books.author_id IS NULL"
+        )
+    )
+    connection.execute(text("DROP TABLE author_map"))
+    return result.rowcount
+
+
+def recount_card_loans(connection: Connection) -> int:
+    """Recompute every card's active loan counter from `books`.
+
+    On PostgreSQL the counters are locked (`EXCLUSIVE`, which still allows
+    reads) for the rest of the transaction first. A checkout or return
+    updates its card's counter before the book, so every transaction that
+    changed a book's borrow state holds a counter lock until it commits. The
+    recount waits for those transactions and blocks new ones, which makes it
+    exact even under live traffic. Works on PostgreSQL and SQLite.
+
+    Args:
+        connection (Connection): Sync connection inside a transaction.
+
+    Returns:
+        int: Number of cards with active loans.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("LOCK TABLE card_loans IN EXCLUSIVE MODE"))
+    connection.execute(text("DELETE FROM card_loans"))
+    result = connection.execute(
+        text(
+            "INSERT INTO card_loans (borrower_card, active)"
+            " SELECT borrower_card, count(*) FROM books"
+            " WHERE borrower_card IS NOT NULL GROUP BY borrower_card"
+        )
+    )
+    return result.rowcount
+
+
+def drop_index_concurrently(index_name: str, table_name: str) -> None:
+    """`DROP INDEX CONCURRENTLY IF EXISTS` from inside a migration."""
+    from alembic import op
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            index_name,
+            table_name=table_name,
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """CLI entry point: migrate every branch database to head; exit non-zero on failure."""
+    parser = argparse.ArgumentParser(description="Migrate every branch database to head.")
+    parser.add_argument(
+        "--recount-card-loans",
+        action="store_true",
+        help="also recompute the per-card active loan counters",
+    )
+    args = parser.parse_args(argv)
+    settings = get_settings()
+    logging.basicConfig(level=settings.LOG_LEVEL, format="[migrate] %(message)s")
+    try:
+        branches = [(None, None), *sorted(settings.BRANCH_DATABASE_URLS.items())]
+        for branch, url in branches:
+            if branch is not None:
+                logger.info("Migrating branch %s", branch)
+            upgrade_to_head(url=url)
+            create_upcoming_partitions(url)
+            if args.recount_card_loans:
+                logger.info("Counted loans of %d cards", run_card_loans_recount(url))
+    except Exception:
+        logger.exception("Migration failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Monthly range partitions of the `loans` ledger (PostgreSQL).
+
+Usage:
+    python -m app.db.partitions ensure [--months N]
+    python -m app.db.partitions detach --before YYYY-MM
+
+`loans` is `PARTITION BY RANGE (occurred_at)` with one partition per calendar
+month (`loans_YYYY_MM`, UTC). There is deliberately no DEFAULT partition, so
+old months can be detached without blocking writers
+(`DETACH PARTITION ... CONCURRENTLY` is refused while one exists). Instead:
+  - `ensure` creates the current month and `LOAN_PARTITIONS_AHEAD` further
+    months if missing; `python -m app.db.migrate` runs it on every start, the
+    job runner on every maintenance pass (`app.services.job_runner`), and
+    the table's `after_create` hook for `create_all`.
+  - `detach` detaches every partition that ends on or before a month, leaving
+    it as a plain table to archive or drop, so the hot table stays small.
+"""
+
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy import create_engine, pool, text
+from sqlalchemy.engine import Connection
+
+from app.core.config import get_settings
+
+logger = logging.getLogger("app.db.partitions")
+
+LOANS_TABLE = "loans"
+
+# Serializes concurrent `ensure` calls (every job runner makes them), which
+# would otherwise race to create the same partition ("librprt" in ASCII)
+PARTITION_LOCK_KEY = 0x6C696272707274
+
+_EXISTING = text(
+    """
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = CAST(:parent AS regclass)
+    """
+)
+
+
+def month_start(day: date) -> date:
+    """Return the first day of `day`'s month."""
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    """Return the first day of the month `months` after `month`."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Return the partition table name for a month, e.g. `loans_2026_10`."""
+    return f"{LOANS_TABLE}_{month.year:04d}_{month.month:02d}"
+
+
+def _partition_month(name: str) -> Optional[date]:
+    try:
+        year, month = name.removeprefix(f"{LOANS_TABLE}_").split("_")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+
+def attached_partitions(connection: Connection) -> list[str]:
+    """Return the names of the partitions currently attached to `loans`."""
+    return sorted(connection.execute(_EXISTING, {"parent": LOANS_TABLE}).scalars())
+
+
+def ensure_loan_partitions(
+    connection: Connection, *, months: Optional[int] = None, today: Optional[date] = None
+) -> list[str]:
+    """Create the missing partitions from the current month to `months` ahead.
+
+    Only missing partitions are created, so the common case takes no lock
+    on `loans`. Otherwise the caller's transaction holds an advisory lock
+    (`PARTITION_LOCK_KEY`) and re-reads the partitions under it. No-op on
+    other backends.
+
+    Args:
+        connection (Connection): Sync connection; the caller commits.
+        months (Optional[int]): Months ahead (default `LOAN_PARTITIONS_AHEAD`).
+        today (Optional[date]): Reference day (default: today, UTC).
+
+    Returns:
+        list[str]: Names of the partitions created.
+    """
+    if connection.dialect.name != "postgresql":
+        return []
+    if months is None:
+        months = get_settings().LOAN_PARTITIONS_AHEAD
+    first = month_start(today or datetime.now(timezone.utc).date())
+    wanted = [add_months(first, offset) for offset in range(months + 1)]
+    if {partition_name(lower) for lower in wanted} <= set(attached_partitions(connection)):
+        return []
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+    existing = set(attached_partitions(connection))
+    created = []
+    for lower in wanted:
+        name = partition_name(lower)
+        if name in existing:
+            continue
+        connection.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {LOANS_TABLE} "
+                f"FOR VALUES FROM ('{lower.isoformat()} 00:00:00+00') "
+                f"TO ('{add_months(lower, 1).isoformat()} 00:00:00+00')"
+            )
+        )
+        created.append(name)
+    return created
+
+
+def detach_loan_partitions(connection: Connection, *, before: date) -> list[str]:
+    """Detach (without dropping) the partitions of months ending on or before `before`.
+
+    Uses `DETACH PARTITION ... CONCURRENTLY`, which cannot run inside a
+    transaction: pass a connection in AUTOCOMMIT isolation.
+
+    Args:
+        connection (Connection): Sync connection in autocommit mode.
+        before (date): First month to keep (any day of it).
+
+    Returns:
+        list[str]: Names of the detached tables.
+    """
+    keep_from = month_start(before)
+    detached = []
+    for name in attached_partitions(connection):
+        month = _partition_month(name)
+        if month is None or add_months(month, 1) > keep_from:
+            continue
+        connection.execute(text(f"ALTER TABLE {LOANS_TABLE} DETACH PARTITION {name} CONCURRENTLY"))
+        logger.info("Detached %s", name)
+        detached.append(name)
+    return detached
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """CLI entry point (see module docstring)."""
+    from app.db.migrate import sync_database_url
+
+    parser = argparse.ArgumentParser(description="Manage monthly loans partitions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ensure = commands.add_parser("ensure", help="create upcoming partitions")
+    ensure.add_argument("--months", type=int, default=None)
+    detach = commands.add_parser("detach", help="detach old partitions")
+    detach.add_argument("--before", required=True, help="first month to keep, YYYY-MM")
+    args = parser.parse_args(argv)
+
+    settings = get_settings()
+    logging.basicConfig(level=settings.LOG_LEVEL, format="[partitions] %(message)s")
+    urls = [None, *(url for _, url in sorted(settings.BRANCH_DATABASE_URLS.items()))]
+    for url in urls:
+        engine = create_engine(sync_database_url(url), poolclass=pool.NullPool)
+        try:
+            if args.command == "ensure":
+                with engine.begin() as connection:
+                    created = ensure_loan_partitions(connection, months=args.months)
+                logger.info("Created %s", ", ".join(created) or "no partitions")
+            else:
+                before = datetime.strptime(args.before, "%Y-%m").date()
+                with engine.connect() as connection:
+                    connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+                    detached = detach_loan_partitions(connection, before=before)
+                logger.info("Detached %s", ", ".join(detached) or "no partitions")
+        except Exception:
+            logger.exception("Partition maintenance failed")
+            sys.exit(1)
+        finally:
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
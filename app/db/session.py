@@ -1,12 +1,30 @@
 """Database engine and session setup for SQLAlchemy (async).
 
 This module configures the async database engine and provides
-a session factory (`AsyncSessionLocal`) for dependency injection.
+session factories for dependency injection:
+  - `get_sessionmaker()` for commands (regular read-write transactions)
+  - `get_read_sessionmaker()` for queries (read-only or autocommit, see `DB_READ_MODE`)
+
+The SQLite backend (single-node deployments) runs in WAL mode, so readers
+never block the writer, and starts every command transaction with
+`BEGIN IMMEDIATE`: writers are serialized up front, which is what the
+PostgreSQL path gets from `SELECT ... FOR UPDATE` row locks.
+
+Nothing is created at import time: the engine and factories are built on
+first use (normally from the application lifespan), so importing the app
+stays cheap for every worker and test run.
 """
 
 
 from __future__ import annotations
 
+from functools import lru_cache
+from typing import Any, Optional
+from uuid import uuid4
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.orm import Session, SessionTransaction
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -14,29 +32,237 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
-from app.core.config import settings
+from app.core.config import get_settings
+
+
+def _pgbouncer_connect_args() -> dict[str, Any]:
+    """asyncpg connect arguments for pgbouncer in transaction pooling mode.
+
+    Consecutive transactions may land on different server connections, so
+    statements prepared on one are unknown (or clash by name) on another:
+    both statement caches are disabled and every prepared statement gets a
+    unique name.
+    """
+    return {
+        "statement_cache_size": 0,  # asyncpg's own cache
+        "prepared_statement_cache_size": 0,  # SQLAlchemy adapter's cache
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+
+
+# Execution option selecting how SQLite transactions begin: "IMMEDIATE"
+# (default; takes the write lock up front) or "DEFERRED" (read paths).
+SQLITE_BEGIN_OPTION = "sqlite_begin"
+
+
+def _configure_sqlite(engine: AsyncEngine, busy_timeout_ms: int) -> None:
+    """Install WAL mode and explicit transaction control on a SQLite engine.
+
+    The driver's own implicit BEGIN is disabled so that SQLAlchemy's "begin"
+    event can issue `BEGIN IMMEDIATE` (or `BEGIN` for read paths); see the
+    SQLAlchemy pysqlite/aiosqlite "serializable isolation" notes.
+    """
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection: Any, _record: Any) -> None:
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _on_begin(conn: Connection) -> None:
+        mode = conn.get_execution_options().get(SQLITE_BEGIN_OPTION, "IMMEDIATE")
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if mode == "IMMEDIATE" else "BEGIN")
 
 
-def _make_engine() -> AsyncEngine:
+def _make_engine(
+    url: Optional[str] = None,
+    *,
+    pgbouncer: Optional[bool] = None,
+    pool_size: Optional[int] = None,
+    max_overflow: Optional[int] = None,
+) -> AsyncEngine:
     """Create the global async database engine.
 
-    Uses connection settings from `app.core.config.settings` and
-    enables `pool_pre_ping` to validate connections.
+    Uses connection settings from `app.core.config.get_settings()` and
+    enables `pool_pre_ping` to validate connections. A server-side
+    `statement_timeout` is set per connection when `STATEMENT_TIMEOUT_MS`
+    is non-zero, so autocommit reads are bounded too. With
+    `PGBOUNCER_TRANSACTION_MODE`, prepared statements are made pgbouncer-safe
+    and no startup `server_settings` are sent (pgbouncer rejects unknown
+    startup parameters); per-route `SET LOCAL` deadlines still apply.
+
+    A `sqlite+aiosqlite://` DSN yields a SQLite engine configured by
+    `_configure_sqlite` instead.
+
+    Args:
+        url (Optional[str]): DSN override (defaults to the configured one).
+        pgbouncer (Optional[bool]): Override for `PGBOUNCER_TRANSACTION_MODE`.
+        pool_size (Optional[int]): Override for `DB_POOL_SIZE`.
+        max_overflow (Optional[int]): Override for `DB_MAX_OVERFLOW`.
 
     Returns:
         AsyncEngine: Configured SQLAlchemy async engine.
     """
+    settings = get_settings()
+    url = url or settings.get_async_database_url()
+    if pool_size is None:
+        pool_size = settings.DB_POOL_SIZE
+    if max_overflow is None:
+        max_overflow = settings.DB_MAX_OVERFLOW
+    if make_url(url).get_backend_name() == "sqlite":
+        engine = create_async_engine(url, pool_size=pool_size, max_overflow=max_overflow)
+        _configure_sqlite(engine, settings.SQLITE_BUSY_TIMEOUT_MS)
+        return engine
+
+    if pgbouncer is None:
+        pgbouncer = settings.PGBOUNCER_TRANSACTION_MODE
+    connect_args: dict[str, Any] = {}
+    if pgbouncer:
+        connect_args.update(_pgbouncer_connect_args())
+    elif settings.STATEMENT_TIMEOUT_MS > 0:
+        connect_args["server_settings"] = {
+            "statement_timeout": str(settings.STATEMENT_TIMEOUT_MS)
+        }
     return create_async_engine(
-        settings.get_async_database_url(),
+        url,
         future=True,
         pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        connect_args=connect_args,
     )
 
 
-engine = _make_engine()
+def _read_execution_options(mode: str, backend: str = "postgresql") -> dict[str, Any]:
+    """Map `DB_READ_MODE` to connection-level execution options.
 
-AsyncSessionLocal = async_sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
+    Args:
+        mode (str): One of "read_only", "autocommit" or "default".
+        backend (str): "postgresql" or "sqlite". On SQLite every mode maps to
+            a deferred `BEGIN`, which never waits for the write lock.
+
+    Returns:
+        dict[str, Any]: Execution options for the query-path engine. They are
+        applied per checkout and reset when the connection returns to the pool.
+    """
+    if backend == "sqlite":
+        return {SQLITE_BEGIN_OPTION: "DEFERRED"}
+    if mode == "autocommit":
+        return {"isolation_level": "AUTOCOMMIT"}
+    if mode == "read_only":
+        return {"postgresql_readonly": True}
+    return {}
+
+
+def scan_execution_options(backend: str) -> dict[str, Any]:
+    """Return execution options for a long read-only scan (server-side cursor).
+
+    A read-only transaction on PostgreSQL (cursors need a transaction, so
+    `DB_READ_MODE=autocommit` cannot be used) and a deferred `BEGIN` on
+    SQLite, so the scan never holds the single write lock.
+
+    Args:
+        backend (str): "postgresql" or "sqlite".
+    """
+    return _read_execution_options("read_only", backend)
+
+
+@lru_cache
+def get_engine() -> AsyncEngine:
+    """Return the process-wide async engine, creating it on first call."""
+    return _make_engine()
+
+
+@lru_cache
+def get_read_engine() -> AsyncEngine:
+    """Return the query-path engine.
+
+    Shares the pool with `get_engine()`; only the per-connection
+    characteristics (read-only / autocommit) differ.
+    """
+    settings = get_settings()
+    return get_engine().execution_options(
+        **_read_execution_options(settings.DB_READ_MODE, settings.get_database_backend())
+    )
+
+
+@lru_cache
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Return the session factory for commands (read-write transactions)."""
+    return async_sessionmaker(
+        bind=get_engine(),
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+
+
+@lru_cache
+def get_read_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Return the session factory for queries (see `DB_READ_MODE`)."""
+    return async_sessionmaker(
+        bind=get_read_engine(),
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+
+
+async def dispose_engine() -> None:
+    """Close pooled connections (used on application shutdown)."""
+    if get_engine.cache_info().currsize:
+        await get_engine().dispose()
+
+
+# `Session.info` key holding a statement timeout (ms) to apply at the start of
+# each transaction of that session; see `defer_local_statement_timeout`.
+STATEMENT_TIMEOUT_INFO_KEY = "statement_timeout_ms"
+
+_SET_LOCAL_TIMEOUT = text("SELECT set_config('statement_timeout', :timeout, true)")
+
+
+def defer_local_statement_timeout(session: AsyncSession, timeout_ms: int) -> None:
+    """Apply a transaction-local `statement_timeout` once the session touches the DB.
+
+    Like `set_local_statement_timeout`, but issued from the session's
+    `after_begin` hook, so a request that is answered without a query (for
+    example from the catalog replica) costs no round trip, and each new
+    transaction of the session gets the deadline again.
+
+    Args:
+        session (AsyncSession): Request-scoped session.
+        timeout_ms (int): Deadline in milliseconds; 0 disables the timeout.
+    """
+    session.info[STATEMENT_TIMEOUT_INFO_KEY] = timeout_ms
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_deferred_statement_timeout(
+    session: Session, _transaction: SessionTransaction, connection: Connection
+) -> None:
+    timeout_ms = session.info.get(STATEMENT_TIMEOUT_INFO_KEY)
+    if timeout_ms is None or connection.dialect.name == "sqlite":
+        return
+    connection.execute(_SET_LOCAL_TIMEOUT, {"timeout": str(timeout_ms)})
+
+
+async def set_local_statement_timeout(session: AsyncSession, timeout_ms: int) -> None:
+    """Set `statement_timeout` for the session's current transaction only.
+
+    Equivalent to `SET LOCAL statement_timeout`, but bound as a parameter via
+    `set_config(..., is_local => true)`. The value is discarded at COMMIT or
+    ROLLBACK, so it never leaks to the next user of the pooled connection.
+    Outside a transaction (autocommit reads) it has no effect and the
+    connection-level default from `_make_engine` applies. SQLite has no
+    statement timeout, so this is a no-op there.
+
+    Args:
+        session (AsyncSession): Request-scoped session.
+        timeout_ms (int): Deadline in milliseconds; 0 disables the timeout.
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        return
+    await session.execute(_SET_LOCAL_TIMEOUT, {"timeout": str(timeout_ms)})
@@ -0,0 +1,112 @@
+"""Branch shards: one database (engine and pool) per library branch.
+
+Every branch owns a full six-digit serial space in its own database, so a
+book is identified by `(branch, serial_number)`. The default branch
+(`DEFAULT_BRANCH`) is the database configured by `DATABASE_URL` and uses the
+engines from `app.db.session` unchanged; further branches are listed in
+`Settings.BRANCH_DATABASE_URLS` and get their engines on first use.
+
+Requests pick a branch with the `branch` query parameter (see
+`app.api.deps`); cross-branch listings fan out over `ShardRouter.branches`
+(see `app.services.branches`).
+"""
+
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Mapping
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import (
+    _make_engine,
+    _read_execution_options,
+    get_read_sessionmaker,
+    get_sessionmaker,
+)
+
+DEFAULT_BRANCH = "main"
+# Selects every branch in cross-branch queries
+ALL_BRANCHES = "*"
+
+BRANCH_NAME_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,31}$")
+
+
+class ShardRouter:
+    """Map branch names to their session factories."""
+
+    def __init__(self, urls: Mapping[str, str]) -> None:
+        """Validate the branch map; engines are created lazily.
+
+        Args:
+            urls (Mapping[str, str]): Async DSN per additional branch.
+
+        Raises:
+            ValueError: On an invalid branch name or a DSN for `DEFAULT_BRANCH`.
+        """
+        for name in urls:
+            if name == DEFAULT_BRANCH or not BRANCH_NAME_RE.fullmatch(name):
+                raise ValueError(f"Invalid branch name in BRANCH_DATABASE_URLS: {name!r}")
+        self._urls = dict(urls)
+        self._engines: dict[str, AsyncEngine] = {}
+        self._sessionmakers: dict[tuple[str, bool], async_sessionmaker[AsyncSession]] = {}
+
+    @property
+    def branches(self) -> tuple[str, ...]:
+        """All branch names, the default branch first."""
+        return (DEFAULT_BRANCH, *sorted(self._urls))
+
+    def __contains__(self, branch: object) -> bool:
+        return branch == DEFAULT_BRANCH or branch in self._urls
+
+    def url(self, branch: str) -> str:
+        """Return the async DSN of a branch database.
+
+        Raises:
+            KeyError: If the branch is not configured.
+        """
+        if branch == DEFAULT_BRANCH:
+            return get_settings().get_async_database_url()
+        return self._urls[branch]
+
+    def sessionmaker(
+        self, branch: str, *, read_only: bool = False
+    ) -> async_sessionmaker[AsyncSession]:
+        """Return the command (or query, with `read_only`) session factory for a branch.
+
+        Raises:
+            KeyError: If the branch is not configured.
+        """
+        if branch == DEFAULT_BRANCH:
+            return get_read_sessionmaker() if read_only else get_sessionmaker()
+        factory = self._sessionmakers.get((branch, read_only))
+        if factory is None:
+            url = self._urls[branch]
+            engine = self._engines.get(branch)
+            if engine is None:
+                engine = self._engines[branch] = _make_engine(url)
+            if read_only:
+                settings = get_settings()
+                engine = engine.execution_options(
+                    **_read_execution_options(settings.DB_READ_MODE, engine.dialect.name)
+                )
+            factory = self._sessionmakers[(branch, read_only)] = async_sessionmaker(
+                bind=engine, class_=AsyncSession, expire_on_commit=False
+            )
+        return factory
+
+    async def dispose(self) -> None:
+        """Close the pools of the additional branches (the default one is not owned)."""
+        for engine in self._engines.values():
+            await engine.dispose()
+        self._engines.clear()
+        self._sessionmakers.clear()
+
+
+@lru_cache
+def get_shard_router() -> ShardRouter:
+    """Return the process-wide shard router built from the settings."""
+    return ShardRouter(get_settings().BRANCH_DATABASE_URLS)
@@ -0,0 +1,126 @@
+"""Portable column types and SQL expressions for the supported backends.
+
+The schema is written once and rendered per dialect:
+  - PostgreSQL (the production backend) gets exactly the DDL the migrations
+    create: `timestamptz`, `now()` and POSIX regex checks.
+  - SQLite (single-node deployments) gets equivalent constraints using
+    `GLOB`, microsecond UTC timestamps and timezone-aware values on read.
+  - Text sort keys compare by code point on both (`bytewise`), whatever the
+    database collation.
+"""
+
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import TIMESTAMP, Boolean, Text
+from sqlalchemy.engine import Dialect
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import TypeDecorator
+
+
+class UTCDateTime(TypeDecorator):
+    """`TIMESTAMP WITH TIME ZONE` that always round-trips aware UTC datetimes.
+
+    SQLite has no timezone-aware type, so values are stored as naive UTC and
+    tagged with UTC again when loaded.
+    """
+
+    impl = TIMESTAMP(timezone=True)
+    cache_ok = True
+
+    @property
+    def python_type(self) -> type:
+        return datetime
+
+    def process_bind_param(self, value: Optional[datetime], dialect: Dialect) -> Any:
+        if value is not None and dialect.name == "sqlite" and value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value: Optional[datetime], dialect: Dialect) -> Any:
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+
+class utcnow(FunctionElement):
+    """Current transaction timestamp: `now()`, or UTC text on SQLite."""
+
+    type = UTCDateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element: utcnow, compiler: Any, **kw: Any) -> str:
+    return "now()"
+
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element: utcnow, compiler: Any, **kw: Any) -> str:
+    # CURRENT_TIMESTAMP only has second resolution. Padded to the six
+    # fractional digits SQLAlchemy binds, so stored values and bound
+    # datetimes compare correctly as text (keyset cursors, `updated_at > :since`).
+    return "strftime('%Y-%m-%d %H:%M:%f', 'now') || '000'"
+
+
+class seconds_ago(FunctionElement):
+    """The database's current timestamp minus a number of seconds (see `utcnow`)."""
+
+    type = UTCDateTime()
+    inherit_cache = True
+
+
+@compiles(seconds_ago)
+def _seconds_ago_default(element: seconds_ago, compiler: Any, **kw: Any) -> str:
+    return f"now() - make_interval(secs => {compiler.process(element.clauses, **kw)})"
+
+
+@compiles(seconds_ago, "sqlite")
+def _seconds_ago_sqlite(element: seconds_ago, compiler: Any, **kw: Any) -> str:
+    # Same text format as `utcnow`
+    seconds = compiler.process(element.clauses, **kw)
+    return f"strftime('%Y-%m-%d %H:%M:%f', 'now', '-' || ({seconds}) || ' seconds') || '000'"
+
+
+class six_digits(FunctionElement):
+    """True when the argument is exactly six ASCII digits."""
+
+    type = Boolean()
+    inherit_cache = True
+
+
+@compiles(six_digits)
+def _six_digits_default(element: six_digits, compiler: Any, **kw: Any) -> str:
+    return f"{compiler.process(element.clauses, **kw)} ~ '^[0-9]{{6}}$'"
+
+
+@compiles(six_digits, "sqlite")
+def _six_digits_sqlite(element: six_digits, compiler: Any, **kw: Any) -> str:
+    # GLOB matches the whole string, so this is anchored like the regex
+    return f"{compiler.process(element.clauses, **kw)} GLOB '{'[0-9]' * 6}'"
+
+
+class bytewise(FunctionElement):
+    """The text argument ordered by code point: `COLLATE "C"`.
+
+    This is also Python's `str` order, so rows sorted by any database can be
+    merged in Python. SQLite's default `BINARY` collation already compares
+    UTF-8 text this way.
+    """
+
+    type = Text()
+    inherit_cache = True
+
+
+@compiles(bytewise)
+def _bytewise_default(element: bytewise, compiler: Any, **kw: Any) -> str:
+    return f'{compiler.process(element.clauses, **kw)} COLLATE "C"'
+
+
+@compiles(bytewise, "sqlite")
+def _bytewise_sqlite(element: bytewise, compiler: Any, **kw: Any) -> str:
+    return compiler.process(element.clauses, **kw)
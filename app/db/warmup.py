@@ -0,0 +1,57 @@
+"""Connection-pool warmup and prepared-statement priming.
+
+The first requests after a deploy otherwise pay for connection setup, asyncpg
+type introspection and statement preparation. `warm_up_pool` opens the pool's
+minimum number of connections concurrently and primes the hot repository
+statements on each of them inside a rolled-back transaction.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.db.session import SQLITE_BEGIN_OPTION
+from app.repositories.books import book_repository
+
+logger = logging.getLogger(__name__)
+
+
+async def _prime_connection(engine: AsyncEngine, barrier: asyncio.Barrier) -> None:
+    """Check out one connection, prime it, and hold it until all are primed.
+
+    Holding every connection until the barrier releases forces the pool to
+    open distinct connections instead of reusing the first one.
+    """
+    async with engine.connect() as conn:
+        # Deferred on SQLite: the connections must not queue for the write lock
+        await conn.execution_options(**{SQLITE_BEGIN_OPTION: "DEFERRED"})
+        trans = await conn.begin()
+        try:
+            session = AsyncSession(bind=conn, expire_on_commit=False)
+            await book_repository(session).prime_statements()
+            await session.close()
+        finally:
+            await trans.rollback()
+        await barrier.wait()
+
+
+async def warm_up_pool(engine: AsyncEngine, size: int) -> None:
+    """Open `size` pooled connections and prime each of them.
+
+    Args:
+        engine (AsyncEngine): Engine whose pool should be warmed.
+        size (int): Number of connections to open (normally `DB_POOL_SIZE`).
+    """
+    size = max(1, size)
+    barrier = asyncio.Barrier(size)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    # TaskGroup cancels the siblings waiting on the barrier if one fails
+    async with asyncio.TaskGroup() as tg:
+        for _ in range(size):
+            tg.create_task(_prime_connection(engine, barrier))
+    logger.info("Warmed %d pooled connections in %.0f ms", size, (loop.time() - started) * 1000)
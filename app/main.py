@@ -2,19 +2,145 @@
 
 This module exposes `create_app()` which wires routers, system endpoints,
 and global exception handlers, and it instantiates the ASGI `app`.
+
+Settings and the database engine are not touched at import time; they are
+created in the application lifespan, so `import app.main` stays cheap.
+Servers can also use the factory directly (`uvicorn --factory app.main:create_app`).
 """
 
+import asyncio
+import contextlib
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 
-from app.api.routers import books
+from app.api.profiling import ProfilingMiddleware
+from app.api.routers import books, inventory, jobs, loans
 from app.common.error_handlers import add_exception_handlers
+from app.core.config import get_settings
+from app.db.session import dispose_engine, get_engine, get_read_sessionmaker, get_sessionmaker
+from app.db.shards import get_shard_router
+from app.db.warmup import warm_up_pool
+from app.services.catalog_replica import numpy_available, start_catalog_replica
+from app.services.job_runner import get_job_runner
+from app.services.serial_index import get_serial_index
+from app.services.suggest_index import get_suggest_index
+
+logger = logging.getLogger(__name__)
+
+WARMUP_MAX_RETRY_DELAY_S = 10.0
+
+
+async def _warm_up(app: FastAPI) -> None:
+    """Warm the pool (retrying with backoff) and then mark the app ready."""
+    delay = 0.5
+    while True:
+        try:
+            await warm_up_pool(get_engine(), get_settings().DB_POOL_SIZE)
+            break
+        except Exception:
+            logger.warning("Pool warmup failed; retrying in %.1fs", delay, exc_info=True)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WARMUP_MAX_RETRY_DELAY_S)
+    app.state.ready = True
+
+
+def _start_serial_index() -> asyncio.Task[None] | None:
+    """Start the serial index listener if enabled and reachable without pgbouncer."""
+    settings = get_settings()
+    if not settings.SERIAL_INDEX_ENABLED or settings.get_database_backend() == "sqlite":
+        return None
+    if settings.PGBOUNCER_TRANSACTION_MODE and not settings.DIRECT_DATABASE_URL:
+        logger.warning("Serial index disabled: LISTEN needs DIRECT_DATABASE_URL behind pgbouncer")
+        return None
+    return asyncio.create_task(get_serial_index().run(settings.get_direct_database_url()))
+
+
+def _start_catalog_replica(serial_index_running: bool) -> asyncio.Task[None] | None:
+    """Start the catalog replica if enabled; it needs NumPy and the serial index."""
+    settings = get_settings()
+    if not settings.CATALOG_REPLICA_ENABLED:
+        return None
+    if not numpy_available():
+        logger.warning("Catalog replica disabled: numpy is not installed")
+        return None
+    if not serial_index_running:
+        logger.warning("Catalog replica disabled: it tracks deletions via the serial index")
+        return None
+    return start_catalog_replica(
+        get_serial_index(),
+        get_sessionmaker(),
+        settings.CATALOG_REPLICA_REFRESH_S,
+        settings.CATALOG_REPLICA_RESYNC_S,
+    )
+
+
+def _start_suggest_index() -> asyncio.Task[None] | None:
+    """Start loading the suggest index if enabled.
+
+    On SQLite (one worker) it is loaded once and kept current by local
+    writes; on PostgreSQL it also LISTENs for other workers' changes.
+    """
+    settings = get_settings()
+    if not settings.SUGGEST_INDEX_ENABLED:
+        return None
+    if settings.get_database_backend() == "sqlite":
+        return asyncio.create_task(get_suggest_index().load_once(get_read_sessionmaker()))
+    if settings.PGBOUNCER_TRANSACTION_MODE and not settings.DIRECT_DATABASE_URL:
+        logger.warning("Suggest index disabled: LISTEN needs DIRECT_DATABASE_URL behind pgbouncer")
+        return None
+    return asyncio.create_task(get_suggest_index().run(settings.get_direct_database_url()))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Build engine and session factories, warm the pool; dispose on shutdown.
+
+    Warmup runs in the background so liveness (`/health`) answers at once,
+    while readiness (`/ready`) reports 503 until the pool is primed. The
+    serial index, catalog replica and suggest index load in the background
+    too; until they are fresh, requests fall back to the database. The job
+    runner (if `JOB_CONCURRENCY` > 0) polls the job queues until shutdown.
+    """
+    get_sessionmaker()
+    get_read_sessionmaker()
+    get_shard_router()  # validates BRANCH_DATABASE_URLS
+    background: list[asyncio.Task[None]] = []
+    if get_settings().DB_POOL_WARMUP:
+        app.state.ready = False
+        background.append(asyncio.create_task(_warm_up(app)))
+    else:
+        app.state.ready = True
+    serial_index = _start_serial_index()
+    if serial_index is not None:
+        background.append(serial_index)
+    catalog_replica = _start_catalog_replica(serial_index is not None)
+    if catalog_replica is not None:
+        background.append(catalog_replica)
+    suggest_index = _start_suggest_index()
+    if suggest_index is not None:
+        background.append(suggest_index)
+    job_runner = get_job_runner()
+    if job_runner is not None:
+        background.append(asyncio.create_task(job_runner.run()))
+    yield
+    for task in background:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    await get_shard_router().dispose()
+    await dispose_engine()
 
 
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application.
 
     Sets metadata, mounts API routers under `/api/v1`, registers the `/health`
-    liveness endpoint, and attaches global exception handlers.
+    liveness and `/ready` readiness endpoints, attaches global exception handlers, the
+    profiling middleware and the lifespan that owns the database engine.
 
     Returns:
         FastAPI: Configured FastAPI application instance.
@@ -23,10 +149,14 @@ def create_app() -> FastAPI:
         title="Library API",
         version="1.0.0",
         description="Simple library system API for managing books",
+        lifespan=lifespan,
     )
 
     # Routers
     app.include_router(books.router, prefix="/api/v1", tags=["books"])
+    app.include_router(inventory.router, prefix="/api/v1", tags=["inventory"])
+    app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
+    app.include_router(loans.router, prefix="/api/v1", tags=["loans"])
 
     # Health endpoint
     @app.get("/health", tags=["system"])
@@ -34,9 +164,20 @@ def create_app() -> FastAPI:
         """Liveness probe endpoint used by monitors/orchestrators."""
         return {"status": "ok"}
 
+    # Readiness endpoint
+    @app.get("/ready", tags=["system"])
+    async def ready() -> JSONResponse:
+        """Readiness probe: 503 until the connection pool has been warmed."""
+        if getattr(app.state, "ready", True):
+            return JSONResponse({"status": "ready"})
+        return JSONResponse({"status": "warming_up"}, status_code=503)
+
     # Register error handlers
     add_exception_handlers(app)
 
+    # Opt-in request profiling (inactive unless configured; see app.api.profiling)
+    app.add_middleware(ProfilingMiddleware)
+
     return app
 
 
@@ -0,0 +1,35 @@
+"""ORM model for the `authors` table.
+
+One row per distinct author, keyed by the normalized name, so books refer to
+their author by id instead of repeating (and fuzzily matching) the name.
+"""
+
+
+from sqlalchemy import CheckConstraint, Column, Identity, Integer, Text, UniqueConstraint
+
+from app.db.base import Base
+
+
+class Author(Base):
+    """An author, shared by all books whose author names normalize alike.
+
+    Columns:
+        id (int): Identity primary key, referenced by `books.author_id`.
+        name (Text): Display form, as first written.
+        name_key (Text): `author_key(name)` (see `app.repositories.authors`):
+            NFKC, case-folded, whitespace collapsed. Uses the "C" collation on
+            PostgreSQL so the unique index also serves prefix range scans.
+
+    Constraints:
+        - `name_key` is unique and non-empty.
+    """
+    __tablename__ = "authors"
+
+    id = Column(Integer, Identity(), primary_key=True)
+    name = Column(Text, nullable=False)
+    name_key = Column(Text().with_variant(Text(collation="C"), "postgresql"), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint(name_key),
+        CheckConstraint(name_key != "", name="name_key_not_empty"),
+    )
@@ -4,8 +4,18 @@ Defines columns, constraints, and indexes for managing library books.
 """
 
 
-from sqlalchemy import Boolean, CheckConstraint, Column, Index, Text, CHAR, TIMESTAMP, func
+from sqlalchemy import (
+    DDL, Boolean, CheckConstraint, Column, ForeignKey, Index, Integer, Text, CHAR, and_, event, false,
+    or_, true
+)
 from app.db.base import Base
+from app.db.types import UTCDateTime, bytewise, six_digits, utcnow
+from app.models.author import Author
+
+# LISTEN/NOTIFY channel announcing inserted (`+NNNNNN`) and deleted
+# (`-NNNNNN`) serial numbers. Sent by triggers on `books`, so every writer
+# is covered; consumed by `app.services.serial_index` and `suggest_index`.
+SERIAL_CHANNEL = "books_serials"
 
 class Book(Base):
     """Represents a library book.
@@ -13,7 +23,8 @@ class Book(Base):
     Columns:
         serial_number (CHAR[6]): Primary key, must be exactly six digits.
         title (Text): Book title (non-empty).
-        author (Text): Book author (non-empty).
+        author (Text): Book author (non-empty), as written for this book.
+        author_id (int): The normalized author (`authors.id`).
         is_borrowed (bool): Whether the book is currently borrowed.
         borrower_card (CHAR[6] | None): Borrower's card number, required when borrowed.
         borrowed_at (datetime | None): Timestamp when the book was borrowed.
@@ -29,6 +40,25 @@ class Book(Base):
 
     Indexes:
         - `idx_books_is_borrowed` on `is_borrowed` for efficient filtering.
+        - `idx_books_listing` on the default listing order, covering the common
+          sparse fieldset (`serial_number,title,is_borrowed`) for index-only scans.
+        - `idx_books_title_c_serial`, `idx_books_author_c_serial` (text by
+          code point, `bytewise`) and (partial, over borrowed books)
+          `idx_books_borrowed_at_serial` back the alternative `sort=`
+          orderings and their keyset cursors.
+        - `idx_books_author_listing` serves `author_id=` listings in the
+          default order and, with `is_borrowed` included, per-author facet
+          counts as index-only scans; it also covers the foreign key.
+        - `idx_books_updated_at` serves the catalog replica's incremental
+          refresh (`updated_at > :since`).
+
+    Triggers (PostgreSQL):
+        - `books_notify_inserted` / `books_notify_deleted` send one
+          `SERIAL_CHANNEL` notification per row, once per statement, delivered
+          when the transaction commits.
+
+    Constraints and defaults are dialect-portable (see `app.db.types`); on
+    PostgreSQL they render exactly as in the migrations.
     """
     __tablename__ = "books"
 
@@ -36,32 +66,86 @@ class Book(Base):
 
     title = Column(Text, nullable=False)
     author = Column(Text, nullable=False)
+    author_id = Column(Integer, ForeignKey(Author.id), nullable=False)
 
-    is_borrowed = Column(Boolean, nullable=False, default=False, server_default="false")
+    is_borrowed = Column(Boolean, nullable=False, default=False, server_default=false())
     borrower_card = Column(CHAR(6), nullable=True)
-    borrowed_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    borrowed_at = Column(UTCDateTime(), nullable=True)
 
-    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
-    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    created_at = Column(UTCDateTime(), nullable=False, server_default=utcnow())
+    updated_at = Column(UTCDateTime(), nullable=False, server_default=utcnow())
 
     __table_args__ = (
         # format checks
         CheckConstraint(
-            r"serial_number ~ '^[0-9]{6}$'", 
+            six_digits(serial_number),
             name="serial_number_six_digits"
         ),
         CheckConstraint(
-            r"borrower_card IS NULL OR borrower_card ~ '^[0-9]{6}$'", 
+            or_(borrower_card.is_(None), six_digits(borrower_card)),
             name="borrower_card_six_digits_or_null"
         ),
         # borrow/return consistency
         CheckConstraint(
-            "("
-            " (is_borrowed = false AND borrower_card IS NULL AND borrowed_at IS NULL)"
-            " OR "
-            " (is_borrowed = true  AND borrower_card ~ '^[0-9]{6}$' AND borrowed_at IS NOT NULL)"
-            ")",
+            or_(
+                and_(is_borrowed == false(), borrower_card.is_(None), borrowed_at.is_(None)),
+                and_(is_borrowed == true(), six_digits(borrower_card), borrowed_at.is_not(None)),
+            ),
             name="borrow_state_consistency",
         ),
         Index("idx_books_is_borrowed", "is_borrowed"),
+        Index(
+            "idx_books_listing",
+            created_at.desc(),
+            serial_number,
+            postgresql_include=["title", "is_borrowed"],
+        ),
+        Index("idx_books_title_c_serial", bytewise(title), serial_number),
+        Index("idx_books_author_c_serial", bytewise(author), serial_number),
+        Index(
+            "idx_books_borrowed_at_serial",
+            borrowed_at,
+            serial_number,
+            postgresql_where=is_borrowed,
+            sqlite_where=is_borrowed == true(),
+        ),
+        Index("idx_books_updated_at", updated_at),
+        Index(
+            "idx_books_author_listing",
+            author_id,
+            created_at.desc(),
+            serial_number,
+            postgresql_include=["is_borrowed"],
+        ),
     )
+
+
+_NOTIFY_SERIALS = (
+    DDL(
+        f"""
+        CREATE OR REPLACE FUNCTION books_notify_serials() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM pg_notify('{SERIAL_CHANNEL}', '+' || serial_number) FROM new_books;
+            ELSE
+                PERFORM pg_notify('{SERIAL_CHANNEL}', '-' || serial_number) FROM old_books;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    ),
+    DDL(
+        "CREATE TRIGGER books_notify_inserted AFTER INSERT ON books"
+        " REFERENCING NEW TABLE AS new_books"
+        " FOR EACH STATEMENT EXECUTE FUNCTION books_notify_serials()"
+    ),
+    DDL(
+        "CREATE TRIGGER books_notify_deleted AFTER DELETE ON books"
+        " REFERENCING OLD TABLE AS old_books"
+        " FOR EACH STATEMENT EXECUTE FUNCTION books_notify_serials()"
+    ),
+)
+for _ddl in _NOTIFY_SERIALS:
+    event.listen(Book.__table__, "after_create", _ddl.execute_if(dialect="postgresql"))
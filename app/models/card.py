@@ -0,0 +1,35 @@
+"""ORM model for the `card_loans` table (active loans per borrower card).
+
+One counter per card, kept equal to the number of books the card currently
+has borrowed, so the per-card loan limit is checked and maintained with a
+single-row upsert instead of counting `books` on every checkout.
+"""
+
+
+from sqlalchemy import CHAR, CheckConstraint, Column, Integer
+
+from app.db.base import Base
+from app.db.types import six_digits
+
+
+class CardLoans(Base):
+    """Number of active loans of one borrower card.
+
+    Columns:
+        borrower_card (CHAR[6]): Primary key.
+        active (int): Books currently borrowed with this card. Incremented
+            when a book is borrowed and decremented when it is returned, in
+            the same transaction as the book's update.
+
+    Constraints:
+        - `borrower_card` is exactly six digits; `active` is never negative.
+    """
+    __tablename__ = "card_loans"
+
+    borrower_card = Column(CHAR(6), primary_key=True)
+    active = Column(Integer, nullable=False, server_default="0")
+
+    __table_args__ = (
+        CheckConstraint(six_digits(borrower_card), name="borrower_card_six_digits"),
+        CheckConstraint(active >= 0, name="active_not_negative"),
+    )
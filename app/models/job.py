@@ -0,0 +1,70 @@
+"""ORM model for the `jobs` table (background job queue).
+
+Long operations (imports, exports, audits) are queued here by the API and
+run by `app.services.job_runner`, inside the API workers or in a separate
+process. Each branch database has its own queue.
+"""
+
+
+from sqlalchemy import JSON, BigInteger, CheckConstraint, Column, Identity, Index, Integer, LargeBinary, Text
+
+from app.db.base import Base
+from app.db.types import UTCDateTime, utcnow
+
+JOB_KINDS = ("audit", "export", "import")
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+
+class Job(Base):
+    """One queued, running or finished background job.
+
+    Columns:
+        id (bigint): Identity; also the queue order.
+        kind (Text): One of `JOB_KINDS`.
+        status (Text): One of `JOB_STATUSES`.
+        params (JSON): Input of the job (for example the scanned serials).
+        done (int): Work items processed so far.
+        total (int | None): Work items in the job, once known.
+        result (bytes | None): Gzip-compressed NDJSON, set when it succeeds.
+        error (Text | None): Why it failed.
+        attempts (int): Times the job has been started; a job whose runner
+            stopped sending heartbeats is queued again up to a limit.
+        created_at, started_at, finished_at (datetime): Lifecycle times.
+        heartbeat_at (datetime | None): Last sign of life of its runner.
+
+    Indexes:
+        - `idx_jobs_queued` (partial, queued jobs only) serves the dequeue.
+        - `idx_jobs_running_heartbeat` (partial) finds jobs of lost runners.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), Identity(), primary_key=True)
+    kind = Column(Text, nullable=False)
+    status = Column(Text, nullable=False, server_default="queued")
+    params = Column(JSON, nullable=False)
+    done = Column(Integer, nullable=False, server_default="0")
+    total = Column(Integer)
+    result = Column(LargeBinary)
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, server_default="0")
+    created_at = Column(UTCDateTime(), nullable=False, server_default=utcnow())
+    started_at = Column(UTCDateTime())
+    finished_at = Column(UTCDateTime())
+    heartbeat_at = Column(UTCDateTime())
+
+    __table_args__ = (
+        CheckConstraint(kind.in_(JOB_KINDS), name="kind_valid"),
+        CheckConstraint(status.in_(JOB_STATUSES), name="status_valid"),
+        Index(
+            "idx_jobs_queued",
+            id,
+            postgresql_where=status == "queued",
+            sqlite_where=status == "queued",
+        ),
+        Index(
+            "idx_jobs_running_heartbeat",
+            heartbeat_at,
+            postgresql_where=status == "running",
+            sqlite_where=status == "running",
+        ),
+    )
@@ -0,0 +1,69 @@
+"""ORM model for the `loans` ledger (append-only circulation history).
+
+Defines columns, constraints, indexes and the monthly range partitioning.
+"""
+
+
+from sqlalchemy import (
+    CHAR,
+    BigInteger,
+    CheckConstraint,
+    Column,
+    Identity,
+    Index,
+    Integer,
+    PrimaryKeyConstraint,
+    Text,
+    event,
+)
+from sqlalchemy.engine import Connection
+
+from app.db.base import Base
+from app.db.partitions import ensure_loan_partitions
+from app.db.types import UTCDateTime, six_digits, utcnow
+
+
+class Loan(Base):
+    """One borrow or return of a book, never updated or deleted.
+
+    Columns:
+        id (bigint): Identity; orders events within the same timestamp.
+        serial_number (CHAR[6]): The book (no foreign key: history outlives
+            removed books).
+        borrower_card (CHAR[6]): The card that borrowed (or returned) the book.
+        action (Text): "borrow" or "return".
+        occurred_at (datetime): Transaction time of the state change (set by DB).
+
+    The primary key is `(id, occurred_at)` because a partitioned table's
+    unique constraints must include the partition key.
+
+    Indexes:
+        - `idx_loans_card_occurred` and `idx_loans_serial_occurred` serve the
+          per-card and per-book histories, newest first.
+
+    On PostgreSQL the table is `PARTITION BY RANGE (occurred_at)`, one
+    partition per month (see `app.db.partitions`).
+    """
+    __tablename__ = "loans"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), Identity(), nullable=False)
+    serial_number = Column(CHAR(6), nullable=False)
+    borrower_card = Column(CHAR(6), nullable=False)
+    action = Column(Text, nullable=False)
+    occurred_at = Column(UTCDateTime(), nullable=False, server_default=utcnow())
+
+    __table_args__ = (
+        PrimaryKeyConstraint(id, occurred_at),
+        CheckConstraint(six_digits(serial_number), name="serial_number_six_digits"),
+        CheckConstraint(six_digits(borrower_card), name="borrower_card_six_digits"),
+        CheckConstraint(action.in_(["borrow", "return"]), name="action_valid"),
+        Index("idx_loans_card_occurred", borrower_card, occurred_at.desc(), id.desc()),
+        Index("idx_loans_serial_occurred", serial_number, occurred_at.desc(), id.desc()),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
+
+
+@event.listens_for(Loan.__table__, "after_create")
+def _create_initial_partitions(_target: object, connection: Connection, **_kw: object) -> None:
+    # `create_all` (tests, tooling) must leave an insertable table
+    ensure_loan_partitions(connection)
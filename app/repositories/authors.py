@@ -0,0 +1,180 @@
+"""Repository layer for the `authors` table.
+
+Authors are created on demand when books are added: names are mapped to
+their normalized key (`author_key`) and resolved to ids in at most three
+statements per batch (look up, insert the missing ones, look up the ones a
+concurrent transaction inserted first). Facet counts aggregate `books` by
+`author_id` over `idx_books_author_listing`.
+"""
+
+
+from __future__ import annotations
+
+import unicodedata
+from functools import lru_cache
+from typing import Any, Iterable, Optional, Tuple
+
+from sqlalchemy import Integer, Text, and_, any_, bindparam, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.models.author import Author
+from app.models.book import Book
+
+MAX_CODE_POINT = 0x10FFFF
+
+
+def author_key(name: str) -> str:
+    """Return the normalized key of an author name.
+
+    NFKC-normalized, case-folded and with runs of whitespace collapsed, so
+    "Jane  Austen", "jane austen" and "ＪＡＮＥ AUSTEN" are one author.
+    """
+    return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
+
+
+def prefix_bounds(prefix: str) -> Tuple[str, str]:
+    """Return `[lo, hi)` such that keys starting with `prefix` are exactly those in range.
+
+    Valid for code point order, which is what the "C" collation (PostgreSQL)
+    and BINARY collation (SQLite) compare by.
+    """
+    last = ord(prefix[-1]) + 1
+    if 0xD800 <= last <= 0xDFFF:  # skip surrogates, which cannot be encoded
+        last = 0xE000
+    return prefix, prefix[:-1] + chr(min(last, MAX_CODE_POINT))
+
+
+_GET_IDS = select(Author.id, Author.name_key).where(
+    Author.name_key == any_(bindparam("keys", type_=ARRAY(Text)))
+)
+
+# Keys inserted concurrently by another transaction are skipped (it waits
+# for that transaction first), then picked up by a second `_GET_IDS`.
+_INSERT_MISSING = (
+    postgresql.insert(Author)
+    .on_conflict_do_nothing(index_elements=[Author.name_key])
+    .returning(Author.id, Author.name_key)
+)
+
+
+@lru_cache(maxsize=8)
+def _facet_statement(*, by_borrowed: bool, by_prefix: bool) -> Select:
+    """Build the per-author count statement for one filter shape (values are binds)."""
+    counts = select(Book.author_id, func.count().label("count")).group_by(Book.author_id)
+    if by_borrowed:
+        counts = counts.where(Book.is_borrowed == bindparam("is_borrowed"))
+    if by_prefix:
+        counts = counts.where(
+            Book.author_id.in_(
+                select(Author.id).where(
+                    and_(
+                        Author.name_key >= bindparam("key_lo"),
+                        Author.name_key < bindparam("key_hi"),
+                    )
+                )
+            )
+        )
+    counts = counts.subquery()
+    return (
+        select(Author.id, Author.name, counts.c.count)
+        .join(counts, counts.c.author_id == Author.id)
+        .order_by(counts.c.count.desc(), Author.name_key)
+        .limit(bindparam("limit", type_=Integer))
+    )
+
+
+class AuthorRepository:
+    """Data-access layer for `Author` rows."""
+
+    _GET_IDS = _GET_IDS
+    _INSERT_MISSING = _INSERT_MISSING
+
+    def __init__(self, session: AsyncSession) -> None:
+        """Initialize repository with a database session."""
+        self.session = session
+
+    async def _get_ids(self, keys: list[str]) -> dict[str, int]:
+        res = await self.session.execute(self._GET_IDS, {"keys": keys})
+        return {key: author_id for author_id, key in res.all()}
+
+    async def resolve(self, names: Iterable[str]) -> dict[str, int]:
+        """Return the author id of every name, creating missing authors.
+
+        Runs in the caller's transaction; new authors keep the first
+        spelling seen as their display name.
+
+        Args:
+            names (Iterable[str]): Author names (already stripped, non-empty).
+
+        Returns:
+            dict[str, int]: Author id per given name.
+        """
+        keys = {name: author_key(name) for name in names}
+        by_key: dict[str, str] = {}
+        for name, key in keys.items():
+            by_key.setdefault(key, name)
+        ids = await self._get_ids(list(by_key))
+        # Sorted, so concurrent batches wait on each other instead of deadlocking
+        missing = sorted(by_key.keys() - ids.keys())
+        if missing:
+            res = await self.session.execute(
+                self._INSERT_MISSING, [{"name": by_key[k], "name_key": k} for k in missing]
+            )
+            ids.update({key: author_id for author_id, key in res.all()})
+            raced = [k for k in missing if k not in ids]
+            if raced:
+                ids.update(await self._get_ids(raced))
+        return {name: ids[key] for name, key in keys.items()}
+
+    async def facets(
+        self,
+        *,
+        prefix: Optional[str] = None,
+        is_borrowed: Optional[bool] = None,
+        limit: int = 50,
+    ) -> list[RowMapping]:
+        """Count books per author, most books first.
+
+        Args:
+            prefix (Optional[str]): Only authors whose key starts with the
+                key of this prefix (index range scan on `authors`).
+            is_borrowed (Optional[bool]): Only count books in this state.
+            limit (int): Maximum number of authors.
+
+        Returns:
+            list[RowMapping]: `id`, `name` and `count` per author; authors
+            without matching books are absent.
+        """
+        params: dict[str, Any] = {"limit": limit}
+        key = author_key(prefix) if prefix else ""
+        if key:
+            params["key_lo"], params["key_hi"] = prefix_bounds(key)
+        if is_borrowed is not None:
+            params["is_borrowed"] = is_borrowed
+        stmt = _facet_statement(by_borrowed=is_borrowed is not None, by_prefix=bool(key))
+        res = await self.session.execute(stmt, params)
+        return list(res.mappings().all())
+
+
+class SqliteAuthorRepository(AuthorRepository):
+    """`AuthorRepository` for the SQLite backend (no array parameters)."""
+
+    _GET_IDS = select(Author.id, Author.name_key).where(
+        Author.name_key.in_(bindparam("keys", expanding=True))
+    )
+    _INSERT_MISSING = (
+        sqlite.insert(Author)
+        .on_conflict_do_nothing(index_elements=[Author.name_key])
+        .returning(Author.id, Author.name_key)
+    )
+
+
+def author_repository(session: AsyncSession) -> AuthorRepository:
+    """Return the `AuthorRepository` implementation for the session's backend."""
+    if session.get_bind().dialect.name == "sqlite":
+        return SqliteAuthorRepository(session)
+    return AuthorRepository(session)
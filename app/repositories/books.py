@@ -8,14 +8,328 @@ No business logic is applied here; that is handled in the service layer.
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Iterable, Optional, Tuple
+from functools import lru_cache
+from operator import ge, gt, le, lt
+from typing import Any, AsyncIterator, Iterable, NamedTuple, Optional, Sequence, Tuple, Union
 
-from sqlalchemy import func, select, update, delete
+from sqlalchemy import CHAR, Integer, Text, and_, any_, bindparam, delete, distinct, func, or_, select, text, true, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.engine import Row, RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import Select
 
+from app.db.types import bytewise, utcnow
 from app.models.book import Book
-from sqlalchemy import and_, func, select
+
+# --- statements --------------------------------------------------------------
+#
+# Statements are built once with bound parameters for every value, so each
+# call reuses the same statement object: SQLAlchemy skips construction and
+# cache-key generation, its compiled cache always hits, and the SQL text is
+# identical across calls, which keeps asyncpg's prepared-statement cache warm.
+
+_GET_BY_SERIAL = select(Book).where(Book.serial_number == bindparam("serial_number"))
+
+_GET_FOR_UPDATE = _GET_BY_SERIAL.with_for_update()
+
+# The whole batch travels as one `char(6)[]` parameter, so the SQL text is the
+# same for any batch size and the primary key index is used for the probe.
+_GET_MANY = select(Book).where(
+    Book.serial_number == any_(bindparam("serial_numbers", type_=ARRAY(CHAR(6))))
+)
+
+# Locked in serial order, like every multi-row locker, so concurrent
+# batches cannot deadlock on each other's books
+_LOCK_MANY = (
+    select(*Book.__table__.c)
+    .where(Book.serial_number == any_(bindparam("serial_numbers", type_=ARRAY(CHAR(6)))))
+    .order_by(Book.serial_number)
+    .with_for_update()
+)
+
+# One set-based UPDATE for a batch of borrow-state changes; a row whose
+# borrow state is already the target one (borrowed and returned within the
+# batch) is left alone
+_APPLY_BORROW_STATES = text(
+    """
+    UPDATE books
+    SET is_borrowed = v.is_borrowed,
+        borrower_card = v.borrower_card,
+        borrowed_at = v.borrowed_at,
+        updated_at = v.updated_at
+    FROM unnest(
+        CAST(:serial_numbers AS char(6)[]),
+        CAST(:is_borrowed AS boolean[]),
+        CAST(:borrower_cards AS char(6)[]),
+        CAST(:borrowed_at AS timestamptz[]),
+        CAST(:updated_at AS timestamptz[])
+    ) AS v(serial_number, is_borrowed, borrower_card, borrowed_at, updated_at)
+    WHERE books.serial_number = v.serial_number
+      AND (books.is_borrowed, books.borrower_card, books.borrowed_at)
+          IS DISTINCT FROM (v.is_borrowed, v.borrower_card, v.borrowed_at)
+    """
+)
+
+_CURRENT_TIME = select(utcnow())
+
+# "fetch" marks the deleted identity via RETURNING; the default "evaluate"
+# strategy cannot see execution-time bind values.
+_DELETE = (
+    delete(Book)
+    .where(Book.serial_number == bindparam("serial_number"))
+    .execution_options(synchronize_session="fetch")
+)
+
+# Rows whose serial was taken concurrently are skipped (not returned) instead
+# of aborting the transaction, so the caller can retry just those.
+_INSERT_SKIP_EXISTING = (
+    insert(Book)
+    .on_conflict_do_nothing(index_elements=[Book.serial_number])
+    .returning(Book)
+)
+
+# Lowest `:count` unused serials in [:lo, :hi]. One ordered pass over the
+# primary key yields the gaps between consecutive serials (plus the range
+# edges); a running total of gap sizes picks just enough gaps, and only the
+# needed prefix of the last one is expanded, so at most `:count` rows are
+# generated however sparse the table is.
+_FREE_SERIALS = text(
+    """
+    WITH used AS (
+        SELECT CAST(serial_number AS integer) AS n
+        FROM books
+        WHERE serial_number BETWEEN :lo AND :hi
+    ), bounds AS (
+        SELECT n, lag(n, 1, :lo_n - 1) OVER (ORDER BY n) AS prev FROM used
+        UNION ALL
+        SELECT :hi_n + 1, coalesce(max(n), :lo_n - 1) FROM used
+    ), gaps AS (
+        SELECT prev + 1 AS first,
+               n - 1 AS last,
+               sum(n - prev - 1) OVER (ORDER BY n) - (n - prev - 1) AS before
+        FROM bounds
+        WHERE n - prev > 1
+    )
+    SELECT lpad(CAST(s AS text), 6, '0') AS serial_number
+    FROM gaps, generate_series(first, least(last, first + :count - before - 1)) AS s
+    WHERE before < :count
+    ORDER BY s
+    """
+).bindparams(
+    bindparam("lo_n", type_=Integer),
+    bindparam("hi_n", type_=Integer),
+    bindparam("count", type_=Integer),
+)
+
+# Transaction-level advisory lock serializing bulk serial allocation
+# ("librsrf" in ASCII); released on commit/rollback.
+_ALLOCATION_LOCK = text("SELECT pg_advisory_xact_lock(:key)")
+SERIAL_ALLOCATION_LOCK_KEY = 0x6C696272737266
+
+
+class SortOrder(NamedTuple):
+    """A whitelisted listing order: one key column plus the serial tiebreaker.
+
+    Attributes:
+        column (str): Sort key column.
+        descending (bool): Direction of `column`.
+        serial_descending (bool): Direction of the `serial_number` tiebreaker.
+        borrowed_only (bool): Served by a partial index over borrowed books,
+            so only valid together with `is_borrowed=True`.
+    """
+
+    column: str
+    descending: bool = False
+    serial_descending: bool = False
+    borrowed_only: bool = False
+
+
+# Every ordering matches an index with the same columns and directions (or
+# their exact reverse), see `app.models.book`, so a page is read in index
+# order rather than by sorting all matching rows.
+SORT_ORDERS: dict[str, SortOrder] = {
+    "-created_at": SortOrder("created_at", descending=True),
+    "title": SortOrder("title"),
+    "author": SortOrder("author"),
+    "borrowed_at": SortOrder("borrowed_at", borrowed_only=True),
+    "-borrowed_at": SortOrder(
+        "borrowed_at", descending=True, serial_descending=True, borrowed_only=True
+    ),
+}
+
+DEFAULT_SORT = "-created_at"
+
+
+def _sort_key(order: SortOrder) -> Any:
+    """The ORDER BY expression for `order`'s key column.
+
+    Text keys sort by code point (`bytewise`), so every branch database
+    returns them in the same order as Python compares them when
+    `app.services.branches` merges the branches.
+    """
+    key = Book.__table__.c[order.column]
+    return bytewise(key) if isinstance(key.type, Text) else key
+
+
+def _keyset_condition(order: SortOrder) -> Any:
+    """Rows strictly after `(:after_key, :after_serial)` in `order`.
+
+    Written as `key >= :k AND (key > :k OR serial > :s)` (directions flipped
+    as needed) rather than a bare OR, so the leading range is an index
+    condition and the scan starts at the cursor instead of the first row.
+    """
+    key = _sort_key(order)
+    after_key = bindparam("after_key", type_=key.type)
+    after_serial = bindparam("after_serial", type_=Book.serial_number.type)
+    key_from, key_past = (le, lt) if order.descending else (ge, gt)
+    serial_past = lt if order.serial_descending else gt
+    return and_(
+        key_from(key, after_key),
+        or_(key_past(key, after_key), serial_past(Book.serial_number, after_serial)),
+    )
+
+
+def _filter_conditions(
+    *, by_borrowed: bool, by_title: bool, by_author: bool, by_author_id: bool = False
+) -> list[Any]:
+    """Return the WHERE conditions for the listing filters (values are binds)."""
+    conditions = []
+    if by_borrowed:
+        conditions.append(Book.is_borrowed == bindparam("is_borrowed"))
+    if by_title:
+        conditions.append(Book.title.ilike(bindparam("title_pattern")))
+    if by_author:
+        conditions.append(Book.author.ilike(bindparam("author_pattern")))
+    if by_author_id:
+        conditions.append(Book.author_id == bindparam("author_id"))
+    return conditions
+
+
+def _filter_params(
+    is_borrowed: Optional[bool],
+    title: Optional[str],
+    author: Optional[str],
+    author_id: Optional[int] = None,
+) -> dict[str, Any]:
+    """Return the bound values for `_filter_conditions`."""
+    params: dict[str, Any] = {}
+    if is_borrowed is not None:
+        params["is_borrowed"] = is_borrowed
+    if title:
+        params["title_pattern"] = f"%{title.strip()}%"
+    if author:
+        params["author_pattern"] = f"%{author.strip()}%"
+    if author_id is not None:
+        params["author_id"] = author_id
+    return params
+
+
+@lru_cache(maxsize=16)
+def _stats_statement(
+    *, by_borrowed: bool, by_title: bool, by_author: bool, by_author_id: bool = False
+) -> Select:
+    """Build the aggregate statement behind `BookRepository.stats` for one filter shape."""
+    stmt = select(
+        func.count().label("total"),
+        func.count().filter(Book.is_borrowed == true()).label("borrowed"),
+        func.count(distinct(Book.author_id)).label("distinct_authors"),
+        func.min(Book.borrowed_at).label("oldest_borrowed_at"),
+    ).select_from(Book)
+    conditions = _filter_conditions(
+        by_borrowed=by_borrowed, by_title=by_title, by_author=by_author, by_author_id=by_author_id
+    )
+    return stmt.where(and_(*conditions)) if conditions else stmt
+
+
+# Most common titles starting with a prefix (fallback for the suggest index)
+_TITLE_SUGGESTIONS = (
+    select(Book.title, func.count().label("count"))
+    .where(Book.title.ilike(bindparam("pattern"), escape="\\"))
+    .group_by(Book.title)
+    .order_by(func.count().desc(), Book.title)
+    .limit(bindparam("limit", type_=Integer))
+)
+
+
+def _like_prefix(prefix: str) -> str:
+    """Return a LIKE pattern matching `prefix` literally at the start."""
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+# Every column, for the catalog replica (app.services.catalog_replica)
+_CATALOG_SCAN = select(*Book.__table__.c)
+_CATALOG_CHANGES = _CATALOG_SCAN.where(Book.updated_at >= bindparam("since")).order_by(
+    Book.updated_at
+)
+
+# Every write not yet visible belongs to a transaction that is still open, and
+# its rows carry that transaction's start time (`now()`) as `updated_at`. So
+# the start of the oldest open transaction on this database (or of our own)
+# bounds them all. The second of margin covers a transaction that has taken
+# its start time but not yet published it in `pg_stat_activity`.
+_CHANGE_HORIZON = text(
+    "SELECT least(now(), min(xact_start)) - interval '1 second' FROM pg_stat_activity"
+    " WHERE datname = current_database() AND pid <> pg_backend_pid()"
+)
+
+
+@lru_cache(maxsize=256)
+def _list_statements(
+    *,
+    by_borrowed: bool,
+    by_title: bool,
+    by_author: bool,
+    columns: Optional[Tuple[str, ...]],
+    sort: str = DEFAULT_SORT,
+    keyset: bool = False,
+    by_author_id: bool = False,
+) -> Tuple[Select, Select]:
+    """Build the (count, page) statements for one filter/projection/order shape.
+
+    There is a fixed, small set of shapes (filter combinations × projections ×
+    orderings), each built once; all filter values, the keyset cursor, limit
+    and offset are bound parameters.
+
+    Returns:
+        tuple[Select, Select]: Count statement and page statement.
+    """
+    order = SORT_ORDERS[sort]
+    # A literal (not a bind) so the planner can match the partial index
+    # even under a generic prepared-statement plan
+    conditions = [Book.is_borrowed == true()] if order.borrowed_only else []
+    conditions += _filter_conditions(
+        by_borrowed=by_borrowed and not order.borrowed_only,
+        by_title=by_title,
+        by_author=by_author,
+        by_author_id=by_author_id,
+    )
+
+    count_stmt = select(func.count()).select_from(Book)
+    if columns:
+        # The sort key and tiebreaker are always selected so callers can
+        # build a cursor from the last row
+        keys = tuple(c for c in (order.column, "serial_number") if c not in columns)
+        page_stmt = select(*(Book.__table__.c[name] for name in columns + keys))
+    else:
+        page_stmt = select(Book)
+    if conditions:
+        count_stmt = count_stmt.where(and_(*conditions))
+        page_stmt = page_stmt.where(and_(*conditions))
+    if keyset:
+        page_stmt = page_stmt.where(_keyset_condition(order))
+
+    # Stable ordering for pagination (serial_number breaks ties)
+    key = _sort_key(order)
+    page_stmt = (
+        page_stmt.order_by(
+            key.desc() if order.descending else key.asc(),
+            Book.serial_number.desc() if order.serial_descending else Book.serial_number.asc(),
+        )
+        .limit(bindparam("limit", type_=Integer))
+        .offset(bindparam("offset", type_=Integer))
+    )
+    return count_stmt, page_stmt
 
 
 class BookRepository:
@@ -25,48 +339,41 @@ class BookRepository:
         """Initialize repository with a database session."""
         self.session = session
 
-    # --- helpers -------------------------------------------------------------
+    # --- warmup -------------------------------------------------------------
 
-    def _base_query(
-        self,
-        *,
-        is_borrowed: Optional[bool] = None,
-        title: Optional[str] = None,
-        author: Optional[str] = None,
-    ) -> Select:
-        """Build a SELECT statement with optional filters.
+    # Cannot exist (violates `serial_number_six_digits`), so priming never
+    # touches or locks a real row.
+    _PRIME_SERIAL = ""
 
-        Args:
-            is_borrowed (Optional[bool]): Filter by borrow status.
-            title (Optional[str]): Case-insensitive substring filter on title.
-            author (Optional[str]): Case-insensitive substring filter on author.
+    async def prime_statements(self) -> None:
+        """Execute the hot statements once so their plans are cached.
 
-        Returns:
-            Select: SQLAlchemy SELECT statement.
+        Runs the same code paths the service uses, so SQLAlchemy's compiled
+        cache and the driver's per-connection prepared-statement cache are
+        keyed identically to real traffic. The caller must roll back.
         """
-        stmt = select(Book)
-
-        if is_borrowed is not None:
-            stmt = stmt.where(Book.is_borrowed == is_borrowed)
-
-        if title:
-            stmt = stmt.where(Book.title.ilike(f"%{title.strip()}%"))
-
-        if author:
-            stmt = stmt.where(Book.author.ilike(f"%{author.strip()}%"))
-
-        # Stable ordering for pagination
-        stmt = stmt.order_by(Book.created_at.desc(), Book.serial_number.asc())
-        return stmt
+        await self.get_by_serial(self._PRIME_SERIAL)
+        await self.get_many([])
+        await self.get_for_update(self._PRIME_SERIAL)
+        await self.update_borrow_state(
+            serial_number=self._PRIME_SERIAL,
+            is_borrowed=False,
+            borrower_card=None,
+            borrowed_at=None,
+        )
+        await self.delete(self._PRIME_SERIAL)
+        await self.list(limit=1)
+        await self.list(is_borrowed=False, limit=1)
 
     # --- CRUD ---------------------------------------------------------------
 
-    async def create(self, *, serial_number: str, title: str, author: str) -> Book:
+    async def create(self, *, serial_number: str, title: str, author: str, author_id: int) -> Book:
         """Insert a new book row into the database."""
         obj = Book(
             serial_number=serial_number,
             title=title,
             author=author,
+            author_id=author_id,
             is_borrowed=False,
             borrower_card=None,
             borrowed_at=None,
@@ -77,26 +384,60 @@ class BookRepository:
 
     async def get_by_serial(self, serial_number: str) -> Optional[Book]:
         """Retrieve a book by its serial number."""
-        res = await self.session.execute(
-            select(Book).where(Book.serial_number == serial_number)
-        )
+        res = await self.session.execute(_GET_BY_SERIAL, {"serial_number": serial_number})
         return res.scalar_one_or_none()
 
+    async def get_many(self, serial_numbers: Sequence[str]) -> list[Book]:
+        """Retrieve the existing books among `serial_numbers` in one query (any order)."""
+        res = await self.session.execute(_GET_MANY, {"serial_numbers": list(serial_numbers)})
+        return list(res.scalars().all())
+
     async def get_for_update(self, serial_number: str) -> Optional[Book]:
         """Fetch a book row with a FOR UPDATE lock (for state transitions)."""
-        res = await self.session.execute(
-            select(Book)
-            .where(Book.serial_number == serial_number)
-            .with_for_update()
-        )
+        res = await self.session.execute(_GET_FOR_UPDATE, {"serial_number": serial_number})
         return res.scalar_one_or_none()
 
     async def delete(self, serial_number: str) -> None:
         """Delete a book by its serial number."""
-        await self.session.execute(
-            delete(Book).where(Book.serial_number == serial_number)
+        await self.session.execute(_DELETE, {"serial_number": serial_number})
+
+    async def create_many(self, rows: Sequence[dict[str, Any]]) -> list[Book]:
+        """Insert new books in one statement, skipping serials that already exist.
+
+        Args:
+            rows (Sequence[dict[str, Any]]): `serial_number`, `title`,
+                `author` and `author_id` for each book.
+
+        Returns:
+            list[Book]: The books actually inserted (conflicting rows are absent).
+        """
+        result = await self.session.scalars(_INSERT_SKIP_EXISTING, list(rows))
+        return list(result.all())
+
+    # --- serial allocation --------------------------------------------------
+
+    async def find_free_serials(self, count: int, lo: int, hi: int) -> list[str]:
+        """Return the lowest `count` unused serial numbers within `[lo, hi]`.
+
+        Args:
+            count (int): Maximum number of serials to return.
+            lo (int): Lowest candidate serial (inclusive).
+            hi (int): Highest candidate serial (inclusive).
+
+        Returns:
+            list[str]: Six-digit serials in ascending order (fewer than
+            `count` when the range has no more gaps).
+        """
+        res = await self.session.execute(
+            _FREE_SERIALS,
+            {"lo": f"{lo:06d}", "hi": f"{hi:06d}", "lo_n": lo, "hi_n": hi, "count": count},
         )
-    
+        return list(res.scalars().all())
+
+    async def lock_serial_allocation(self) -> None:
+        """Serialize bulk allocators until the current transaction ends."""
+        await self.session.execute(_ALLOCATION_LOCK, {"key": SERIAL_ALLOCATION_LOCK_KEY})
+
     async def list(
         self,
         *,
@@ -105,47 +446,126 @@ class BookRepository:
         author: Optional[str] = None,
         limit: int = 50,
         offset: int = 0,
-    ) -> Tuple[Iterable[Book], int]:
+        columns: Optional[Sequence[str]] = None,
+        sort: str = DEFAULT_SORT,
+        after: Optional[Tuple[Any, str]] = None,
+        author_id: Optional[int] = None,
+    ) -> Tuple[Union[Iterable[Book], Iterable[RowMapping]], int]:
         """Return a page of books with optional filters and total count.
 
         Args:
-            is_borrowed (Optional[bool]): Filter by borrow status.
+            is_borrowed (Optional[bool]): Filter by borrow status. Ignored for
+                `borrowed_only` orderings, which always list borrowed books.
             title (Optional[str]): Case-insensitive substring filter on title.
             author (Optional[str]): Case-insensitive substring filter on author.
             limit (int): Maximum number of rows to return.
             offset (int): Offset for pagination.
+            columns (Optional[Sequence[str]]): Column names to project. When
+                given, only these columns (plus the sort key and
+                `serial_number`) are selected (no ORM hydration) and rows are
+                returned as mappings.
+            sort (str): Key of `SORT_ORDERS`.
+            after (Optional[tuple[Any, str]]): Keyset cursor: the sort key
+                value and serial number of the last row of the previous page.
+            author_id (Optional[int]): Exact author filter (index-backed).
 
         Returns:
-            tuple[list[Book], int]: Books matching the filters and total count.
+            tuple[list[Book] | list[RowMapping], int]: Books (or projected rows)
+            matching the filters and total count.
         """
-        # filters reused for both queries
-        conditions = []
-        if is_borrowed is not None:
-            conditions.append(Book.is_borrowed == is_borrowed)
-        if title:
-            conditions.append(Book.title.ilike(f"%{title.strip()}%"))
-        if author:
-            conditions.append(Book.author.ilike(f"%{author.strip()}%"))
-
-        where_clause = and_(*conditions) if conditions else None
-
-        # total
-        count_stmt = select(func.count()).select_from(Book)
-        if where_clause is not None:
-            count_stmt = count_stmt.where(where_clause)
-        total = (await self.session.execute(count_stmt)).scalar_one()
-
-        # page
-        page_stmt = select(Book)
-        if where_clause is not None:
-            page_stmt = page_stmt.where(where_clause)
-        page_stmt = page_stmt.order_by(Book.created_at.desc(), Book.serial_number.asc())
-        page_stmt = page_stmt.limit(limit).offset(offset)
+        borrowed_only = SORT_ORDERS[sort].borrowed_only
+        count_stmt, page_stmt = _list_statements(
+            by_borrowed=is_borrowed is not None and not borrowed_only,
+            by_title=bool(title),
+            by_author=bool(author),
+            columns=tuple(columns) if columns else None,
+            sort=sort,
+            keyset=after is not None,
+            by_author_id=author_id is not None,
+        )
+        params = _filter_params(None if borrowed_only else is_borrowed, title, author, author_id)
 
-        result = await self.session.execute(page_stmt)
-        items = result.scalars().all()
+        total = (await self.session.execute(count_stmt, params)).scalar_one()
+
+        page_params = {**params, "limit": limit, "offset": offset}
+        if after is not None:
+            page_params["after_key"], page_params["after_serial"] = after
+        result = await self.session.execute(page_stmt, page_params)
+        items = result.mappings().all() if columns else result.scalars().all()
         return items, int(total)
 
+    async def stats(
+        self,
+        *,
+        is_borrowed: Optional[bool] = None,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        author_id: Optional[int] = None,
+    ) -> RowMapping:
+        """Aggregate the books matching the listing filters in one query.
+
+        Returns:
+            RowMapping: `total`, `borrowed`, `distinct_authors` (normalized
+            authors) and `oldest_borrowed_at` (None when nothing matching is
+            borrowed).
+        """
+        stmt = _stats_statement(
+            by_borrowed=is_borrowed is not None,
+            by_title=bool(title),
+            by_author=bool(author),
+            by_author_id=author_id is not None,
+        )
+        res = await self.session.execute(
+            stmt, _filter_params(is_borrowed, title, author, author_id)
+        )
+        return res.mappings().one()
+
+    async def title_suggestions(self, prefix: str, limit: int) -> list[Row]:
+        """Return the most common titles starting with `prefix` (case-insensitive).
+
+        Returns:
+            list[Row]: `title` and `count`, most books first.
+        """
+        res = await self.session.execute(
+            _TITLE_SUGGESTIONS, {"pattern": _like_prefix(prefix), "limit": limit}
+        )
+        return list(res.all())
+
+    async def change_horizon(self) -> datetime:
+        """Return a time before the `updated_at` of every change not yet committed.
+
+        Polling `updated_at >= horizon` later therefore sees every row that
+        commits after this call, however long its transaction has been open.
+        Only transactions of roles whose `pg_stat_activity` rows are visible
+        are accounted for (all of them with `pg_read_all_stats`).
+        """
+        res = await self.session.execute(_CHANGE_HORIZON)
+        return res.scalar_one()
+
+    async def stream_catalog(
+        self, *, since: Optional[datetime] = None, batch_size: int = 10_000
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Stream all columns of every book (or of those updated since `since`).
+
+        Uses a server-side cursor, so memory stays bounded by `batch_size`.
+
+        Args:
+            since (Optional[datetime]): Only rows with this or a later
+                `updated_at` (oldest change first); None streams the whole
+                table.
+            batch_size (int): Rows fetched per round trip.
+
+        Yields:
+            Sequence[Row]: Batches of rows.
+        """
+        stmt = _CATALOG_SCAN if since is None else _CATALOG_CHANGES
+        result = await self.session.stream(
+            stmt.execution_options(yield_per=batch_size),
+            {} if since is None else {"since": since},
+        )
+        async for partition in result.partitions():
+            yield partition
+
     async def update_borrow_state(
         self,
         *,
@@ -167,6 +587,10 @@ class BookRepository:
         Returns:
             Optional[Book]: Updated book, or None if not found.
         """
+        # Built per call on purpose: ORM session synchronization evaluates
+        # the VALUES in Python, which needs literal values rather than binds.
+        # SQLAlchemy still extracts them as parameters, so the compiled form
+        # and the SQL text (hence the prepared statement) are reused.
         stmt = (
             update(Book)
             .where(Book.serial_number == serial_number)
@@ -174,9 +598,64 @@ class BookRepository:
                 is_borrowed=is_borrowed,
                 borrower_card=borrower_card,
                 borrowed_at=borrowed_at,
-                updated_at=func.now(),
+                updated_at=utcnow(),
             )
             .returning(Book)
         )
         res = await self.session.execute(stmt)
         return res.scalar_one_or_none()
+
+    async def current_time(self) -> datetime:
+        """Return the database's current timestamp (`utcnow()`, transaction start on PostgreSQL)."""
+        return await self.session.scalar(_CURRENT_TIME)
+
+    async def lock_many(self, serial_numbers: Sequence[str]) -> list[RowMapping]:
+        """Lock the existing books among `serial_numbers` (`FOR UPDATE`, serial order).
+
+        Returns:
+            list[RowMapping]: Every column of each existing book.
+        """
+        res = await self.session.execute(_LOCK_MANY, {"serial_numbers": list(serial_numbers)})
+        return list(res.mappings().all())
+
+    async def apply_borrow_states(self, rows: Sequence[dict[str, Any]]) -> int:
+        """Write the borrow state of many books in one statement (low-level).
+
+        The caller holds the rows' locks (`lock_many`) and enforces the rules;
+        a row whose borrow state (flag, card and time) already matches is
+        left alone.
+
+        Args:
+            rows (Sequence[dict]): `serial_number`, `is_borrowed`,
+                `borrower_card`, `borrowed_at` and `updated_at` per book.
+
+        Returns:
+            int: Number of books updated.
+        """
+        res = await self.session.execute(
+            _APPLY_BORROW_STATES,
+            {
+                "serial_numbers": [r["serial_number"] for r in rows],
+                "is_borrowed": [r["is_borrowed"] for r in rows],
+                "borrower_cards": [r["borrower_card"] for r in rows],
+                "borrowed_at": [r["borrowed_at"] for r in rows],
+                "updated_at": [r["updated_at"] for r in rows],
+            },
+        )
+        return res.rowcount
+
+
+def book_repository(session: AsyncSession) -> BookRepository:
+    """Return the `BookRepository` implementation for the session's backend.
+
+    Args:
+        session (AsyncSession): Session bound to a PostgreSQL or SQLite engine.
+
+    Returns:
+        BookRepository: `SqliteBookRepository` on SQLite, else `BookRepository`.
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        from app.repositories.books_sqlite import SqliteBookRepository
+
+        return SqliteBookRepository(session)
+    return BookRepository(session)
@@ -0,0 +1,144 @@
+"""SQLite variant of the book repository (single-node deployments).
+
+Overrides only the operations that rely on PostgreSQL-specific features:
+  - array parameters (`= ANY(:serials)`) → an expanding `IN (...)` list
+  - `INSERT ... ON CONFLICT` → SQLite's equivalent upsert clause
+  - `generate_series` / `lpad` in the free-serial search → gaps are expanded
+    in Python
+  - `UPDATE ... FROM unnest(...)` for batched borrow states → one
+    executemany of a conditional UPDATE
+  - the `pg_stat_activity` change horizon → the epoch, so a catalog replica
+    refresh rescans everything (the replica is not started on SQLite: it
+    needs the serial index)
+  - advisory locks → no-ops: command transactions already start with
+    `BEGIN IMMEDIATE` (see `app.db.session`), which serializes writers the way
+    `FOR UPDATE` row locks do on PostgreSQL (SQLite ignores `FOR UPDATE`).
+"""
+
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Sequence
+
+from sqlalchemy import Integer, bindparam, or_, select, text, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import RowMapping
+
+from app.models.book import Book
+from app.repositories.books import BookRepository
+
+_GET_MANY = select(Book).where(Book.serial_number.in_(bindparam("serial_numbers", expanding=True)))
+
+_LOCK_MANY = (
+    select(*Book.__table__.c)
+    .where(Book.serial_number.in_(bindparam("serial_numbers", expanding=True)))
+    .order_by(Book.serial_number)
+)
+
+_books = Book.__table__
+_APPLY_BORROW_STATE = (
+    update(_books)
+    .where(
+        _books.c.serial_number == bindparam("b_serial_number"),
+        or_(
+            _books.c.is_borrowed != bindparam("b_is_borrowed"),
+            _books.c.borrower_card.is_distinct_from(bindparam("b_borrower_card")),
+            _books.c.borrowed_at.is_distinct_from(bindparam("b_borrowed_at")),
+        ),
+    )
+    .values(
+        is_borrowed=bindparam("b_is_borrowed"),
+        borrower_card=bindparam("b_borrower_card"),
+        borrowed_at=bindparam("b_borrowed_at"),
+        updated_at=bindparam("b_updated_at"),
+    )
+)
+
+_INSERT_SKIP_EXISTING = (
+    insert(Book)
+    .on_conflict_do_nothing(index_elements=[Book.serial_number])
+    .returning(Book)
+)
+
+# Gaps between consecutive serials in [:lo, :hi] (plus the range edges), lowest
+# first; each gap holds at least one free serial, so `:count` gaps suffice.
+_FREE_GAPS = text(
+    """
+    WITH used AS (
+        SELECT CAST(serial_number AS INTEGER) AS n
+        FROM books
+        WHERE serial_number BETWEEN :lo AND :hi
+    ), bounds AS (
+        SELECT n, lag(n, 1, :lo_n - 1) OVER (ORDER BY n) AS prev FROM used
+        UNION ALL
+        SELECT :hi_n + 1, coalesce(max(n), :lo_n - 1) FROM used
+    )
+    SELECT prev + 1 AS first, n - 1 AS last
+    FROM bounds
+    WHERE n - prev > 1
+    ORDER BY first
+    LIMIT :count
+    """
+).bindparams(
+    bindparam("lo_n", type_=Integer),
+    bindparam("hi_n", type_=Integer),
+    bindparam("count", type_=Integer),
+)
+
+
+class SqliteBookRepository(BookRepository):
+    """`BookRepository` for the SQLite backend."""
+
+    async def prime_statements(self) -> None:
+        """Prime the read statements only.
+
+        Warmup holds several connections at once; a priming UPDATE would take
+        SQLite's single write lock and stall the others.
+        """
+        await self.get_by_serial(self._PRIME_SERIAL)
+        await self.get_many([])
+        await self.list(limit=1)
+        await self.list(is_borrowed=False, limit=1)
+
+    async def change_horizon(self) -> datetime:
+        """Return the epoch: other connections' transactions are not visible."""
+        return datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+    async def get_many(self, serial_numbers: Sequence[str]) -> list[Book]:
+        """Retrieve the existing books among `serial_numbers` in one query (any order)."""
+        res = await self.session.execute(_GET_MANY, {"serial_numbers": list(serial_numbers)})
+        return list(res.scalars().all())
+
+    async def create_many(self, rows: Sequence[dict[str, Any]]) -> list[Book]:
+        """Insert new books in one statement, skipping serials that already exist."""
+        result = await self.session.scalars(_INSERT_SKIP_EXISTING, list(rows))
+        return list(result.all())
+
+    async def lock_many(self, serial_numbers: Sequence[str]) -> list[RowMapping]:
+        """Read the existing books among `serial_numbers` (writers are already excluded)."""
+        res = await self.session.execute(_LOCK_MANY, {"serial_numbers": list(serial_numbers)})
+        return list(res.mappings().all())
+
+    async def apply_borrow_states(self, rows: Sequence[dict[str, Any]]) -> int:
+        """Write the borrow state of many books (one executemany)."""
+        res = await self.session.execute(
+            _APPLY_BORROW_STATE, [{f"b_{key}": value for key, value in row.items()} for row in rows]
+        )
+        return res.rowcount
+
+    async def find_free_serials(self, count: int, lo: int, hi: int) -> list[str]:
+        """Return the lowest `count` unused serial numbers within `[lo, hi]`."""
+        res = await self.session.execute(
+            _FREE_GAPS,
+            {"lo": f"{lo:06d}", "hi": f"{hi:06d}", "lo_n": lo, "hi_n": hi, "count": count},
+        )
+        free: list[str] = []
+        for first, last in res.all():
+            free.extend(f"{n:06d}" for n in range(first, min(last, first + count - len(free) - 1) + 1))
+            if len(free) >= count:
+                break
+        return free
+
+    async def lock_serial_allocation(self) -> None:
+        """No-op: the `BEGIN IMMEDIATE` transaction already excludes other writers."""
@@ -0,0 +1,101 @@
+"""Repository layer for shelf inventory audits.
+
+Scanned serials are bulk-loaded with COPY into a transaction-scoped temporary
+table and reconciled against `books` with a single set-based join.
+"""
+
+
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.types import UTCDateTime
+
+SCANS_TABLE = "inventory_scans"
+
+# Dropped automatically when the audit's transaction ends, so pooled
+# connections never carry it into another request.
+_CREATE_SCANS = text(f"CREATE TEMPORARY TABLE {SCANS_TABLE} (serial_number text) ON COMMIT DROP")
+
+# SQLite has no ON COMMIT DROP, but its DDL is transactional: the audit's
+# rollback removes the table.
+_CREATE_SCANS_SQLITE = text(f"CREATE TEMPORARY TABLE {SCANS_TABLE} (serial_number text)")
+
+_INSERT_SCANS = text(f"INSERT INTO {SCANS_TABLE} (serial_number) VALUES (:serial_number)")
+
+# Temporary tables have no statistics until analyzed; without them the
+# planner assumes a tiny table and may pick a poor join for large scans.
+_ANALYZE_SCANS = text(f"ANALYZE {SCANS_TABLE}")
+
+# One full join classifies every discrepancy:
+#   - missing: in `books`, not scanned, and not borrowed
+#   - unknown: scanned, but no such book
+#   - borrowed_on_shelf: scanned, yet still marked borrowed
+_FINDINGS = text(
+    f"""
+    SELECT CASE
+               WHEN s.serial_number IS NULL THEN 'missing'
+               WHEN b.serial_number IS NULL THEN 'unknown'
+               ELSE 'borrowed_on_shelf'
+           END AS finding,
+           coalesce(CAST(b.serial_number AS text), s.serial_number) AS serial_number,
+           b.title,
+           b.author,
+           b.borrower_card,
+           b.borrowed_at
+    FROM {SCANS_TABLE} AS s
+    FULL JOIN books AS b ON CAST(b.serial_number AS text) = s.serial_number
+    WHERE (s.serial_number IS NULL AND NOT b.is_borrowed)
+       OR b.serial_number IS NULL
+       OR (s.serial_number IS NOT NULL AND b.is_borrowed)
+    ORDER BY finding, serial_number
+    """
+).columns(borrowed_at=UTCDateTime())
+
+
+class InventoryRepository:
+    """Data-access layer for inventory audits."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        """Initialize repository with a database session."""
+        self.session = session
+
+    async def load_scans(self, serial_numbers: Sequence[str]) -> None:
+        """Create the scans temp table and bulk-load serials into it.
+
+        Uses asyncpg's binary COPY protocol when available (one round trip
+        regardless of size), otherwise a batched executemany.
+
+        Args:
+            serial_numbers (Sequence[str]): Distinct scanned serials.
+        """
+        sqlite = self.session.get_bind().dialect.name == "sqlite"
+        await self.session.execute(_CREATE_SCANS_SQLITE if sqlite else _CREATE_SCANS)
+        conn = await self.session.connection()
+        driver_conn = (await conn.get_raw_connection()).driver_connection
+        if hasattr(driver_conn, "copy_records_to_table"):
+            await driver_conn.copy_records_to_table(
+                SCANS_TABLE,
+                records=[(s,) for s in serial_numbers],
+                columns=["serial_number"],
+            )
+        elif serial_numbers:
+            await self.session.execute(
+                _INSERT_SCANS, [{"serial_number": s} for s in serial_numbers]
+            )
+        await self.session.execute(_ANALYZE_SCANS)
+
+    async def findings(self) -> Iterable[RowMapping]:
+        """Reconcile the loaded scans against `books`.
+
+        Returns:
+            Iterable[RowMapping]: One row per discrepancy with `finding`,
+            `serial_number` and (for known books) `title`, `author`,
+            `borrower_card` and `borrowed_at`, ordered by finding then serial.
+        """
+        res = await self.session.execute(_FINDINGS)
+        return res.mappings().all()
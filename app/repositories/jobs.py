@@ -0,0 +1,177 @@
+"""Repository layer for the `jobs` queue.
+
+Runners claim the oldest queued job with `FOR UPDATE SKIP LOCKED`, so any
+number of them (API workers or standalone processes) can poll one queue
+without waiting on each other or taking the same job twice. On SQLite the
+clause is not rendered; command transactions already exclude each other
+there (`BEGIN IMMEDIATE`, see `app.db.session`).
+
+A running job's `heartbeat_at` is refreshed by its runner. Jobs whose
+heartbeat is older than a cutoff belong to a runner that went away and are
+queued again, or failed once they have used up their attempts. Cutoffs are
+computed from the database's clock, like every timestamp they compare with,
+so a runner's clock skew cannot expire live jobs.
+"""
+
+
+from __future__ import annotations
+
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import Float, bindparam, case, delete, insert, select, update
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.types import seconds_ago, utcnow
+from app.models.job import Job
+
+_jobs = Job.__table__
+
+# Every column but the (possibly large) result
+_STATE_COLUMNS = tuple(c for c in _jobs.c if c.name not in ("params", "result"))
+
+_ENQUEUE = insert(_jobs).returning(*_STATE_COLUMNS)
+
+_GET = select(*_STATE_COLUMNS).where(_jobs.c.id == bindparam("id"))
+
+_GET_RESULT = select(_jobs.c.status, _jobs.c.result).where(_jobs.c.id == bindparam("id"))
+
+_NEXT_QUEUED = (
+    select(_jobs.c.id)
+    .where(_jobs.c.status == "queued")
+    .order_by(_jobs.c.id)
+    .limit(1)
+    .with_for_update(skip_locked=True)
+    .scalar_subquery()
+)
+
+_CLAIM = (
+    update(_jobs)
+    .where(_jobs.c.id == _NEXT_QUEUED)
+    .values(
+        status="running",
+        started_at=utcnow(),
+        heartbeat_at=utcnow(),
+        attempts=_jobs.c.attempts + 1,
+    )
+    .returning(_jobs.c.id, _jobs.c.kind, _jobs.c.params)
+)
+
+# Only while the job is still ours: a runner whose job was re-queued
+# after a missed heartbeat must not overwrite the new attempt. (Bind names
+# differ from the column names, which `update()` reserves for SET values.)
+_running = (_jobs.c.id == bindparam("job_id")) & (_jobs.c.status == "running")
+
+_PROGRESS = update(_jobs).where(_running).values(
+    done=bindparam("b_done"), total=bindparam("b_total"), heartbeat_at=utcnow()
+)
+
+_HEARTBEAT = (
+    update(_jobs)
+    .where(_jobs.c.id.in_(bindparam("ids", expanding=True)), _jobs.c.status == "running")
+    .values(heartbeat_at=utcnow())
+)
+
+_SUCCEED = update(_jobs).where(_running).values(
+    status="succeeded", result=bindparam("b_result"), finished_at=utcnow(), heartbeat_at=None
+)
+
+_FAIL = update(_jobs).where(_running).values(
+    status="failed", error=bindparam("b_error"), finished_at=utcnow(), heartbeat_at=None
+)
+
+_REQUEUE = (
+    update(_jobs)
+    .where(_jobs.c.id.in_(bindparam("ids", expanding=True)), _jobs.c.status == "running")
+    .values(status="queued", heartbeat_at=None)
+)
+
+_exhausted = _jobs.c.attempts >= bindparam("max_attempts")
+_REQUEUE_STALE = (
+    update(_jobs)
+    .where(
+        _jobs.c.status == "running",
+        _jobs.c.heartbeat_at < seconds_ago(bindparam("stale_after_s", type_=Float)),
+    )
+    .values(
+        status=case((_exhausted, "failed"), else_="queued"),
+        error=case((_exhausted, "Job runner stopped responding."), else_=None),
+        finished_at=case((_exhausted, utcnow()), else_=None),
+        heartbeat_at=None,
+    )
+)
+
+_PURGE = delete(_jobs).where(
+    _jobs.c.status.in_(["succeeded", "failed"]),
+    _jobs.c.finished_at < seconds_ago(bindparam("retention_s", type_=Float)),
+)
+
+
+class JobRepository:
+    """Data-access layer for the `jobs` queue."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        """Initialize repository with a database session."""
+        self.session = session
+
+    async def enqueue(self, kind: str, params: dict[str, Any]) -> RowMapping:
+        """Insert a queued job and return its state (all columns but params and result)."""
+        res = await self.session.execute(_ENQUEUE, {"kind": kind, "params": params})
+        return res.mappings().one()
+
+    async def get(self, job_id: int) -> Optional[RowMapping]:
+        """Return a job's state (all columns but params and result), or None."""
+        res = await self.session.execute(_GET, {"id": job_id})
+        return res.mappings().one_or_none()
+
+    async def get_result(self, job_id: int) -> Optional[RowMapping]:
+        """Return a job's `status` and `result` (None until it succeeded), or None."""
+        res = await self.session.execute(_GET_RESULT, {"id": job_id})
+        return res.mappings().one_or_none()
+
+    async def claim(self) -> Optional[RowMapping]:
+        """Mark the oldest queued job not locked by another runner as running.
+
+        Returns:
+            Optional[RowMapping]: `id`, `kind` and `params` of the claimed
+            job, or None when the queue is empty.
+        """
+        res = await self.session.execute(_CLAIM)
+        return res.mappings().one_or_none()
+
+    async def progress(self, job_id: int, done: int, total: Optional[int]) -> bool:
+        """Record progress (and a heartbeat); False if the job is no longer ours."""
+        res = await self.session.execute(
+            _PROGRESS, {"job_id": job_id, "b_done": done, "b_total": total}
+        )
+        return res.rowcount == 1
+
+    async def heartbeat(self, job_ids: Sequence[int]) -> None:
+        """Refresh `heartbeat_at` of running jobs."""
+        await self.session.execute(_HEARTBEAT, {"ids": list(job_ids)})
+
+    async def succeed(self, job_id: int, result: bytes) -> bool:
+        """Store the result of a running job; False if the job is no longer ours."""
+        res = await self.session.execute(_SUCCEED, {"job_id": job_id, "b_result": result})
+        return res.rowcount == 1
+
+    async def fail(self, job_id: int, error: str) -> bool:
+        """Mark a running job as failed; False if the job is no longer ours."""
+        res = await self.session.execute(_FAIL, {"job_id": job_id, "b_error": error})
+        return res.rowcount == 1
+
+    async def requeue(self, job_ids: Sequence[int]) -> None:
+        """Put running jobs back in the queue (their runner is shutting down)."""
+        await self.session.execute(_REQUEUE, {"ids": list(job_ids)})
+
+    async def requeue_stale(self, stale_after_s: float, max_attempts: int) -> int:
+        """Queue again (or fail, after `max_attempts`) jobs not heard of for `stale_after_s`."""
+        res = await self.session.execute(
+            _REQUEUE_STALE, {"stale_after_s": stale_after_s, "max_attempts": max_attempts}
+        )
+        return res.rowcount
+
+    async def purge(self, retention_s: float) -> int:
+        """Delete jobs that finished more than `retention_s` ago, with their results."""
+        res = await self.session.execute(_PURGE, {"retention_s": retention_s})
+        return res.rowcount
@@ -0,0 +1,233 @@
+"""Repository layer for the `loans` ledger.
+
+Rows are only ever inserted (one per borrow or return) and read back as
+per-card or per-book history, newest first, by keyset pagination over the
+`(…, occurred_at DESC, id DESC)` indexes. `since` / `until` bound
+`occurred_at`, which also prunes the monthly partitions scanned.
+
+`card_loans` keeps each card's number of active loans. A checkout takes one
+with a single conditional upsert (`take`), which also enforces the per-card
+limit; a return gives it back (`release`). Group-committed batches lock
+several counters at once (`lock_counters`) and write them back together.
+"""
+
+
+from __future__ import annotations
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, and_, bindparam, func, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.models.card import CardLoans
+from app.models.loan import Loan
+
+_APPEND = insert(Loan)
+_LAST_ID = select(func.coalesce(func.max(Loan.id), 0))
+
+# Stands in for "no limit" so both cases share one statement
+UNLIMITED = 2**31 - 1
+
+_card_loans = CardLoans.__table__
+
+
+def _take_statement(dialect: Any) -> Any:
+    """Build the counter upsert: +1 unless the card already has `limit` loans.
+
+    A conflicting row is locked even when the WHERE rejects the update, so
+    concurrent checkouts with one card queue on its counter and each sees
+    the count left by the previous one.
+    """
+    return (
+        dialect.insert(_card_loans)
+        .values(borrower_card=bindparam("borrower_card"), active=1)
+        .on_conflict_do_update(
+            index_elements=[_card_loans.c.borrower_card],
+            set_={"active": _card_loans.c.active + 1},
+            where=_card_loans.c.active < bindparam("limit", type_=Integer),
+        )
+        .returning(_card_loans.c.active)
+    )
+
+
+_RELEASE = (
+    update(_card_loans)
+    .where(_card_loans.c.borrower_card == bindparam("card"), _card_loans.c.active > 0)
+    .values(active=_card_loans.c.active - 1)
+)
+
+# Batched checkouts: create missing counters (waiting on a concurrent insert
+# of the same card instead of overwriting it), then lock them in card order
+_LOCK_COUNTERS = (
+    select(_card_loans.c.borrower_card, _card_loans.c.active)
+    .where(_card_loans.c.borrower_card.in_(bindparam("cards", expanding=True)))
+    .order_by(_card_loans.c.borrower_card)
+    .with_for_update()
+)
+_SET_COUNTER = (
+    update(_card_loans)
+    .where(_card_loans.c.borrower_card == bindparam("card"))
+    .values(active=bindparam("active"))
+)
+
+
+@lru_cache(maxsize=32)
+def _history_statement(by: str, *, since: bool, until: bool, keyset: bool) -> Select:
+    """Build the history page statement for one filter shape (values are binds)."""
+    conditions = [Loan.__table__.c[by] == bindparam("key")]
+    if since:
+        conditions.append(Loan.occurred_at >= bindparam("since"))
+    if until:
+        conditions.append(Loan.occurred_at < bindparam("until"))
+    if keyset:
+        after_at, after_id = bindparam("after_at"), bindparam("after_id")
+        conditions.append(Loan.occurred_at <= after_at)
+        conditions.append(or_(Loan.occurred_at < after_at, Loan.id < after_id))
+    return (
+        select(Loan)
+        .where(and_(*conditions))
+        .order_by(Loan.occurred_at.desc(), Loan.id.desc())
+        .limit(bindparam("limit", type_=Integer))
+    )
+
+
+class LoanRepository:
+    """Data-access layer for `Loan` rows and the per-card loan counters."""
+
+    _TAKE = _take_statement(postgresql)
+    _INSERT_COUNTERS = postgresql.insert(_card_loans).on_conflict_do_nothing(
+        index_elements=[_card_loans.c.borrower_card]
+    )
+
+    def __init__(self, session: AsyncSession) -> None:
+        """Initialize repository with a database session."""
+        self.session = session
+
+    async def append(self, events: Sequence[dict[str, str]]) -> None:
+        """Insert ledger rows in one statement, in the caller's transaction.
+
+        Args:
+            events (Sequence[dict[str, str]]): `serial_number`,
+                `borrower_card` and `action` per row.
+        """
+        if events:
+            await self.session.execute(_APPEND, list(events))
+
+    async def take(self, borrower_card: str, limit: int = UNLIMITED) -> bool:
+        """Count one more active loan for a card unless it is at `limit`.
+
+        Runs in the caller's transaction, before the book is updated, and
+        holds the card's counter lock until commit.
+
+        Args:
+            borrower_card (str): The borrowing card.
+            limit (int): Maximum active loans per card (at least 1).
+
+        Returns:
+            bool: False if the card already has `limit` active loans (the
+            counter is unchanged).
+        """
+        res = await self.session.execute(
+            self._TAKE, {"borrower_card": borrower_card, "limit": limit}
+        )
+        return res.scalar_one_or_none() is not None
+
+    async def release(self, borrower_card: str) -> None:
+        """Count one active loan fewer for a card (on return)."""
+        await self.session.execute(_RELEASE, {"card": borrower_card})
+
+    async def lock_counters(self, borrower_cards: Sequence[str]) -> dict[str, int]:
+        """Lock the loan counters of several cards, creating missing ones.
+
+        Returns:
+            dict[str, int]: Active loans per card.
+        """
+        cards = sorted(set(borrower_cards))
+        if not cards:
+            return {}
+        await self.session.execute(
+            self._INSERT_COUNTERS, [{"borrower_card": card, "active": 0} for card in cards]
+        )
+        res = await self.session.execute(_LOCK_COUNTERS, {"cards": cards})
+        return dict(res.all())
+
+    async def set_counters(self, active: dict[str, int]) -> None:
+        """Overwrite counters locked with `lock_counters`."""
+        if active:
+            await self.session.execute(
+                _SET_COUNTER, [{"card": card, "active": n} for card, n in sorted(active.items())]
+            )
+
+    async def history(
+        self,
+        *,
+        serial_number: Optional[str] = None,
+        borrower_card: Optional[str] = None,
+        limit: int = 50,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+    ) -> list[Loan]:
+        """Return the events of one book or one card, newest first.
+
+        Args:
+            serial_number (Optional[str]): Book whose history to read.
+            borrower_card (Optional[str]): Card whose history to read (exactly
+                one of the two must be given).
+            limit (int): Maximum number of rows.
+            since (Optional[datetime]): Only events at or after this time.
+            until (Optional[datetime]): Only events before this time.
+            after (Optional[tuple[datetime, int]]): Keyset cursor:
+                `(occurred_at, id)` of the last row of the previous page.
+
+        Returns:
+            list[Loan]: Ledger rows.
+        """
+        by, key = "serial_number", serial_number
+        if serial_number is None:
+            by, key = "borrower_card", borrower_card
+        stmt = _history_statement(
+            by, since=since is not None, until=until is not None, keyset=after is not None
+        )
+        params: dict[str, Any] = {"key": key, "limit": limit}
+        if since is not None:
+            params["since"] = since
+        if until is not None:
+            params["until"] = until
+        if after is not None:
+            params["after_at"], params["after_id"] = after
+        res = await self.session.execute(stmt, params)
+        return list(res.scalars().all())
+
+
+class SqliteLoanRepository(LoanRepository):
+    """`LoanRepository` for the SQLite backend.
+
+    SQLite only generates integer keys for a single-column primary key, so
+    ids are assigned here; writers are serialized by `BEGIN IMMEDIATE`, which
+    makes `max(id) + 1` safe.
+    """
+
+    _TAKE = _take_statement(sqlite)
+    _INSERT_COUNTERS = sqlite.insert(_card_loans).on_conflict_do_nothing(
+        index_elements=[_card_loans.c.borrower_card]
+    )
+
+    async def append(self, events: Sequence[dict[str, str]]) -> None:
+        if not events:
+            return
+        last = (await self.session.execute(_LAST_ID)).scalar_one()
+        await self.session.execute(
+            _APPEND, [{**event, "id": last + n} for n, event in enumerate(events, start=1)]
+        )
+
+
+def loan_repository(session: AsyncSession) -> LoanRepository:
+    """Return the `LoanRepository` implementation for the session's backend."""
+    if session.get_bind().dialect.name == "sqlite":
+        return SqliteLoanRepository(session)
+    return LoanRepository(session)
@@ -1,8 +1,25 @@
 # re-export commonly used schemas
 from .books import (
+    AuthorFacet,
+    AuthorFacetResponse,
+    BookAllocateRequest,
+    BookAllocateResponse,
+    BookBatchGetItem,
+    BookBatchGetRequest,
+    BookBatchGetResponse,
     BookCreate,
+    BookDraft,
     BookRead,
     BookListResponse,
+    BookSparseRead,
+    BookSparseListResponse,
+    BookStats,
     BookStatusUpdate,
+    FreeSerialsResponse,
+    SuggestResponse,
+    Suggestion,
 )
 from .errors import ErrorEnvelope
+from .inventory import AuditFinding, AuditSummary, InventoryAuditRequest
+from .jobs import BookImportRequest, JobRead
+from .loans import LoanEvent, LoanHistoryResponse
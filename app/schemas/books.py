@@ -56,12 +56,76 @@ class BookCreate(BaseModel):
     )
 
 
+class BookDraft(BaseModel):
+    """Request schema for one book whose serial number the server assigns."""
+
+    title: str = Field(..., description="Non-empty title.", examples=["Refactoring"])
+    author: str = Field(..., description="Non-empty author name.", examples=["Martin Fowler"])
+
+    @field_validator("title", "author", mode="before")
+    @classmethod
+    def _strip_and_require_non_empty(cls, v: str) -> str:
+        """Trim whitespace and ensure the field is non-empty."""
+        if isinstance(v, str):
+            v = v.strip()
+        if not v:
+            raise ValueError("must not be empty")
+        return v
+
+
+class BookAllocateRequest(BaseModel):
+    """Request schema for bulk intake with server-assigned serial numbers.
+
+    Each book receives the lowest free serial within `[start, end]`, in
+    request order.
+    """
+
+    items: list[BookDraft] = Field(..., min_length=1, max_length=1000)
+    start: str = Field("000000", description="Lowest serial to assign (inclusive).")
+    end: str = Field("999999", description="Highest serial to assign (inclusive).")
+
+    @field_validator("start", "end")
+    @classmethod
+    def _validate_serial(cls, v: str) -> str:
+        """Ensure range bounds are exactly six digits."""
+        if not SIX_DIGIT_RE.fullmatch(v):
+            raise ValueError("must be exactly six digits")
+        return v
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "items": [
+                        {"title": "Clean Code", "author": "Robert C. Martin"},
+                        {"title": "Refactoring", "author": "Martin Fowler"},
+                    ],
+                    "start": "100000",
+                    "end": "199999",
+                }
+            ]
+        }
+    )
+
+
+class FreeSerialsResponse(BaseModel):
+    """Response schema: unused serial numbers, lowest first."""
+    serial_numbers: list[str] = Field(..., description="Six-digit serials not currently in use.")
+
+    model_config = ConfigDict(
+        json_schema_extra={"examples": [{"serial_numbers": ["000002", "000005", "000006"]}]}
+    )
+
+
 class BookRead(BaseModel):
     """Response schema: full representation of a book."""
 
     serial_number: str = Field(..., description="Six-digit string identifier.")
     title: str
     author: str
+    author_id: Optional[int] = Field(
+        None, description="Normalized author; pass as `author_id=` to list the author's books."
+    )
     is_borrowed: bool
     borrowed_at: Optional[datetime] = Field(
         None, description="Timestamp in UTC when the book was borrowed (null if available)."
@@ -90,6 +154,7 @@ class BookRead(BaseModel):
                     "serial_number": "123456",
                     "title": "Clean Architecture",
                     "author": "Robert C. Martin",
+                    "author_id": 12,
                     "is_borrowed": False,
                     "borrowed_at": None,
                     "borrower_card": None,
@@ -101,6 +166,28 @@ class BookRead(BaseModel):
     )
 
 
+# Field names selectable via sparse fieldsets (`GET /books?fields=...`)
+BOOK_FIELDS: tuple[str, ...] = tuple(BookRead.model_fields)
+
+
+class BookSparseRead(BaseModel):
+    """Response schema: partial representation of a book (sparse fieldset).
+
+    Every field is optional; only the requested ones are set and serialized
+    (dump with `exclude_unset=True`).
+    """
+
+    serial_number: Optional[str] = None
+    title: Optional[str] = None
+    author: Optional[str] = None
+    author_id: Optional[int] = None
+    is_borrowed: Optional[bool] = None
+    borrowed_at: Optional[datetime] = None
+    borrower_card: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
 class _BorrowAction(BaseModel):
     """Discriminator model for borrow action in status updates."""
     action: Literal["borrow"] = Field("borrow", description="Borrow the book.")
@@ -147,6 +234,7 @@ class BookListResponse(BaseModel):
                             "serial_number": "000001",
                             "title": "Test",
                             "author": "Author",
+                            "author_id": 1,
                             "is_borrowed": False,
                             "borrowed_at": None,
                             "borrower_card": None,
@@ -159,3 +247,150 @@ class BookListResponse(BaseModel):
             ]
         }
     )
+
+
+class BookSparseListResponse(BaseModel):
+    """Response schema for a paginated list of partial books (`fields=`)."""
+    items: list[BookSparseRead]
+    total: int = Field(..., ge=0, description="Total number of matching books.")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "items": [{"serial_number": "000001", "title": "Test", "is_borrowed": False}],
+                    "total": 1,
+                }
+            ]
+        }
+    )
+
+
+class BookStats(BaseModel):
+    """Response schema for catalog statistics over the listing filters."""
+    total: int = Field(..., ge=0, description="Number of matching books.")
+    borrowed: int = Field(..., ge=0, description="Matching books currently borrowed.")
+    available: int = Field(..., ge=0, description="Matching books on the shelf.")
+    distinct_authors: int = Field(..., ge=0, description="Distinct authors among matching books.")
+    oldest_borrowed_at: Optional[datetime] = Field(
+        None, description="Earliest borrow time among matching borrowed books."
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "total": 120,
+                    "borrowed": 7,
+                    "available": 113,
+                    "distinct_authors": 64,
+                    "oldest_borrowed_at": "2024-01-01T12:00:00Z",
+                }
+            ]
+        }
+    )
+
+
+class AuthorFacet(BaseModel):
+    """One author facet: a normalized author and its number of matching books."""
+    id: int = Field(..., description="Author id, usable as `GET /books?author_id=`.")
+    name: str = Field(..., description="Display name (first spelling seen).")
+    count: int = Field(..., ge=1, description="Matching books by this author.")
+
+
+class AuthorFacetResponse(BaseModel):
+    """Response schema for author facets, most books first."""
+    items: list[AuthorFacet]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "items": [
+                        {"id": 12, "name": "Robert C. Martin", "count": 4},
+                        {"id": 3, "name": "Martin Fowler", "count": 2},
+                    ]
+                }
+            ]
+        }
+    )
+
+
+class Suggestion(BaseModel):
+    """One completion: a title or author and its number of books."""
+    text: str = Field(..., description="Title or author as written (first spelling seen).")
+    count: int = Field(..., ge=1, description="Books with this title or author.")
+
+
+class SuggestResponse(BaseModel):
+    """Response schema for autocomplete, most books first per field."""
+    titles: list[Suggestion]
+    authors: list[Suggestion]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "titles": [{"text": "Clean Code", "count": 3}],
+                    "authors": [{"text": "Cormac McCarthy", "count": 2}],
+                }
+            ]
+        }
+    )
+
+
+class BookAllocateResponse(BaseModel):
+    """Response schema for bulk intake: the created books, in request order."""
+    items: list[BookRead]
+
+
+# Upper bound for one batch get (a self-checkout tray is far below this)
+MAX_BATCH_GET = 5000
+
+
+class BookBatchGetRequest(BaseModel):
+    """Request schema for resolving many serial numbers at once."""
+    serial_numbers: list[str] = Field(..., min_length=1, max_length=MAX_BATCH_GET)
+
+    model_config = ConfigDict(
+        json_schema_extra={"examples": [{"serial_numbers": ["000001", "123456", "000001"]}]}
+    )
+
+
+class BookBatchGetItem(BaseModel):
+    """One batch-get result: the book, or an explicit not-found marker."""
+    serial_number: str = Field(..., description="The requested serial, echoed back.")
+    found: bool
+    book: Optional[BookRead] = Field(None, description="The book when `found` (null otherwise).")
+
+
+class BookBatchGetResponse(BaseModel):
+    """Response schema for batch get: one item per requested serial, in request order."""
+    items: list[BookBatchGetItem]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "items": [
+                        {
+                            "serial_number": "000001",
+                            "found": True,
+                            "book": {
+                                "serial_number": "000001",
+                                "title": "Test",
+                                "author": "Author",
+                                "author_id": 1,
+                                "is_borrowed": False,
+                                "borrowed_at": None,
+                                "borrower_card": None,
+                                "created_at": "2024-01-01T12:00:00Z",
+                                "updated_at": "2024-01-01T12:00:00Z",
+                            },
+                        },
+                        {"serial_number": "123456", "found": False, "book": None},
+                    ]
+                }
+            ]
+        }
+    )
@@ -0,0 +1,48 @@
+"""Pydantic schemas for shelf inventory audits."""
+
+
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class InventoryAuditRequest(BaseModel):
+    """Request schema: every serial scanned during a stocktake.
+
+    Duplicates and surrounding whitespace are tolerated; malformed serials are
+    reported as unknown rather than rejected.
+    """
+
+    serials: list[str] = Field(..., description="Scanned serial numbers.")
+
+    model_config = ConfigDict(
+        json_schema_extra={"examples": [{"serials": ["000001", "000002", "123456"]}]}
+    )
+
+
+class AuditFinding(BaseModel):
+    """One line of the audit report: a discrepancy between shelf and catalog.
+
+    Kinds:
+        - `missing`: catalogued and not borrowed, but not scanned.
+        - `unknown`: scanned, but not in the catalog.
+        - `borrowed_on_shelf`: scanned, yet still marked as borrowed.
+    """
+
+    finding: Literal["missing", "unknown", "borrowed_on_shelf"]
+    serial_number: str
+    title: Optional[str] = None
+    author: Optional[str] = None
+    borrower_card: Optional[str] = None
+    borrowed_at: Optional[datetime] = None
+
+
+class AuditSummary(BaseModel):
+    """Final line of the audit report: totals per finding kind."""
+
+    scanned: int = Field(..., ge=0, description="Scans submitted, including duplicates.")
+    distinct: int = Field(..., ge=0, description="Distinct serials scanned.")
+    missing: int = Field(..., ge=0)
+    unknown: int = Field(..., ge=0)
+    borrowed_on_shelf: int = Field(..., ge=0)
@@ -0,0 +1,53 @@
+"""Pydantic schemas for background jobs."""
+
+
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.schemas.books import BookCreate
+
+# Upper bound for one import job; the request body is still validated in
+# the API worker, so larger imports are split into several jobs
+MAX_IMPORT_ITEMS = 100_000
+
+
+class BookImportRequest(BaseModel):
+    """Request schema for a bulk import with caller-chosen serial numbers.
+
+    Serials that are already in use are skipped rather than rejected, so a
+    failed or repeated import can simply be submitted again.
+    """
+
+    items: list[BookCreate] = Field(..., min_length=1, max_length=MAX_IMPORT_ITEMS)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "items": [
+                        {"serial_number": "000101", "title": "Clean Code", "author": "Robert C. Martin"},
+                        {"serial_number": "000102", "title": "Refactoring", "author": "Martin Fowler"},
+                    ]
+                }
+            ]
+        }
+    )
+
+
+class JobRead(BaseModel):
+    """Response schema: state and progress of a background job."""
+
+    id: int
+    kind: Literal["audit", "export", "import"]
+    status: Literal["queued", "running", "succeeded", "failed"]
+    done: int = Field(..., ge=0, description="Work items processed so far.")
+    total: Optional[int] = Field(None, description="Work items in the job, once known.")
+    error: Optional[str] = Field(None, description="Why the job failed.")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result_url: Optional[str] = Field(
+        None, description="Where to download the NDJSON result, once the job succeeded."
+    )
@@ -0,0 +1,47 @@
+"""Pydantic schemas for circulation (loan) history."""
+
+
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class LoanEvent(BaseModel):
+    """One ledger entry: a borrow or a return."""
+
+    serial_number: str = Field(..., description="Six-digit book identifier.")
+    borrower_card: str = Field(..., description="Card that borrowed (or returned) the book.")
+    action: Literal["borrow", "return"]
+    occurred_at: datetime = Field(..., description="When the state change was committed.")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class LoanHistoryResponse(BaseModel):
+    """Response schema for a page of loan history, newest first."""
+
+    items: list[LoanEvent]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "items": [
+                        {
+                            "serial_number": "000001",
+                            "borrower_card": "654321",
+                            "action": "return",
+                            "occurred_at": "2024-01-08T09:30:00Z",
+                        },
+                        {
+                            "serial_number": "000001",
+                            "borrower_card": "654321",
+                            "action": "borrow",
+                            "occurred_at": "2024-01-01T12:00:00Z",
+                        },
+                    ]
+                }
+            ]
+        }
+    )
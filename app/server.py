@@ -0,0 +1,73 @@
+"""Production server runner for the Library API.
+
+Usage:
+    python -m app.server
+
+Starts uvicorn with the application factory (`app.main:create_app`) and the
+`SERVER_*` / `UVICORN_WORKERS` settings:
+  - worker count from `UVICORN_WORKERS`, else the CPUs usable by this process
+  - event loop and HTTP parser selection (uvloop / httptools when installed)
+  - keep-alive, listen backlog and concurrency limits
+  - graceful drain on SIGTERM: uvicorn stops accepting connections, finishes
+    in-flight requests for up to `SERVER_GRACEFUL_SHUTDOWN_S`, then runs the
+    lifespan shutdown (pool disposal)
+"""
+
+
+from __future__ import annotations
+
+import os
+from importlib.util import find_spec
+from typing import Any
+
+import uvicorn
+
+from app.core.config import Settings, get_settings
+
+
+def usable_cpus() -> int:
+    """Return the number of CPUs this process may run on (cgroup/affinity aware)."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def _resolve(choice: str, preferred: str, fallback: str) -> str:
+    """Resolve an "auto" loop/parser choice to an installed implementation."""
+    if choice != "auto":
+        return choice
+    return preferred if find_spec(preferred) is not None else fallback
+
+
+def server_config(settings: Settings) -> dict[str, Any]:
+    """Build `uvicorn.run` keyword arguments from settings.
+
+    Args:
+        settings (Settings): Application settings.
+
+    Returns:
+        dict[str, Any]: Keyword arguments for `uvicorn.run`.
+    """
+    return {
+        "host": settings.SERVER_HOST,
+        "port": settings.SERVER_PORT,
+        "factory": True,
+        "workers": settings.UVICORN_WORKERS or usable_cpus(),
+        "loop": _resolve(settings.SERVER_LOOP, "uvloop", "asyncio"),
+        "http": _resolve(settings.SERVER_HTTP, "httptools", "h11"),
+        "timeout_keep_alive": settings.SERVER_KEEPALIVE_S,
+        "backlog": settings.SERVER_BACKLOG,
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_SHUTDOWN_S,
+        "log_level": settings.LOG_LEVEL.lower(),
+        "proxy_headers": True,
+    }
+
+
+def main() -> None:
+    """Run the API with production server settings."""
+    uvicorn.run("app.main:create_app", **server_config(get_settings()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,290 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import json
 from datetime import datetime, timezone
-from typing import Iterable, Optional, Tuple
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Iterable, NamedTuple, Optional, Sequence, Tuple, Union
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.common.exceptions import Conflict, NotFound
+from app.common.exceptions import Conflict, NotFound, ValidationError
 from app.models.book import Book
-from app.repositories.books import BookRepository
-from app.schemas.books import BookCreate
+from app.repositories.authors import author_repository
+from app.repositories.books import DEFAULT_SORT, SORT_ORDERS, book_repository
+from app.repositories.loans import UNLIMITED, loan_repository
+from app.schemas.books import BOOK_FIELDS, MAX_BATCH_GET, SIX_DIGIT_RE, BookCreate, BookDraft
+from app.services.catalog_replica import CatalogReplica
+from app.services.serial_index import SerialIndex
+from app.services.suggest_index import MAX_SUGGESTIONS, SuggestIndex
+
+if TYPE_CHECKING:
+    from app.services.status_batcher import StatusBatcher
+
+
+# Upper bound for `find_free_serials(count=...)` and bulk allocation size
+MAX_ALLOCATION = 1000
+# Upper bound for `author_facets(limit=...)`
+MAX_FACETS = 200
+# Columns written by `BookRepository.apply_borrow_states`
+_BORROW_STATE = ("serial_number", "is_borrowed", "borrower_card", "borrowed_at", "updated_at")
 
 
 def utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+class BookPage(NamedTuple):
+    """One page of a book listing.
+
+    Attributes:
+        items (list): Books, or mappings of the requested fields.
+        total (int): Number of books matching the filters.
+        next_cursor (Optional[str]): Opaque cursor for the following page,
+            None when this page was not full.
+    """
+
+    items: list[Any]
+    total: int
+    next_cursor: Optional[str]
+
+
+class StatusChange(NamedTuple):
+    """One requested borrow or return (see `BookService.apply_status_changes`).
+
+    Attributes:
+        serial_number (str): The book.
+        borrower_card (Optional[str]): The borrowing card; None for a return.
+    """
+
+    serial_number: str
+    borrower_card: Optional[str]
+
+
+def encode_cursor(sort: str, last: Any) -> str:
+    """Encode the keyset of the last row of a page as an opaque cursor."""
+    column = SORT_ORDERS[sort].column
+    get = last.__getitem__ if hasattr(last, "keys") else lambda name: getattr(last, name)
+    key = get(column)
+    raw = json.dumps([sort, key.isoformat() if isinstance(key, datetime) else key, get("serial_number")])
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, str]:
+    """Decode a cursor issued for `sort` into `(key_value, serial_number)`."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, key, serial_number = json.loads(raw)
+        if isinstance(key, str) and Book.__table__.c[SORT_ORDERS[sort].column].type.python_type is datetime:
+            key = datetime.fromisoformat(key)
+    except (binascii.Error, ValueError, TypeError):
+        raise ValidationError("Invalid cursor.")
+    if cursor_sort != sort or not isinstance(serial_number, str):
+        raise ValidationError("Cursor does not match the requested sort.")
+    return key, serial_number
+
+
+def check_listing(
+    *,
+    is_borrowed: Optional[bool],
+    limit: int,
+    offset: int,
+    fields: Optional[Sequence[str]],
+    sort: Optional[str],
+    cursor: Optional[str],
+) -> Tuple[int, int, str]:
+    """Validate listing arguments and return the clamped `(limit, offset, sort)`.
+
+    Raises:
+        ValidationError: On unknown fields or sort, a `borrowed_at` sort
+            without `is_borrowed=True`, or a cursor combined with an offset.
+    """
+    # Clamp pagination
+    limit = max(1, min(limit, 200))
+    offset = max(0, offset)
+    if fields is not None:
+        unknown = [f for f in fields if f not in BOOK_FIELDS]
+        if unknown or not fields:
+            raise ValidationError(
+                f"Unknown fields: {', '.join(unknown)}." if unknown else "fields must not be empty."
+            )
+    sort = sort or DEFAULT_SORT
+    if sort not in SORT_ORDERS:
+        raise ValidationError(f"sort must be one of: {', '.join(SORT_ORDERS)}.")
+    if SORT_ORDERS[sort].borrowed_only and is_borrowed is not True:
+        raise ValidationError(f"sort={sort} requires is_borrowed=true.")
+    if cursor is not None and offset:
+        raise ValidationError("cursor and offset cannot be combined.")
+    return limit, offset, sort
+
+
+def _serial_range(start: str, end: str) -> Tuple[int, int]:
+    """Validate a `[start, end]` serial range and return it as integers."""
+    if not (SIX_DIGIT_RE.fullmatch(start) and SIX_DIGIT_RE.fullmatch(end)):
+        raise ValidationError("start and end must be exactly six digits.")
+    lo, hi = int(start), int(end)
+    if lo > hi:
+        raise ValidationError("start must not be greater than end.")
+    return lo, hi
+
+
 class BookService:
     """Business logic for books. Stateless; operates per-session."""
 
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(
+        self,
+        session: AsyncSession,
+        serial_index: Optional[SerialIndex] = None,
+        catalog: Optional[CatalogReplica] = None,
+        suggest_index: Optional[SuggestIndex] = None,
+        max_loans_per_card: int = 0,
+        status_batcher: Optional[StatusBatcher] = None,
+    ) -> None:
         self.session = session
-        self.repo = BookRepository(session)
+        self.repo = book_repository(session)
+        self.authors = author_repository(session)
+        self.loans = loan_repository(session)
+        self.serial_index = serial_index
+        self.catalog = catalog
+        self.suggest_index = suggest_index
+        self.max_loans_per_card = max_loans_per_card
+        self.status_batcher = status_batcher
+
+    def _known(self, serial_number: str) -> Optional[bool]:
+        """Ask the serial index whether a book exists (None → ask the DB).
+
+        For reads only: the index lags other workers' writes by a NOTIFY, so
+        commands rely on the statement they run anyway instead.
+        """
+        if self.serial_index is None:
+            return None
+        return self.serial_index.contains(serial_number)
 
     # --- Commands -----------------------------------------------------------
 
     async def add_book(self, data: BookCreate) -> Book:
-        # Existence check
-        existing = await self.repo.get_by_serial(data.serial_number)
-        if existing:
-            raise Conflict("Book with this serial_number already exists.")
-
-        obj = await self.repo.create(
-            serial_number=data.serial_number,
-            title=data.title,
-            author=data.author,
+        # The insert skips a taken serial (ON CONFLICT DO NOTHING), which also
+        # covers a book created or deleted concurrently
+        author_ids = await self.authors.resolve([data.author])
+        created = await self.repo.create_many(
+            [
+                {
+                    "serial_number": data.serial_number,
+                    "title": data.title,
+                    "author": data.author,
+                    "author_id": author_ids[data.author],
+                }
+            ]
         )
+        if not created:
+            await self.session.rollback()
+            raise Conflict("Book with this serial_number already exists.")
+        obj = created[0]
         await self.session.commit()
+        if self.serial_index is not None:
+            self.serial_index.add(data.serial_number)
+        if self.suggest_index is not None:
+            self.suggest_index.add(data.serial_number, data.title, data.author)
         await self.session.refresh(obj)
         return obj
 
+    async def add_books(
+        self, drafts: Sequence[BookDraft], *, start: str = "000000", end: str = "999999"
+    ) -> list[Book]:
+        """Create books with server-assigned serials (the lowest free in range).
+
+        Allocators are serialized by a transaction-level advisory lock, and a
+        serial taken concurrently by a plain `add_book` is skipped by the
+        insert and reassigned, so the caller never sees a conflict.
+
+        Returns:
+            list[Book]: Created books, in the order of `drafts`.
+
+        Raises:
+            ValidationError: On an invalid range or batch size.
+            Conflict: If the range has fewer free serials than `drafts`.
+        """
+        lo, hi = _serial_range(start, end)
+        if not 1 <= len(drafts) <= MAX_ALLOCATION:
+            raise ValidationError(f"Between 1 and {MAX_ALLOCATION} books can be added at once.")
+
+        await self.repo.lock_serial_allocation()
+        author_ids = await self.authors.resolve(d.author for d in drafts)
+        created: dict[int, Book] = {}
+        pending = list(range(len(drafts)))
+        while pending:
+            serials = await self.repo.find_free_serials(len(pending), lo, hi)
+            if len(serials) < len(pending):
+                await self.session.rollback()
+                raise Conflict("Not enough free serial numbers in the requested range.")
+            inserted = {
+                book.serial_number: book
+                for book in await self.repo.create_many(
+                    [
+                        {
+                            "serial_number": s,
+                            "title": drafts[i].title,
+                            "author": drafts[i].author,
+                            "author_id": author_ids[drafts[i].author],
+                        }
+                        for i, s in zip(pending, serials)
+                    ]
+                )
+            }
+            for i, s in zip(pending, serials):
+                if s in inserted:
+                    created[i] = inserted[s]
+            pending = [i for i in pending if i not in created]
+
+        books = [created[i] for i in range(len(drafts))]
+        await self.session.commit()
+        if self.serial_index is not None:
+            for book in books:
+                self.serial_index.add(book.serial_number)
+        if self.suggest_index is not None:
+            for book in books:
+                self.suggest_index.add(book.serial_number, book.title, book.author)
+        return books
+
+    async def import_books(self, items: Sequence[BookCreate]) -> list[Book]:
+        """Create books with caller-chosen serials, skipping serials already in use.
+
+        Unlike `add_book`, a taken serial is not an error, so a repeated
+        import only adds what is still missing. One transaction per call.
+
+        Returns:
+            list[Book]: The books created (taken serials are absent), in no
+            particular order.
+
+        Raises:
+            ValidationError: If more than `MAX_ALLOCATION` items are given.
+        """
+        if len(items) > MAX_ALLOCATION:
+            raise ValidationError(f"At most {MAX_ALLOCATION} books can be imported at once.")
+        if not items:
+            return []
+        author_ids = await self.authors.resolve(item.author for item in items)
+        books = await self.repo.create_many(
+            [
+                {
+                    "serial_number": item.serial_number,
+                    "title": item.title,
+                    "author": item.author,
+                    "author_id": author_ids[item.author],
+                }
+                for item in items
+            ]
+        )
+        await self.session.commit()
+        if self.serial_index is not None:
+            for book in books:
+                self.serial_index.add(book.serial_number)
+        if self.suggest_index is not None:
+            for book in books:
+                self.suggest_index.add(book.serial_number, book.title, book.author)
+        return books
+
     async def remove_book(self, serial_number: str) -> None:
         # Enforce policy: cannot delete when borrowed
         obj = await self.repo.get_for_update(serial_number)
@@ -50,8 +296,14 @@ class BookService:
 
         await self.repo.delete(serial_number)
         await self.session.commit()
+        if self.serial_index is not None:
+            self.serial_index.discard(serial_number)
+        if self.suggest_index is not None:
+            self.suggest_index.discard(serial_number)
 
     async def borrow_book(self, serial_number: str, borrower_card: str) -> Book:
+        if self.status_batcher is not None:
+            return await self.status_batcher.submit(StatusChange(serial_number, borrower_card))
         # Lock the row to serialize concurrent borrows
         obj = await self.repo.get_for_update(serial_number)
         if obj is None:
@@ -63,6 +315,12 @@ class BookService:
                 return obj
             raise Conflict("Book is already borrowed.")
 
+        # The card's counter is updated before the book, so it is locked by
+        # every transaction that changes the card's loans
+        limit = self.max_loans_per_card or UNLIMITED
+        if not await self.loans.take(borrower_card, limit):
+            raise Conflict(f"Borrower card already has {limit} books on loan.")
+
         updated = await self.repo.update_borrow_state(
             serial_number=serial_number,
             is_borrowed=True,
@@ -72,11 +330,16 @@ class BookService:
         if updated is None:
             # Shouldn't happen due to prior fetch, but keep a guard
             raise NotFound("Book not found.")
+        await self.loans.append(
+            [{"serial_number": serial_number, "borrower_card": borrower_card, "action": "borrow"}]
+        )
 
         await self.session.commit()
         return updated
 
     async def return_book(self, serial_number: str) -> Book:
+        if self.status_batcher is not None:
+            return await self.status_batcher.submit(StatusChange(serial_number, None))
         # Lock the row to serialize concurrent returns/borrows
         obj = await self.repo.get_for_update(serial_number)
         if obj is None:
@@ -84,6 +347,8 @@ class BookService:
 
         if not obj.is_borrowed:
             raise Conflict("Book is not currently borrowed.")
+        borrower_card = obj.borrower_card
+        await self.loans.release(borrower_card)
 
         updated = await self.repo.update_borrow_state(
             serial_number=serial_number,
@@ -93,12 +358,138 @@ class BookService:
         )
         if updated is None:
             raise NotFound("Book not found.")
+        await self.loans.append(
+            [{"serial_number": serial_number, "borrower_card": borrower_card, "action": "return"}]
+        )
 
         await self.session.commit()
         return updated
 
+    async def apply_status_changes(
+        self, changes: Sequence[StatusChange]
+    ) -> list[Union[Book, Exception]]:
+        """Apply many borrows and returns in one transaction (group commit).
+
+        Each change gets the outcome `borrow_book` / `return_book` would have
+        given it, had the changes run one after another in the given order
+        (several changes to one book or card are allowed). The books and then
+        the cards' loan counters are locked in key order. The changes are
+        decided in Python and written with one set-based UPDATE and one
+        ledger insert, then committed once.
+
+        Returns:
+            list[Book | Exception]: Per change, in order, the resulting book
+            (detached) or the `NotFound` / `Conflict` it raised. Changes that
+            raised have no effect.
+        """
+        books = {
+            row["serial_number"]: dict(row)
+            for row in await self.repo.lock_many(sorted({c.serial_number for c in changes}))
+        }
+        cards = {c.borrower_card for c in changes if c.borrower_card is not None}
+        cards.update(b["borrower_card"] for b in books.values() if b["borrower_card"] is not None)
+        active = await self.loans.lock_counters(list(cards))
+
+        limit = self.max_loans_per_card or UNLIMITED
+        # Database time, like every other `updated_at` (the catalog replica
+        # reads changes by it); also used for `borrowed_at`
+        now = await self.repo.current_time()
+        delta: Counter[str] = Counter()
+        changed: dict[str, dict[str, Any]] = {}
+        events: list[dict[str, str]] = []
+        outcomes: list[Union[Book, Exception]] = []
+        for change in changes:
+            book = books.get(change.serial_number)
+            if book is None:
+                outcomes.append(NotFound("Book not found."))
+                continue
+            card = change.borrower_card
+            if card is not None:
+                if book["is_borrowed"]:
+                    if book["borrower_card"] == card:
+                        outcomes.append(Book(**book))
+                    else:
+                        outcomes.append(Conflict("Book is already borrowed."))
+                    continue
+                if active[card] + delta[card] >= limit:
+                    outcomes.append(Conflict(f"Borrower card already has {limit} books on loan."))
+                    continue
+                delta[card] += 1
+                book.update(is_borrowed=True, borrower_card=card, borrowed_at=now, updated_at=now)
+                events.append(
+                    {"serial_number": book["serial_number"], "borrower_card": card, "action": "borrow"}
+                )
+            else:
+                if not book["is_borrowed"]:
+                    outcomes.append(Conflict("Book is not currently borrowed."))
+                    continue
+                card = book["borrower_card"]
+                delta[card] -= 1
+                book.update(is_borrowed=False, borrower_card=None, borrowed_at=None, updated_at=now)
+                events.append(
+                    {"serial_number": book["serial_number"], "borrower_card": card, "action": "return"}
+                )
+            changed[change.serial_number] = book
+            outcomes.append(Book(**book))
+
+        if events:
+            await self.loans.set_counters(
+                {card: max(0, active[card] + d) for card, d in delta.items() if d}
+            )
+            # A book borrowed and returned within the batch may end unchanged
+            await self.repo.apply_borrow_states(
+                [{key: book[key] for key in _BORROW_STATE} for book in changed.values()]
+            )
+            await self.loans.append(events)
+        await self.session.commit()
+        return outcomes
+
     # --- Queries ------------------------------------------------------------
 
+    async def get_books(self, serial_numbers: Sequence[str]) -> list[Optional[Book]]:
+        """Resolve many serials with a single query.
+
+        Serials that are malformed or ruled out by the serial index are not
+        sent to the database.
+
+        Returns:
+            list[Optional[Book]]: One entry per requested serial, in request
+            order (duplicates repeated), None where no such book exists.
+
+        Raises:
+            ValidationError: If more than `MAX_BATCH_GET` serials are requested.
+        """
+        if len(serial_numbers) > MAX_BATCH_GET:
+            raise ValidationError(f"At most {MAX_BATCH_GET} serial numbers can be requested at once.")
+        candidates = list(
+            dict.fromkeys(
+                s for s in serial_numbers if SIX_DIGIT_RE.fullmatch(s) and self._known(s) is not False
+            )
+        )
+        found = {b.serial_number: b for b in await self.repo.get_many(candidates)} if candidates else {}
+        return [found.get(s) for s in serial_numbers]
+
+    async def find_free_serials(
+        self, count: int, *, start: str = "000000", end: str = "999999"
+    ) -> list[str]:
+        """Return up to `count` unused serials in `[start, end]`, lowest first.
+
+        Answered from the serial index when it is fresh, otherwise by a
+        gap-finding query over the primary key. The result is advisory; use
+        `add_books` to allocate without races.
+
+        Raises:
+            ValidationError: On an invalid range or count.
+        """
+        lo, hi = _serial_range(start, end)
+        if not 1 <= count <= MAX_ALLOCATION:
+            raise ValidationError(f"count must be between 1 and {MAX_ALLOCATION}.")
+        if self.serial_index is not None:
+            free = self.serial_index.free(count, lo, hi)
+            if free is not None:
+                return free
+        return await self.repo.find_free_serials(count, lo, hi)
+
     async def list_books(
         self,
         *,
@@ -107,15 +498,160 @@ class BookService:
         author: Optional[str] = None,
         limit: int = 50,
         offset: int = 0,
+        fields: Optional[Sequence[str]] = None,
     ) -> Tuple[Iterable[Book], int]:
-        # Clamp pagination
-        limit = max(1, min(limit, 200))
-        offset = max(0, offset)
-        items, total = await self.repo.list(
+        page = await self.list_books_page(
             is_borrowed=is_borrowed,
             title=title,
             author=author,
             limit=limit,
             offset=offset,
+            fields=fields,
+        )
+        return page.items, page.total
+
+    async def list_books_page(
+        self,
+        *,
+        is_borrowed: Optional[bool] = None,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        fields: Optional[Sequence[str]] = None,
+        sort: Optional[str] = None,
+        cursor: Optional[str] = None,
+        author_id: Optional[int] = None,
+    ) -> BookPage:
+        """List books in a whitelisted order, by offset or keyset cursor.
+
+        Default-order pages without a cursor come from the catalog replica
+        when one is attached and fresh (as mappings rather than `Book`s).
+        `author_id` selects one normalized author exactly (see
+        `author_facets`), unlike the substring `author` filter.
+
+        Raises:
+            ValidationError: On unknown fields or sort, a `borrowed_at` sort
+                without `is_borrowed=True`, or a cursor that is malformed,
+                issued for another sort, or combined with an offset.
+        """
+        limit, offset, sort = check_listing(
+            is_borrowed=is_borrowed,
+            limit=limit,
+            offset=offset,
+            fields=fields,
+            sort=sort,
+            cursor=cursor,
         )
-        return items, total
+        after = decode_cursor(cursor, sort) if cursor is not None else None
+
+        replicated = None
+        if self.catalog is not None and sort == DEFAULT_SORT and after is None:
+            replicated = self.catalog.list(
+                is_borrowed=is_borrowed,
+                title=title,
+                author=author,
+                author_id=author_id,
+                limit=limit,
+                offset=offset,
+            )
+        if replicated is not None:
+            items, total = replicated
+        else:
+            items, total = await self.repo.list(
+                is_borrowed=is_borrowed,
+                title=title,
+                author=author,
+                limit=limit,
+                offset=offset,
+                columns=fields,
+                sort=sort,
+                after=after,
+                author_id=author_id,
+            )
+        items = list(items)
+        next_cursor = encode_cursor(sort, items[-1]) if len(items) == limit else None
+        if fields is not None:
+            # Drop sort keys the repository added for the cursor
+            items = [{name: row[name] for name in fields} for row in items]
+        return BookPage(items, total, next_cursor)
+
+    async def book_stats(
+        self,
+        *,
+        is_borrowed: Optional[bool] = None,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        author_id: Optional[int] = None,
+    ) -> dict[str, Any]:
+        """Count and aggregate the books matching the listing filters.
+
+        Returns:
+            dict: `total`, `borrowed`, `available`, `distinct_authors` and
+            `oldest_borrowed_at`.
+        """
+        filters = {"is_borrowed": is_borrowed, "title": title, "author": author, "author_id": author_id}
+        stats = None
+        if self.catalog is not None:
+            stats = self.catalog.stats(**filters)
+        if stats is None:
+            stats = dict(await self.repo.stats(**filters))
+        return {**stats, "available": stats["total"] - stats["borrowed"]}
+
+    async def author_facets(
+        self,
+        *,
+        prefix: Optional[str] = None,
+        is_borrowed: Optional[bool] = None,
+        limit: int = 50,
+    ) -> list[dict[str, Any]]:
+        """Count books per normalized author, most books first.
+
+        Args:
+            prefix (Optional[str]): Only authors whose normalized name starts
+                with this (case- and spacing-insensitive).
+            is_borrowed (Optional[bool]): Only count books in this state.
+            limit (int): Maximum number of authors (clamped to 1-200).
+
+        Returns:
+            list[dict]: `id`, `name` and `count` per author; use `id` as
+            `author_id=` to list that author's books.
+        """
+        limit = max(1, min(limit, MAX_FACETS))
+        rows = await self.authors.facets(prefix=prefix, is_borrowed=is_borrowed, limit=limit)
+        return [dict(row) for row in rows]
+
+    async def suggest(self, q: str, *, limit: int = 10) -> dict[str, list[dict[str, Any]]]:
+        """Complete a typed prefix to the most common titles and authors.
+
+        Answered from the per-worker suggest index when it is loaded (no
+        database access); otherwise from a grouped prefix query on titles
+        and the author facets.
+
+        Args:
+            q (str): Typed prefix (case- and spacing-insensitive).
+            limit (int): Maximum suggestions per field (clamped to 1-20).
+
+        Returns:
+            dict: `titles` and `authors`, each a list of `text` and `count`
+            (number of books), most books first.
+        """
+        limit = max(1, min(limit, MAX_SUGGESTIONS))
+        found = None
+        if self.suggest_index is not None:
+            found = self.suggest_index.suggest(q, limit)
+        if found is None:
+            prefix = " ".join(q.split())
+            if not prefix:
+                found = {"titles": [], "authors": []}
+            else:
+                titles = await self.repo.title_suggestions(prefix, limit)
+                authors = await self.authors.facets(prefix=prefix, limit=limit)
+                found = {
+                    "titles": [(row.title, row.count) for row in titles],
+                    "authors": [(row["name"], row["count"]) for row in authors],
+                }
+        return {
+            field: [{"text": text, "count": count} for text, count in values]
+            for field, values in found.items()
+        }
@@ -0,0 +1,199 @@
+"""Cross-branch queries: fan out to every branch shard and merge the results.
+
+Each branch is queried concurrently on its own read session (hence its own
+pool and database), in the requested order. The per-branch pages are merged
+with `heapq.merge`, so the combined page is in the global order
+(sort key, then serial number, then branch name) and totals are summed.
+Text keys are sorted by code point in every branch (see
+`app.repositories.books`), which is also how Python compares `str`, so the
+merge agrees with each branch's order whatever its database collation.
+
+Pagination:
+  - `offset` asks every branch for its first `offset + limit` rows, so it is
+    bounded by `MAX_FANOUT_WINDOW`; deeper pages need the cursor.
+  - A cross-branch cursor records, per branch, the keyset of the last row
+    taken from that branch. The next page continues each branch from its
+    own position, so every branch reads at most `limit` rows per page.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import heapq
+import json
+from functools import cmp_to_key
+from itertools import islice
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from app.common.exceptions import ValidationError
+from app.db.shards import ShardRouter
+from app.repositories.books import SORT_ORDERS, SortOrder, book_repository
+from app.schemas.books import BOOK_FIELDS
+from app.services.books import BookPage, check_listing, decode_cursor, encode_cursor
+
+MAX_FANOUT_WINDOW = 10_000
+
+
+def _merge_key(order: SortOrder) -> Callable[[dict[str, Any]], Any]:
+    """Key for merging rows of different branches in the order's global order."""
+    keys = (
+        (order.column, order.descending),
+        ("serial_number", order.serial_descending),
+        ("branch", False),
+    )
+
+    def compare(a: dict[str, Any], b: dict[str, Any]) -> int:
+        for name, descending in keys:
+            x, y = a[name], b[name]
+            if x != y:
+                return (1 if x < y else -1) if descending else (-1 if x < y else 1)
+        return 0
+
+    return cmp_to_key(compare)
+
+
+class BranchFanout:
+    """Read-only queries spanning every configured branch."""
+
+    def __init__(self, shards: ShardRouter, session_info: Optional[dict[str, Any]] = None) -> None:
+        """Bind the fan-out to the shard router.
+
+        Args:
+            shards (ShardRouter): Branch to session factory map.
+            session_info (Optional[dict]): `Session.info` of the request's own
+                session; copied into every branch session when it is opened,
+                so per-request options (the statement deadline) apply there too.
+        """
+        self.shards = shards
+        self.session_info = session_info
+
+    def _decode_positions(self, cursor: str, sort: str) -> dict[str, Tuple[Any, str]]:
+        """Decode a cross-branch cursor into per-branch keysets."""
+        try:
+            raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            cursor_sort, positions = raw["sort"], raw["after"]
+            if not isinstance(positions, dict):
+                raise TypeError
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise ValidationError("Invalid cursor.")
+        if cursor_sort != sort:
+            raise ValidationError("Cursor does not match the requested sort.")
+        if any(branch not in self.shards for branch in positions):
+            raise ValidationError("Invalid cursor.")
+        return {branch: decode_cursor(value, sort) for branch, value in positions.items()}
+
+    @staticmethod
+    def _encode_positions(sort: str, positions: dict[str, str]) -> str:
+        raw = json.dumps({"sort": sort, "after": positions}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+    async def _list_branch(
+        self,
+        branch: str,
+        *,
+        limit: int,
+        after: Optional[Tuple[Any, str]],
+        columns: Optional[Sequence[str]],
+        sort: str,
+        **filters: Any,
+    ) -> Tuple[list[dict[str, Any]], int]:
+        async with self.shards.sessionmaker(branch, read_only=True)() as session:
+            if self.session_info:
+                session.info.update(self.session_info)
+            items, total = await book_repository(session).list(
+                limit=limit, offset=0, columns=columns, sort=sort, after=after, **filters
+            )
+        if columns:
+            rows = [{**row, "branch": branch} for row in items]
+        else:
+            rows = [
+                {**{name: getattr(book, name) for name in BOOK_FIELDS}, "branch": branch}
+                for book in items
+            ]
+        return rows, total
+
+    async def list_books_page(
+        self,
+        *,
+        is_borrowed: Optional[bool] = None,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        fields: Optional[Sequence[str]] = None,
+        sort: Optional[str] = None,
+        cursor: Optional[str] = None,
+        author_id: Optional[int] = None,
+    ) -> BookPage:
+        """List books of all branches, like `BookService.list_books_page`.
+
+        Items are mappings carrying a `branch` key in addition to the book
+        fields (or the requested `fields`).
+
+        Raises:
+            ValidationError: On the arguments `BookService` rejects, an
+                invalid cross-branch cursor, `offset + limit` above
+                `MAX_FANOUT_WINDOW`, or an `author_id` (author ids are
+                assigned per branch database).
+        """
+        limit, offset, sort = check_listing(
+            is_borrowed=is_borrowed,
+            limit=limit,
+            offset=offset,
+            fields=fields,
+            sort=sort,
+            cursor=cursor,
+        )
+        if author_id is not None:
+            raise ValidationError("author_id is branch-specific and cannot be used with branch=*.")
+        window = offset + limit
+        if window > MAX_FANOUT_WINDOW:
+            raise ValidationError(
+                f"offset + limit may not exceed {MAX_FANOUT_WINDOW} across branches; use cursor."
+            )
+        positions = self._decode_positions(cursor, sort) if cursor is not None else {}
+        order = SORT_ORDERS[sort]
+        columns = None
+        if fields is not None:
+            # The merge (and the cursor) need the sort key and tiebreaker
+            columns = tuple(dict.fromkeys([*fields, order.column, "serial_number"]))
+
+        results = await asyncio.gather(
+            *(
+                self._list_branch(
+                    branch,
+                    limit=window,
+                    after=positions.get(branch),
+                    columns=columns,
+                    sort=sort,
+                    is_borrowed=is_borrowed,
+                    title=title,
+                    author=author,
+                )
+                for branch in self.shards.branches
+            )
+        )
+        merged = heapq.merge(*(rows for rows, _ in results), key=_merge_key(order))
+        taken = list(islice(merged, window))
+        total = sum(count for _, count in results)
+
+        next_cursor = None
+        if len(taken) == window:
+            last = {row["branch"]: row for row in taken}
+            after = {branch: encode_cursor(sort, row) for branch, row in last.items()}
+            # Branches not reached on this page keep their previous position
+            for branch in positions.keys() - after.keys():
+                after[branch] = encode_cursor(
+                    sort, dict(zip((order.column, "serial_number"), positions[branch]))
+                )
+            next_cursor = self._encode_positions(sort, after)
+
+        items = taken[offset:]
+        if fields is not None:
+            items = [
+                {"branch": row["branch"], **{name: row[name] for name in fields}} for row in items
+            ]
+        return BookPage(items, total, next_cursor)
@@ -0,0 +1,384 @@
+"""Per-worker columnar replica of the catalog for vectorized list and stats queries.
+
+The `books` table is mirrored into dense NumPy arrays indexed by the integer
+value of the serial number (serials are exactly six digits, so position `n`
+holds book `n`). Filters become boolean masks, the default listing order is a
+cached permutation, and counts/aggregates are array reductions, so
+`GET /books` (default sort, no cursor) and `GET /books/stats` are answered
+without a database round trip.
+
+Columns:
+  - `present`, `is_borrowed`: bool.
+  - `created_at`, `updated_at`, `borrowed_at`: int64 microseconds since the
+    epoch (`_NULL` for no value).
+  - `borrower_card`: int32 (-1 for none).
+  - `author_id`: int32 (the normalized author; exact `author_id=` filter).
+  - `title`, `author`: int32 codes into per-column dictionaries; substring
+    filters test each distinct value once and mask with `np.isin`.
+
+Freshness:
+  - Bootstrapped by streaming the whole table (server-side cursor).
+  - Every `CATALOG_REPLICA_REFRESH_S` the rows with `updated_at` at or after
+    the previous refresh's change horizon are applied. The horizon is the
+    start of the oldest transaction that was still open then (see
+    `BookRepository.change_horizon`), so rows of transactions that commit
+    long after they started are not missed.
+  - Every `CATALOG_REPLICA_RESYNC_S` the table is loaded again, which fixes
+    changes the horizon cannot account for (writes that leave `updated_at`
+    alone, transactions of roles hidden from `pg_stat_activity`). Queries use
+    the database while it loads.
+  - Deleted rows leave no trace to poll, so deletions are taken from the
+    serial index: after each refresh, books missing from its bitmap are
+    dropped. Rows written by that same refresh are kept, since the index may
+    not have heard of a new book yet (one NOTIFY behind the scan); if they
+    were deleted meanwhile, the next refresh drops them. The replica is only
+    used while the index is fresh.
+  - Lists may therefore lag writes by up to one refresh interval; when the
+    last refresh failed or is overdue, queries return None and callers fall
+    back to the database.
+
+Memory is about 42 MB per worker regardless of catalog size; NumPy is an
+optional dependency imported on first use.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from importlib import import_module
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Any, Optional, Sequence
+
+from app.db.session import scan_execution_options
+from app.repositories.books import book_repository
+from app.services.serial_index import SERIAL_SPACE, SerialIndex
+
+if TYPE_CHECKING:
+    import numpy as np
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+LOAD_BATCH = 10_000
+# A replica that missed this many refreshes in a row is not used
+MAX_MISSED_REFRESHES = 3
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NULL = -(2**63)
+
+
+def _micros(value: Optional[datetime]) -> int:
+    if value is None:
+        return _NULL
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _datetime(value: int) -> Optional[datetime]:
+    if value == _NULL:
+        return None
+    return _EPOCH + timedelta(microseconds=int(value))
+
+
+def numpy_available() -> bool:
+    """Whether the optional NumPy dependency is installed."""
+    return find_spec("numpy") is not None
+
+
+class _Dictionary:
+    """Append-only dictionary encoding of a text column."""
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self.folded: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+            self.folded.append(value.lower())
+        return code
+
+    def matching(self, needle: str) -> list[int]:
+        """Codes of the values containing `needle` (already lowercased)."""
+        return [code for code, value in enumerate(self.folded) if needle in value]
+
+
+class CatalogReplica:
+    """Columnar in-memory copy of `books`, refreshed incrementally by `updated_at`."""
+
+    def __init__(self, serial_index: SerialIndex) -> None:
+        self.serial_index = serial_index
+        self._np: Any = None
+        self._since: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self._loaded_at: Optional[float] = None
+        self._interval = 1.0
+        self._order: Optional[np.ndarray] = None
+        # Serials written by the current sync (one array per batch)
+        self._written: list[np.ndarray] = []
+
+    # --- state ---------------------------------------------------------------
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the replica is loaded, recently refreshed and tracking deletions."""
+        if self._refreshed_at is None or not self.serial_index.fresh:
+            return False
+        return time.monotonic() - self._refreshed_at <= self._interval * MAX_MISSED_REFRESHES
+
+    def _allocate(self) -> None:
+        np = self._np = import_module("numpy")
+        self._present = np.zeros(SERIAL_SPACE, dtype=bool)
+        self._is_borrowed = np.zeros(SERIAL_SPACE, dtype=bool)
+        self._created_at = np.full(SERIAL_SPACE, _NULL, dtype=np.int64)
+        self._updated_at = np.full(SERIAL_SPACE, _NULL, dtype=np.int64)
+        self._borrowed_at = np.full(SERIAL_SPACE, _NULL, dtype=np.int64)
+        self._borrower_card = np.full(SERIAL_SPACE, -1, dtype=np.int32)
+        self._title = np.zeros(SERIAL_SPACE, dtype=np.int32)
+        self._author = np.zeros(SERIAL_SPACE, dtype=np.int32)
+        self._author_id = np.zeros(SERIAL_SPACE, dtype=np.int32)
+        self._titles = _Dictionary()
+        self._authors = _Dictionary()
+        self._order = None
+        self._since = None
+
+    def _apply_rows(self, rows: Sequence[Any]) -> None:
+        """Upsert a batch of full `books` rows."""
+        if not rows:
+            return
+        np = self._np
+        n = len(rows)
+        serials = np.fromiter((int(r.serial_number) for r in rows), dtype=np.int64, count=n)
+        self._written.append(serials)
+        created = np.fromiter((_micros(r.created_at) for r in rows), dtype=np.int64, count=n)
+        # New books (or recreated ones) change the default order
+        if (~self._present[serials] | (self._created_at[serials] != created)).any():
+            self._order = None
+        self._present[serials] = True
+        self._created_at[serials] = created
+        self._updated_at[serials] = [_micros(r.updated_at) for r in rows]
+        self._is_borrowed[serials] = [r.is_borrowed for r in rows]
+        self._borrowed_at[serials] = [_micros(r.borrowed_at) for r in rows]
+        self._borrower_card[serials] = [
+            int(r.borrower_card) if r.borrower_card is not None else -1 for r in rows
+        ]
+        self._title[serials] = [self._titles.code(r.title) for r in rows]
+        self._author[serials] = [self._authors.code(r.author) for r in rows]
+        self._author_id[serials] = [r.author_id or 0 for r in rows]
+
+    def _apply_deletions(self) -> bool:
+        """Drop books the serial index no longer has; False if the index is stale.
+
+        Books written by this sync are kept even if the index lacks them.
+        """
+        bitmap = self.serial_index.bitmap()
+        if bitmap is None:
+            return False
+        np = self._np
+        exists = np.unpackbits(np.frombuffer(bitmap, dtype=np.uint8), bitorder="little")
+        gone = self._present & ~exists.view(bool)
+        for serials in self._written:
+            gone[serials] = False
+        self._present &= ~gone
+        return True
+
+    # --- lifecycle -----------------------------------------------------------
+
+    async def _load(self, session: AsyncSession) -> None:
+        self._refreshed_at = None  # queries use the database until loaded
+        repo = book_repository(session)
+        since = await repo.change_horizon()
+        self._allocate()
+        count = 0
+        try:
+            async for rows in repo.stream_catalog(batch_size=LOAD_BATCH):
+                self._apply_rows(rows)
+                count += len(rows)
+                await asyncio.sleep(0)  # let requests run between batches
+        except BaseException:
+            self._np = None  # partial snapshot; start over on the next sync
+            raise
+        self._since = since
+        self._loaded_at = time.monotonic()
+        logger.info("Catalog replica loaded (%d books)", count)
+
+    async def _refresh(self, session: AsyncSession) -> None:
+        repo = book_repository(session)
+        since = await repo.change_horizon()  # before the scan: covers what it misses
+        async for rows in repo.stream_catalog(since=self._since, batch_size=LOAD_BATCH):
+            self._apply_rows(rows)
+        self._since = since
+
+    async def sync(
+        self, sessionmaker: async_sessionmaker[AsyncSession], *, reload: bool = False
+    ) -> None:
+        """Load (first call, or `reload`) or refresh the replica once, then apply deletions."""
+        self._written = []
+        async with sessionmaker() as session:
+            await session.connection(
+                execution_options=scan_execution_options(session.get_bind().dialect.name)
+            )
+            try:
+                if self._np is None or reload:
+                    await self._load(session)
+                else:
+                    await self._refresh(session)
+            finally:
+                await session.rollback()
+        if self._apply_deletions():
+            self._refreshed_at = time.monotonic()
+
+    async def run(
+        self,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        interval: float,
+        resync_interval: float = 0.0,
+    ) -> None:
+        """Keep the replica current until cancelled.
+
+        Args:
+            sessionmaker (async_sessionmaker): Factory for the polling sessions.
+            interval (float): Seconds between refreshes.
+            resync_interval (float): Seconds between full reloads (0: never).
+        """
+        self._interval = interval
+        while True:
+            reload = (
+                resync_interval > 0
+                and self._loaded_at is not None
+                and time.monotonic() - self._loaded_at >= resync_interval
+            )
+            try:
+                await self.sync(sessionmaker, reload=reload)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Catalog replica refresh failed", exc_info=True)
+            await asyncio.sleep(interval)
+
+    # --- queries -------------------------------------------------------------
+
+    def _mask(
+        self,
+        is_borrowed: Optional[bool],
+        title: Optional[str],
+        author: Optional[str],
+        author_id: Optional[int] = None,
+    ) -> Optional[np.ndarray]:
+        """Boolean mask of the books matching the listing filters.
+
+        None when a filter cannot be evaluated exactly here: `ILIKE` treats
+        `%` and `_` in the pattern as wildcards.
+        """
+        np = self._np
+        mask = self._present.copy()
+        if is_borrowed is not None:
+            mask &= self._is_borrowed == is_borrowed
+        if author_id is not None:
+            mask &= self._author_id == author_id
+        for value, codes, dictionary in (
+            (title, self._title, self._titles),
+            (author, self._author, self._authors),
+        ):
+            if not value:
+                continue
+            needle = value.strip().lower()
+            if "%" in needle or "_" in needle:
+                return None
+            if needle:
+                mask &= np.isin(codes, dictionary.matching(needle))
+        return mask
+
+    def _default_order(self) -> np.ndarray:
+        """Serials of present books by `created_at DESC, serial_number ASC`."""
+        if self._order is None:
+            np = self._np
+            serials = np.flatnonzero(self._present)
+            self._order = serials[np.lexsort((serials, -self._created_at[serials]))]
+        return self._order
+
+    def _row(self, n: int) -> dict[str, Any]:
+        card = int(self._borrower_card[n])
+        return {
+            "serial_number": f"{n:06d}",
+            "title": self._titles.values[self._title[n]],
+            "author": self._authors.values[self._author[n]],
+            "author_id": int(self._author_id[n]) or None,
+            "is_borrowed": bool(self._is_borrowed[n]),
+            "borrowed_at": _datetime(self._borrowed_at[n]),
+            "borrower_card": f"{card:06d}" if card >= 0 else None,
+            "created_at": _datetime(self._created_at[n]),
+            "updated_at": _datetime(self._updated_at[n]),
+        }
+
+    def list(
+        self,
+        *,
+        is_borrowed: Optional[bool] = None,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        author_id: Optional[int] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> Optional[tuple[list[dict[str, Any]], int]]:
+        """Return a page in the default order and the total, or None to use the DB.
+
+        Filters behave like `BookRepository.list`.
+        """
+        if not self.fresh:
+            return None
+        mask = self._mask(is_borrowed, title, author, author_id)
+        if mask is None:
+            return None
+        order = self._default_order()
+        matched = order[mask[order]]
+        return [self._row(int(n)) for n in matched[offset : offset + limit]], len(matched)
+
+    def stats(
+        self,
+        *,
+        is_borrowed: Optional[bool] = None,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        author_id: Optional[int] = None,
+    ) -> Optional[dict[str, Any]]:
+        """Aggregate like `BookRepository.stats`, or None to use the DB."""
+        if not self.fresh:
+            return None
+        mask = self._mask(is_borrowed, title, author, author_id)
+        if mask is None:
+            return None
+        np = self._np
+        borrowed = mask & self._is_borrowed
+        borrowed_at = self._borrowed_at[borrowed]
+        return {
+            "total": int(np.count_nonzero(mask)),
+            "borrowed": int(np.count_nonzero(borrowed)),
+            "distinct_authors": int(np.unique(self._author_id[mask]).size),
+            "oldest_borrowed_at": _datetime(borrowed_at.min()) if borrowed_at.size else None,
+        }
+
+
+_catalog_replica: Optional[CatalogReplica] = None
+
+
+def get_catalog_replica() -> Optional[CatalogReplica]:
+    """Return this worker's catalog replica, or None if it was not started."""
+    return _catalog_replica
+
+
+def start_catalog_replica(
+    serial_index: SerialIndex,
+    sessionmaker: async_sessionmaker[AsyncSession],
+    interval: float,
+    resync_interval: float = 0.0,
+) -> asyncio.Task[None]:
+    """Create this worker's replica and start its refresh loop."""
+    global _catalog_replica
+    _catalog_replica = CatalogReplica(serial_index)
+    return asyncio.create_task(_catalog_replica.run(sessionmaker, interval, resync_interval))
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Sequence
+
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.common.exceptions import ValidationError
+from app.repositories.inventory import InventoryRepository
+from app.schemas.inventory import AuditFinding, AuditSummary
+
+# One entry per possible serial number, with headroom for duplicate scans
+MAX_AUDIT_SCANS = 2_000_000
+
+FINDINGS = ("missing", "unknown", "borrowed_on_shelf")
+
+
+@dataclass
+class AuditReport:
+    """Outcome of reconciling a shelf scan against the catalog.
+
+    Attributes:
+        scanned (int): Number of scans submitted (including duplicates).
+        distinct (int): Number of distinct serials scanned.
+        findings (list[RowMapping]): Discrepancies, ordered by kind then serial.
+    """
+
+    scanned: int
+    distinct: int
+    findings: list[RowMapping] = field(default_factory=list)
+
+    def summary(self) -> dict[str, int]:
+        """Return scan totals and the number of findings of each kind."""
+        counts = Counter(row["finding"] for row in self.findings)
+        return {
+            "scanned": self.scanned,
+            "distinct": self.distinct,
+            **{kind: counts.get(kind, 0) for kind in FINDINGS},
+        }
+
+
+def report_lines(report: AuditReport) -> Iterator[bytes]:
+    """Yield the report as NDJSON: one finding per line, then the summary."""
+    for row in report.findings:
+        finding = AuditFinding.model_validate(dict(row)).model_dump(mode="json", exclude_none=True)
+        yield json.dumps(finding, separators=(",", ":")).encode() + b"\n"
+    summary = AuditSummary(**report.summary()).model_dump(mode="json")
+    yield json.dumps({"summary": summary}, separators=(",", ":")).encode() + b"\n"
+
+
+class InventoryService:
+    """Stocktake reconciliation. Stateless; operates per-session."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+        self.repo = InventoryRepository(session)
+
+    async def audit(self, serial_numbers: Sequence[str]) -> AuditReport:
+        """Compare scanned serials with the catalog in one set-based pass.
+
+        Blank scans are ignored and duplicates collapsed; malformed serials
+        are reported as unknown. Nothing is modified.
+
+        Raises:
+            ValidationError: If more than `MAX_AUDIT_SCANS` scans are sent.
+        """
+        if len(serial_numbers) > MAX_AUDIT_SCANS:
+            raise ValidationError(f"At most {MAX_AUDIT_SCANS} scans can be audited at once.")
+        distinct = list(dict.fromkeys(_clean(serial_numbers)))
+        try:
+            await self.repo.load_scans(distinct)
+            findings = list(await self.repo.findings())
+        finally:
+            # Drops the temporary table (ON COMMIT DROP)
+            await self.session.rollback()
+        return AuditReport(scanned=len(serial_numbers), distinct=len(distinct), findings=findings)
+
+
+def _clean(serial_numbers: Iterable[str]) -> Iterable[str]:
+    """Strip whitespace from scans and skip empty ones."""
+    for serial in serial_numbers:
+        serial = serial.strip()
+        if serial:
+            yield serial
@@ -0,0 +1,311 @@
+"""Runs queued background jobs (see `app.services.jobs`).
+
+Usage:
+    python -m app.services.job_runner [--concurrency N]
+
+Every API worker runs one `JobRunner` in its lifespan when
+`JOB_CONCURRENCY` > 0. With `JOB_CONCURRENCY=0` the API only queues jobs
+and this module runs them in a process of its own, which keeps their CPU
+time off the API workers' event loops as well.
+
+A runner polls the queue of every branch in turn and claims jobs with
+`FOR UPDATE SKIP LOCKED`, so any number of runners share the queues. It
+runs at most `concurrency` jobs at once, on its own engines of
+`2 * concurrency + 1` connections per branch: each running job holds one
+for its work and needs one at a time for its progress writes, and the last
+one polls, heartbeats and maintains. Background work therefore never takes
+connections from the request pools, and progress writes of different jobs
+never queue behind each other.
+
+Liveness: the runner refreshes `heartbeat_at` of its jobs every quarter of
+`JOB_STALE_AFTER_S`. Jobs of a runner that stopped (crash, lost connection)
+are queued again by whichever runner notices first, up to
+`JOB_MAX_ATTEMPTS` starts; on a clean shutdown its jobs are queued again
+at once. Finished jobs are deleted after `JOB_RETENTION_HOURS`.
+
+Runners also create the upcoming `loans` partitions of each branch
+(`app.db.partitions`) on the same maintenance pass, so a long-running
+deployment never reaches a month without one.
+"""
+
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import time
+import zlib
+from functools import lru_cache
+from typing import Any, Mapping, Optional, Sequence
+
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.partitions import ensure_loan_partitions
+from app.db.session import _make_engine, _read_execution_options, defer_local_statement_timeout
+from app.db.shards import get_shard_router
+from app.repositories.jobs import JobRepository
+from app.services.jobs import HANDLERS
+
+logger = logging.getLogger(__name__)
+
+# Progress is written at most this often per job (the last update always is)
+PROGRESS_INTERVAL_S = 1.0
+RESULT_GZIP_LEVEL = 6
+
+
+class _JobLost(Exception):
+    """The job was queued again (missed heartbeats) and belongs to another runner."""
+
+
+class JobRunner:
+    """Claims and runs background jobs of every branch.
+
+    Args:
+        urls (Mapping[str, str]): Async DSN per branch.
+        concurrency (int): Most jobs run at once.
+        poll_interval_s (float): Pause after finding every queue empty.
+        stale_after_s (float): Heartbeat age after which a running job is
+            considered lost.
+        max_attempts (int): Starts after which a lost job is failed instead.
+        retention_s (float): Age of finished jobs to delete.
+        statement_timeout_ms (int): Statement deadline inside jobs (0: none).
+    """
+
+    def __init__(
+        self,
+        urls: Mapping[str, str],
+        *,
+        concurrency: int,
+        poll_interval_s: float,
+        stale_after_s: float,
+        max_attempts: int,
+        retention_s: float,
+        statement_timeout_ms: int = 0,
+    ) -> None:
+        self._urls = dict(urls)
+        self.concurrency = concurrency
+        self.poll_interval_s = poll_interval_s
+        self.stale_after_s = stale_after_s
+        self.max_attempts = max_attempts
+        self.retention_s = retention_s
+        self.statement_timeout_ms = statement_timeout_ms
+        self._wakeup = asyncio.Event()
+        self._engines: dict[str, AsyncEngine] = {}
+        self._sessionmakers: dict[tuple[str, bool], async_sessionmaker[AsyncSession]] = {}
+        self._active: set[tuple[str, int]] = set()
+        self._maintained_at: dict[str, float] = {}
+        self._next_branch = 0
+
+    def wake(self) -> None:
+        """Poll the queues now (a job was just queued by this process)."""
+        self._wakeup.set()
+
+    def _sessionmaker(self, branch: str, *, read_only: bool = False) -> async_sessionmaker[AsyncSession]:
+        factory = self._sessionmakers.get((branch, read_only))
+        if factory is None:
+            engine = self._engines.get(branch)
+            if engine is None:
+                engine = self._engines[branch] = _make_engine(
+                    self._urls[branch], pool_size=2 * self.concurrency + 1, max_overflow=0
+                )
+            if read_only:
+                engine = engine.execution_options(
+                    **_read_execution_options("read_only", engine.dialect.name)
+                )
+            factory = self._sessionmakers[(branch, read_only)] = async_sessionmaker(
+                bind=engine, class_=AsyncSession, expire_on_commit=False
+            )
+        return factory
+
+    async def run(self) -> None:
+        """Run jobs until cancelled; jobs still running are then queued again."""
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks: set[asyncio.Task[None]] = set()
+
+        def finished(task: asyncio.Task[None]) -> None:
+            tasks.discard(task)
+            slots.release()
+
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            while True:
+                await slots.acquire()
+                self._wakeup.clear()
+                claimed = await self._claim_next()
+                if claimed is None:
+                    slots.release()
+                    with contextlib.suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_interval_s)
+                    continue
+                task = asyncio.create_task(self._execute(*claimed))
+                tasks.add(task)
+                task.add_done_callback(finished)
+        finally:
+            heartbeat.cancel()
+            interrupted = list(self._active)
+            for task in list(tasks):
+                task.cancel()
+            await asyncio.gather(heartbeat, *tasks, return_exceptions=True)
+            await self._requeue(interrupted)
+            for engine in self._engines.values():
+                await engine.dispose()
+            self._engines.clear()
+            self._sessionmakers.clear()
+
+    async def _claim_next(self) -> Optional[tuple[str, RowMapping]]:
+        """Claim a job from the branches in turn; None if every queue is empty."""
+        branches = list(self._urls)
+        for i in range(len(branches)):
+            branch = branches[(self._next_branch + i) % len(branches)]
+            try:
+                await self._maintain(branch)
+                async with self._sessionmaker(branch)() as session:
+                    job = await JobRepository(session).claim()
+                    await session.commit()
+            except Exception:
+                logger.warning("Polling the job queue of branch %s failed", branch, exc_info=True)
+                continue
+            if job is not None:
+                self._next_branch = (self._next_branch + i + 1) % len(branches)
+                return branch, job
+        return None
+
+    async def _maintain(self, branch: str) -> None:
+        """Re-queue lost jobs, purge old ones and add `loans` partitions, every half stale period."""
+        now = time.monotonic()
+        if now - self._maintained_at.get(branch, float("-inf")) < self.stale_after_s / 2:
+            return
+        self._maintained_at[branch] = now
+        async with self._sessionmaker(branch)() as session:
+            repo = JobRepository(session)
+            stale = await repo.requeue_stale(self.stale_after_s, self.max_attempts)
+            purged = await repo.purge(self.retention_s)
+            await session.commit()
+        if stale:
+            logger.warning("Re-queued %d job(s) of lost runners on branch %s", stale, branch)
+        if purged:
+            logger.info("Purged %d finished job(s) on branch %s", purged, branch)
+        try:
+            async with self._sessionmaker(branch)() as session:
+                connection = await session.connection()
+                created = await connection.run_sync(ensure_loan_partitions)
+                await session.commit()
+        except Exception:
+            logger.warning("Creating loans partitions on branch %s failed", branch, exc_info=True)
+        else:
+            if created:
+                logger.info("Created loans partitions %s on branch %s", ", ".join(created), branch)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.stale_after_s / 4)
+            by_branch: dict[str, list[int]] = {}
+            for branch, job_id in self._active:
+                by_branch.setdefault(branch, []).append(job_id)
+            for branch, job_ids in by_branch.items():
+                try:
+                    async with self._sessionmaker(branch)() as session:
+                        await JobRepository(session).heartbeat(job_ids)
+                        await session.commit()
+                except Exception:
+                    logger.warning("Job heartbeat on branch %s failed", branch, exc_info=True)
+
+    async def _requeue(self, jobs: list[tuple[str, int]]) -> None:
+        for branch in {branch for branch, _ in jobs}:
+            try:
+                async with self._sessionmaker(branch)() as session:
+                    await JobRepository(session).requeue([i for b, i in jobs if b == branch])
+                    await session.commit()
+            except Exception:
+                logger.warning("Could not re-queue interrupted jobs on branch %s", branch, exc_info=True)
+
+    async def _record(self, branch: str, method: str, *args: Any) -> bool:
+        """Call a `JobRepository` update in its own transaction (its own connection)."""
+        async with self._sessionmaker(branch)() as session:
+            applied = await getattr(JobRepository(session), method)(*args)
+            await session.commit()
+        return applied
+
+    async def _execute(self, branch: str, job: RowMapping) -> None:
+        job_id = job["id"]
+        handler = HANDLERS[job["kind"]]
+        key = (branch, job_id)
+        self._active.add(key)
+        reported_at = float("-inf")
+
+        async def progress(done: int, total: Optional[int]) -> None:
+            nonlocal reported_at
+            now = time.monotonic()
+            if now - reported_at < PROGRESS_INTERVAL_S and done != total:
+                return
+            reported_at = now
+            if not await self._record(branch, "progress", job_id, done, total):
+                raise _JobLost()
+
+        logger.info("Running %s job %d on branch %s", job["kind"], job_id, branch)
+        compressor = zlib.compressobj(RESULT_GZIP_LEVEL, zlib.DEFLATED, 31)  # gzip container
+        chunks: list[bytes] = []
+        try:
+            async with self._sessionmaker(branch, read_only=handler.read_only)() as session:
+                defer_local_statement_timeout(session, self.statement_timeout_ms)
+                async for line in handler.run(session, branch, job["params"], progress):
+                    chunks.append(compressor.compress(line))
+            chunks.append(compressor.flush())
+            if not await self._record(branch, "succeed", job_id, b"".join(chunks)):
+                raise _JobLost()
+            logger.info("Job %d on branch %s succeeded", job_id, branch)
+        except _JobLost:
+            logger.warning("Job %d on branch %s was taken over by another runner", job_id, branch)
+        except Exception as exc:
+            logger.warning("Job %d on branch %s failed", job_id, branch, exc_info=True)
+            # Domain errors carry a message for the client; others stay in the log
+            error = getattr(exc, "message", None) or "The job failed unexpectedly."
+            with contextlib.suppress(Exception):
+                await self._record(branch, "fail", job_id, error)
+        finally:
+            self._active.discard(key)
+
+
+def _make_runner(concurrency: int) -> JobRunner:
+    settings = get_settings()
+    router = get_shard_router()
+    return JobRunner(
+        {branch: router.url(branch) for branch in router.branches},
+        concurrency=concurrency,
+        poll_interval_s=settings.JOB_POLL_INTERVAL_S,
+        stale_after_s=settings.JOB_STALE_AFTER_S,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        retention_s=settings.JOB_RETENTION_HOURS * 3600,
+        statement_timeout_ms=settings.JOB_STATEMENT_TIMEOUT_MS,
+    )
+
+
+@lru_cache
+def get_job_runner() -> Optional[JobRunner]:
+    """Return this worker's in-process runner, or None if `JOB_CONCURRENCY` is 0."""
+    concurrency = get_settings().JOB_CONCURRENCY
+    return _make_runner(concurrency) if concurrency > 0 else None
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """CLI entry point: run jobs of every branch until interrupted."""
+    parser = argparse.ArgumentParser(description="Run queued background jobs.")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="jobs run at once (default: JOB_CONCURRENCY, at least 1)",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=get_settings().LOG_LEVEL, format="[jobs] %(message)s")
+    concurrency = args.concurrency or max(get_settings().JOB_CONCURRENCY, 1)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_make_runner(concurrency).run())
+
+
+if __name__ == "__main__":
+    main()
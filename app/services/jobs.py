@@ -0,0 +1,185 @@
+"""Background jobs: enqueueing, status, results and the job kinds.
+
+A job is queued in its branch's `jobs` table and answered at once with its
+id; a runner (`app.services.job_runner`) claims it, runs its handler on a
+connection pool of its own and stores the NDJSON result, gzip-compressed.
+Clients poll `GET /jobs/{id}` for status and progress, then download
+`GET /jobs/{id}/result`.
+
+Kinds:
+    - `audit`: `InventoryService.audit` of the scanned serials; the result
+      has the lines of `POST /inventory/audit`.
+    - `export`: every book of the branch, one `BookRead` per line.
+    - `import`: books with caller-chosen serials, added in transactions of
+      `MAX_ALLOCATION`; one `{"serial_number", "created"}` line per item,
+      `created` false when the serial was already in use.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional, Sequence
+
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.common.exceptions import Conflict, NotFound, ValidationError
+from app.db.shards import DEFAULT_BRANCH
+from app.repositories.books import book_repository
+from app.repositories.jobs import JobRepository
+from app.schemas.books import BookCreate, BookRead
+from app.services.books import MAX_ALLOCATION, BookService
+from app.services.inventory import MAX_AUDIT_SCANS, InventoryService, report_lines
+from app.services.serial_index import get_serial_index
+from app.services.suggest_index import get_suggest_index
+
+if TYPE_CHECKING:
+    from app.services.job_runner import JobRunner
+
+# Rows per round trip of an export; each batch is encoded between yields
+# to the event loop, so this also bounds how long one step holds the loop
+EXPORT_BATCH = 1000
+
+# `progress(done, total)`: reported by handlers, stored by the runner
+Progress = Callable[[int, Optional[int]], Awaitable[None]]
+
+
+class JobHandler(NamedTuple):
+    """How a runner executes one kind of job.
+
+    Attributes:
+        run (Callable): `run(session, branch, params, progress)`, an async
+            iterator of NDJSON lines forming the result.
+        read_only (bool): Run on a query session (no write lock on SQLite).
+    """
+
+    run: Callable[[AsyncSession, str, dict[str, Any], Progress], AsyncIterator[bytes]]
+    read_only: bool
+
+
+def _line(item: dict[str, Any]) -> bytes:
+    return json.dumps(item, separators=(",", ":")).encode() + b"\n"
+
+
+async def _audit(
+    session: AsyncSession, branch: str, params: dict[str, Any], progress: Progress
+) -> AsyncIterator[bytes]:
+    serials = params["serials"]
+    await progress(0, len(serials))
+    report = await InventoryService(session).audit(serials)
+    await progress(len(serials), len(serials))
+    for line in report_lines(report):
+        yield line
+
+
+async def _export(
+    session: AsyncSession, branch: str, params: dict[str, Any], progress: Progress
+) -> AsyncIterator[bytes]:
+    repo = book_repository(session)
+    total = (await repo.stats())["total"]
+    await progress(0, total)
+    done = 0
+    async for batch in repo.stream_catalog(batch_size=EXPORT_BATCH):
+        for row in batch:
+            yield BookRead.model_validate(dict(row._mapping)).model_dump_json().encode() + b"\n"
+        done += len(batch)
+        await progress(done, total)
+        await asyncio.sleep(0)
+
+
+async def _import(
+    session: AsyncSession, branch: str, params: dict[str, Any], progress: Progress
+) -> AsyncIterator[bytes]:
+    items = [BookCreate.model_validate(item) for item in params["items"]]
+    if branch == DEFAULT_BRANCH:
+        service = BookService(
+            session, serial_index=get_serial_index(), suggest_index=get_suggest_index()
+        )
+    else:
+        service = BookService(session)
+    seen: set[str] = set()
+    await progress(0, len(items))
+    for start in range(0, len(items), MAX_ALLOCATION):
+        chunk = items[start:start + MAX_ALLOCATION]
+        created = {book.serial_number for book in await service.import_books(chunk)}
+        for item in chunk:
+            serial = item.serial_number
+            yield _line({"serial_number": serial, "created": serial in created and serial not in seen})
+            seen.add(serial)
+        await progress(start + len(chunk), len(items))
+        await asyncio.sleep(0)
+
+
+HANDLERS: dict[str, JobHandler] = {
+    "audit": JobHandler(_audit, read_only=False),
+    "export": JobHandler(_export, read_only=True),
+    "import": JobHandler(_import, read_only=False),
+}
+
+
+class JobService:
+    """Queue and inspect background jobs. Stateless; operates per-session.
+
+    Args:
+        session (AsyncSession): Command session of the job's branch.
+        runner (Optional[JobRunner]): This worker's runner, woken when a job
+            is queued so it does not wait for its next poll.
+    """
+
+    def __init__(self, session: AsyncSession, runner: Optional[JobRunner] = None) -> None:
+        self.session = session
+        self.repo = JobRepository(session)
+        self.runner = runner
+
+    async def _enqueue(self, kind: str, params: dict[str, Any]) -> RowMapping:
+        job = await self.repo.enqueue(kind, params)
+        await self.session.commit()
+        if self.runner is not None:
+            self.runner.wake()
+        return job
+
+    async def enqueue_audit(self, serials: Sequence[str]) -> RowMapping:
+        """Queue an inventory audit of the scanned serials.
+
+        Raises:
+            ValidationError: If more than `MAX_AUDIT_SCANS` scans are sent.
+        """
+        if len(serials) > MAX_AUDIT_SCANS:
+            raise ValidationError(f"At most {MAX_AUDIT_SCANS} scans can be audited at once.")
+        return await self._enqueue("audit", {"serials": list(serials)})
+
+    async def enqueue_export(self) -> RowMapping:
+        """Queue an export of every book."""
+        return await self._enqueue("export", {})
+
+    async def enqueue_import(self, items: Sequence[BookCreate]) -> RowMapping:
+        """Queue an import of books with the given serials."""
+        return await self._enqueue("import", {"items": [item.model_dump() for item in items]})
+
+    async def get_job(self, job_id: int) -> RowMapping:
+        """Return a job's state and progress.
+
+        Raises:
+            NotFound: If there is no such job (or it was purged).
+        """
+        job = await self.repo.get(job_id)
+        if job is None:
+            raise NotFound("Job not found.")
+        return job
+
+    async def get_result(self, job_id: int) -> bytes:
+        """Return a succeeded job's result (gzip-compressed NDJSON).
+
+        Raises:
+            NotFound: If there is no such job (or it was purged).
+            Conflict: If the job has not succeeded (yet).
+        """
+        job = await self.repo.get_result(job_id)
+        if job is None:
+            raise NotFound("Job not found.")
+        if job["status"] != "succeeded":
+            raise Conflict(f"Job is {job['status']}; it has no result.")
+        return job["result"]
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.common.exceptions import ValidationError
+from app.models.loan import Loan
+from app.repositories.loans import loan_repository
+from app.schemas.books import SIX_DIGIT_RE
+
+MAX_HISTORY_PAGE = 200
+
+
+class LoanPage(NamedTuple):
+    """One page of a loan history.
+
+    Attributes:
+        items (list[Loan]): Ledger rows, newest first.
+        next_cursor (Optional[str]): Cursor for the following page, None when
+            this page was not full.
+    """
+
+    items: list[Loan]
+    next_cursor: Optional[str]
+
+
+def _encode_cursor(last: Loan) -> str:
+    raw = json.dumps([last.occurred_at.isoformat(), last.id])
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        occurred_at, loan_id = json.loads(raw)
+        if not isinstance(loan_id, int):
+            raise TypeError
+        return datetime.fromisoformat(occurred_at), loan_id
+    except (binascii.Error, ValueError, TypeError):
+        raise ValidationError("Invalid cursor.")
+
+
+class LoanService:
+    """Circulation history queries. Stateless; operates per-session."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+        self.repo = loan_repository(session)
+
+    async def history(
+        self,
+        *,
+        serial_number: Optional[str] = None,
+        borrower_card: Optional[str] = None,
+        limit: int = 50,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+    ) -> LoanPage:
+        """Return a page of one book's or one card's borrows and returns, newest first.
+
+        Removed books keep their history; an unknown book or card simply
+        has none.
+
+        Raises:
+            ValidationError: On a malformed serial or card, naive or inverted
+                `since`/`until`, or an invalid cursor.
+        """
+        key = serial_number if serial_number is not None else borrower_card
+        if key is None or not SIX_DIGIT_RE.fullmatch(key):
+            raise ValidationError("serial_number and borrower_card must be exactly six digits.")
+        for bound in (since, until):
+            if bound is not None and bound.tzinfo is None:
+                raise ValidationError("since and until must include a timezone.")
+        if since is not None and until is not None and since >= until:
+            raise ValidationError("since must be earlier than until.")
+        limit = max(1, min(limit, MAX_HISTORY_PAGE))
+        items = await self.repo.history(
+            serial_number=serial_number,
+            borrower_card=borrower_card,
+            limit=limit,
+            since=since,
+            until=until,
+            after=_decode_cursor(cursor) if cursor is not None else None,
+        )
+        return LoanPage(items, _encode_cursor(items[-1]) if len(items) == limit else None)
@@ -0,0 +1,203 @@
+"""Per-worker exact membership index of existing serial numbers.
+
+Serial numbers are exactly six digits, so one bit per possible serial
+(1,000,000 bits = 125 KB) tells whether a book exists, as of the last
+notification received. `BookService` consults it on reads, to skip the
+database for serials that do not exist (batch gets) and to suggest free
+serials. Commands do not: the bitmap lags writes of other workers by one
+NOTIFY, so they rely on the statement they run anyway.
+
+Freshness:
+  - Bootstrapped by streaming `SELECT serial_number FROM books` on a
+    dedicated asyncpg connection that also `LISTEN`s on `SERIAL_CHANNEL`.
+  - Triggers on `books` send a `NOTIFY` for every inserted or deleted row
+    (delivered on commit), so all workers apply each change whoever made it
+    (API, background jobs, `psql`); a worker's own `BookService` writes are
+    also applied locally right away.
+  - Notifications received while (re)loading are buffered and replayed.
+  - If the listener connection drops, the index is marked stale and
+    `contains()` / `free()` return None until it has reconnected and
+    reloaded; callers then fall back to the database.
+
+The same bitmap doubles as a free list: `free()` scans for clear bits,
+skipping fully used bytes with a C-level regex search.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy.engine import make_url
+
+from app.models.book import SERIAL_CHANNEL
+
+if TYPE_CHECKING:
+    import asyncpg
+
+logger = logging.getLogger(__name__)
+
+SERIAL_SPACE = 1_000_000
+LOAD_PREFETCH = 10_000
+MAX_RETRY_DELAY_S = 10.0
+
+# Any byte with at least one clear bit (i.e. a free serial among its eight)
+_NOT_FULL = re.compile(rb"[^\xff]")
+
+
+class SerialIndex:
+    """Bitmap of existing serial numbers, kept current via LISTEN/NOTIFY."""
+
+    def __init__(self) -> None:
+        self._bits = bytearray(SERIAL_SPACE // 8)
+        self._fresh = False
+        self._buffer: Optional[list[str]] = None
+
+    # --- membership ----------------------------------------------------------
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the bitmap is loaded and receiving change notifications."""
+        return self._fresh
+
+    @staticmethod
+    def _set(bits: bytearray, serial_number: str, present: bool) -> None:
+        n = int(serial_number)
+        if present:
+            bits[n >> 3] |= 1 << (n & 7)
+        else:
+            bits[n >> 3] &= ~(1 << (n & 7)) & 0xFF
+
+    def contains(self, serial_number: str) -> Optional[bool]:
+        """Return whether a serial exists, or None if the index is stale.
+
+        Non-six-digit input can never exist and returns False.
+        """
+        if not self._fresh:
+            return None
+        if len(serial_number) != 6 or not serial_number.isdigit():
+            return False
+        n = int(serial_number)
+        return bool(self._bits[n >> 3] & (1 << (n & 7)))
+
+    def bitmap(self) -> Optional[bytes]:
+        """Return a copy of the bitmap (bit `n & 7` of byte `n >> 3`), or None if stale."""
+        if not self._fresh:
+            return None
+        return bytes(self._bits)
+
+    def add(self, serial_number: str) -> None:
+        """Record a committed insert made by this worker."""
+        self._set(self._bits, serial_number, True)
+
+    def discard(self, serial_number: str) -> None:
+        """Record a committed delete made by this worker."""
+        self._set(self._bits, serial_number, False)
+
+    def free(self, count: int, lo: int = 0, hi: int = SERIAL_SPACE - 1) -> Optional[list[str]]:
+        """Return the lowest `count` unused serials in `[lo, hi]`, or None if stale.
+
+        Serials committed by other workers since the last notification may
+        still be reported free; allocators must tolerate a lost race.
+        """
+        if not self._fresh:
+            return None
+        bits = self._bits
+        found: list[str] = []
+        n = lo
+        while n <= hi and len(found) < count:
+            byte = bits[n >> 3]
+            if byte == 0xFF:
+                match = _NOT_FULL.search(bits, (n >> 3) + 1, (hi >> 3) + 1)
+                if match is None:
+                    break
+                n = match.start() << 3
+                continue
+            if not byte & (1 << (n & 7)):
+                found.append(f"{n:06d}")
+            n += 1
+        return found
+
+    # --- notifications -------------------------------------------------------
+
+    def _apply(self, bits: bytearray, payload: str) -> None:
+        """Apply a `+NNNNNN` / `-NNNNNN` notification payload."""
+        op, serial_number = payload[:1], payload[1:]
+        if op in "+-" and len(serial_number) == 6 and serial_number.isdigit():
+            self._set(bits, serial_number, op == "+")
+
+    def _on_notify(self, _conn: object, _pid: int, _channel: str, payload: str) -> None:
+        if self._buffer is not None:
+            self._buffer.append(payload)
+        else:
+            self._apply(self._bits, payload)
+
+    # --- lifecycle -----------------------------------------------------------
+
+    async def _load(self, conn: asyncpg.Connection) -> None:
+        """Stream all serials into a new bitmap, then swap it in."""
+        bits = bytearray(SERIAL_SPACE // 8)
+        count = 0
+        async with conn.transaction(readonly=True):
+            async for record in conn.cursor(
+                "SELECT serial_number FROM books", prefetch=LOAD_PREFETCH
+            ):
+                self._set(bits, record[0], True)
+                count += 1
+        for payload in self._buffer or ():
+            self._apply(bits, payload)
+        self._bits = bits
+        self._buffer = None
+        logger.info("Serial index loaded (%d books)", count)
+
+    async def run(self, database_url: str) -> None:
+        """Keep the index loaded and subscribed; reconnect with backoff.
+
+        Runs until cancelled (normally for the application's lifetime).
+
+        Args:
+            database_url (str): SQLAlchemy DSN reaching Postgres directly
+                (LISTEN does not work through transaction-mode pgbouncer).
+        """
+        import asyncpg
+
+        dsn = make_url(database_url).set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        delay = 0.5
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(dsn)
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _: lost.set())
+                # Subscribe before loading so no change falls in between
+                self._buffer = []
+                await conn.add_listener(SERIAL_CHANNEL, self._on_notify)
+                await self._load(conn)
+                self._fresh = True
+                delay = 0.5
+                await lost.wait()
+                logger.warning("Serial index listener connection lost")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Serial index unavailable; retrying in %.1fs", delay, exc_info=True)
+            finally:
+                self._fresh = False
+                self._buffer = None
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY_S)
+
+
+_serial_index = SerialIndex()
+
+
+def get_serial_index() -> SerialIndex:
+    """Return this worker's serial index."""
+    return _serial_index
@@ -0,0 +1,139 @@
+"""Per-worker group commit for borrow and return requests.
+
+Each borrow or return normally runs its own transaction, so at peak every
+request pays a COMMIT and its WAL flush. With `STATUS_BATCH_WINDOW_MS` set,
+`BookService.borrow_book` / `return_book` hand the change to this worker's
+`StatusBatcher` instead. It collects the changes that arrive within the
+window and applies them with `BookService.apply_status_changes` in one
+transaction and one commit. Then it resolves each caller with its own
+outcome: the book, or the `NotFound` / `Conflict` the change raised alone.
+
+Changes that arrive while a batch is committing form the next batch, which
+starts as soon as the commit returns, so the batches grow with load. A
+failure of the whole transaction (connection loss, timeout) is raised to
+every caller in that batch, and none of its changes is applied.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Optional
+
+from app.core.config import get_settings
+from app.db.shards import get_shard_router
+from app.services.books import BookService, StatusChange
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from app.models.book import Book
+
+logger = logging.getLogger(__name__)
+
+
+class StatusBatcher:
+    """Coalesces one worker's borrow/return requests into shared transactions.
+
+    Args:
+        sessionmaker (async_sessionmaker): Command sessions of the branch.
+        window_s (float): How long the first change of a batch waits for
+            others.
+        max_batch (int): Most changes applied in one transaction.
+        max_loans_per_card (int): Per-card loan limit (0: none).
+    """
+
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        *,
+        window_s: float,
+        max_batch: int,
+        max_loans_per_card: int = 0,
+    ) -> None:
+        self._sessionmaker = sessionmaker
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self.max_loans_per_card = max_loans_per_card
+        self._queue: list[tuple[StatusChange, asyncio.Future[Book]]] = []
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def submit(self, change: StatusChange) -> Book:
+        """Queue a change and wait for its outcome.
+
+        Returns:
+            Book: The book after the change (detached from any session).
+
+        Raises:
+            NotFound: If the book does not exist.
+            Conflict: If the change is not allowed in the book's state at
+                its turn in the batch, or the card is at its loan limit.
+        """
+        future: asyncio.Future[Book] = asyncio.get_running_loop().create_future()
+        self._queue.append((change, future))
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return await future
+
+    async def _run(self) -> None:
+        try:
+            if len(self._queue) < self.max_batch:
+                await asyncio.sleep(self.window_s)
+            while self._queue:
+                batch = self._queue[: self.max_batch]
+                del self._queue[: self.max_batch]
+                await self._apply(batch)
+        except BaseException:
+            for _, future in self._queue:
+                future.cancel()
+            self._queue.clear()
+            raise
+        finally:
+            self._task = None
+
+    async def _apply(self, batch: list[tuple[StatusChange, asyncio.Future[Book]]]) -> None:
+        # Callers that went away are dropped before the transaction starts
+        batch = [(change, future) for change, future in batch if not future.done()]
+        if not batch:
+            return
+        try:
+            async with self._sessionmaker() as session:
+                service = BookService(session, max_loans_per_card=self.max_loans_per_card)
+                outcomes = await service.apply_status_changes([change for change, _ in batch])
+        except Exception as exc:
+            logger.warning("Status batch of %d changes failed", len(batch), exc_info=True)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        except BaseException:
+            for _, future in batch:
+                future.cancel()
+            raise
+        for (_, future), outcome in zip(batch, outcomes):
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+
+_batchers: dict[str, StatusBatcher] = {}
+
+
+def get_status_batcher(branch: str) -> Optional[StatusBatcher]:
+    """Return this worker's batcher for a branch, or None if group commit is off."""
+    settings = get_settings()
+    if settings.STATUS_BATCH_WINDOW_MS <= 0:
+        return None
+    batcher = _batchers.get(branch)
+    if batcher is None:
+        batcher = _batchers[branch] = StatusBatcher(
+            get_shard_router().sessionmaker(branch),
+            window_s=settings.STATUS_BATCH_WINDOW_MS / 1000,
+            max_batch=settings.STATUS_BATCH_MAX,
+            max_loans_per_card=settings.MAX_LOANS_PER_CARD,
+        )
+    return batcher
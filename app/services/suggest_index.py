@@ -0,0 +1,373 @@
+"""Per-worker prefix index of titles and authors for autocomplete.
+
+Each field keeps its distinct values folded with `author_key` (NFKC,
+case-folded, single spaces; titles are folded the same way) in a sorted
+list. A query bisects to the prefix range and takes the most frequent
+values in it, so `GET /books/suggest` is answered from memory in
+microseconds. Results are cached per prefix; a change only drops the
+cached prefixes of the value it touches.
+
+Per-serial arrays record which title and author each book contributed, so a
+deletion (which only carries the serial) can be undone. The memory cost is
+8 MB plus the distinct values.
+
+Freshness:
+  - Bootstrapped by streaming `serial_number, title, author` from `books`
+    on a dedicated asyncpg connection that `LISTEN`s on `SERIAL_CHANNEL`,
+    like `app.services.serial_index`. Changes arriving during the load are
+    buffered and replayed.
+  - `BookService` applies its own committed writes right away. Inserts by
+    other workers (or any other writer: triggers on `books` send the
+    notifications) arrive as `+NNNNNN`; their title and author are fetched
+    in batches on the listener connection. Deletions (`-NNNNNN`) are
+    applied directly.
+  - On SQLite (single worker, no LISTEN) the index is loaded once and
+    then maintained by the local writes alone.
+  - While the index is not loaded, `suggest()` returns None and callers
+    query the database instead.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+from array import array
+from bisect import bisect_left, insort
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+from sqlalchemy.engine import make_url
+
+from app.db.session import scan_execution_options
+from app.models.book import SERIAL_CHANNEL
+from app.repositories.authors import author_key, prefix_bounds
+from app.repositories.books import book_repository
+from app.services.serial_index import SERIAL_SPACE
+
+if TYPE_CHECKING:
+    import asyncpg
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Suggestions computed (and cached) per prefix; requests take a prefix of these
+MAX_SUGGESTIONS = 20
+CACHE_SIZE = 4096
+LOAD_PREFETCH = 10_000
+MAX_RETRY_DELAY_S = 10.0
+
+_FETCH = "SELECT serial_number, title, author FROM books WHERE serial_number = ANY($1::char(6)[])"
+
+
+class _Vocabulary:
+    """Distinct folded values of one field, with book counts, in key order."""
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+        self.keys: list[str] = []
+        self.display: list[str] = []
+        self.counts: list[int] = []
+        self._sorted: list[str] = []
+        self._cache: dict[str, list[tuple[str, int]]] = {}
+
+    def count(self, value: str, *, keep_sorted: bool = True) -> int:
+        """Count one more book with `value`; return its id.
+
+        With `keep_sorted=False` (bulk load) the key order is left for
+        `rebuild()`.
+        """
+        key = author_key(value)
+        code = self._ids.get(key)
+        if code is None:
+            code = self._ids[key] = len(self.keys)
+            self.keys.append(key)
+            self.display.append(value)
+            self.counts.append(0)
+        self.counts[code] += 1
+        if self.counts[code] == 1 and keep_sorted:
+            insort(self._sorted, key)
+        self._invalidate(key)
+        return code
+
+    def uncount(self, code: int) -> None:
+        """Count one book fewer for the value with id `code`."""
+        self.counts[code] -= 1
+        key = self.keys[code]
+        if self.counts[code] == 0:
+            del self._sorted[bisect_left(self._sorted, key)]
+        self._invalidate(key)
+
+    def _invalidate(self, key: str) -> None:
+        """Drop the cached results that `key` may appear in (its prefixes)."""
+        if self._cache:
+            for end in range(1, len(key) + 1):
+                self._cache.pop(key[:end], None)
+
+    def rebuild(self) -> None:
+        """Sort the keys after a bulk load."""
+        self._sorted = sorted(k for k, n in zip(self.keys, self.counts) if n)
+        self._cache.clear()
+
+    def top(self, prefix: str) -> list[tuple[str, int]]:
+        """Most frequent values starting with `prefix` (folded), as `(display, count)`."""
+        cached = self._cache.get(prefix)
+        if cached is not None:
+            return cached
+        lo, hi = prefix_bounds(prefix)
+        start, end = bisect_left(self._sorted, lo), bisect_left(self._sorted, hi)
+        ids = self._ids
+        best = heapq.nsmallest(
+            MAX_SUGGESTIONS,
+            (ids[key] for key in self._sorted[start:end]),
+            key=lambda code: (-self.counts[code], self.keys[code]),
+        )
+        result = [(self.display[code], self.counts[code]) for code in best]
+        if len(self._cache) >= CACHE_SIZE:
+            self._cache.clear()
+        self._cache[prefix] = result
+        return result
+
+
+class SuggestIndex:
+    """Sorted prefix index over book titles and authors."""
+
+    def __init__(self) -> None:
+        self._titles = _Vocabulary()
+        self._authors = _Vocabulary()
+        # Allocated by the first load
+        self._title_of = array("i")
+        self._author_of = array("i")
+        self._fresh = False
+        # Changes seen while loading: (op, serial, (title, author) or None)
+        self._buffer: Optional[list[tuple[str, str, Optional[tuple[str, str]]]]] = None
+        # Serials announced by other workers, awaiting their title/author
+        self._pending: dict[str, int] = {}
+        self._sequence = 0
+        self._wakeup = asyncio.Event()
+
+    def _reset(self) -> None:
+        """Start from an empty index (before a load)."""
+        self._titles = _Vocabulary()
+        self._authors = _Vocabulary()
+        self._title_of = array("i", [-1]) * SERIAL_SPACE
+        self._author_of = array("i", [-1]) * SERIAL_SPACE
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the index is loaded and tracking changes."""
+        return self._fresh
+
+    # --- changes -------------------------------------------------------------
+
+    def _add(self, serial_number: str, title: str, author: str, *, keep_sorted: bool = True) -> None:
+        n = int(serial_number)
+        if self._title_of[n] != -1:
+            return  # already applied (own write echoed by NOTIFY)
+        self._title_of[n] = self._titles.count(title, keep_sorted=keep_sorted)
+        self._author_of[n] = self._authors.count(author, keep_sorted=keep_sorted)
+
+    def _discard(self, serial_number: str) -> None:
+        n = int(serial_number)
+        if self._title_of[n] == -1:
+            return
+        self._titles.uncount(self._title_of[n])
+        self._authors.uncount(self._author_of[n])
+        self._title_of[n] = self._author_of[n] = -1
+
+    def add(self, serial_number: str, title: str, author: str) -> None:
+        """Record a committed insert made by this worker.
+
+        Ignored while the index is neither loaded nor loading (the next load
+        reads it from the database).
+        """
+        if self._buffer is not None:
+            self._buffer.append(("+", serial_number, (title, author)))
+        elif self._fresh:
+            self._add(serial_number, title, author)
+
+    def discard(self, serial_number: str) -> None:
+        """Record a committed delete made by this worker."""
+        if self._buffer is not None:
+            self._buffer.append(("-", serial_number, None))
+        elif self._fresh:
+            self._pending.pop(serial_number, None)
+            self._discard(serial_number)
+
+    def _apply(self, op: str, serial_number: str, row: Optional[tuple[str, str]]) -> None:
+        if op == "-":
+            self._pending.pop(serial_number, None)
+            self._discard(serial_number)
+        elif row is not None:
+            self._add(serial_number, *row)
+        elif self._title_of[int(serial_number)] == -1:
+            self._sequence += 1
+            self._pending[serial_number] = self._sequence
+            self._wakeup.set()
+
+    def _on_notify(self, _conn: object, _pid: int, _channel: str, payload: str) -> None:
+        op, serial_number = payload[:1], payload[1:]
+        if op not in ("+", "-") or len(serial_number) != 6 or not serial_number.isdigit():
+            return
+        if self._buffer is not None:
+            self._buffer.append((op, serial_number, None))
+        else:
+            self._apply(op, serial_number, None)
+
+    # --- queries -------------------------------------------------------------
+
+    def suggest(self, q: str, limit: int = 10) -> Optional[dict[str, list[tuple[str, int]]]]:
+        """Return up to `limit` completions per field, or None if not loaded.
+
+        Matching is by prefix of the folded value (case-, width- and
+        spacing-insensitive); the most frequent values come first, ties in
+        key order.
+
+        Returns:
+            Optional[dict]: `{"titles": [...], "authors": [...]}` of
+            `(display value, number of books)`.
+        """
+        if not self._fresh:
+            return None
+        prefix = author_key(q)
+        if not prefix:
+            return {"titles": [], "authors": []}
+        return {
+            "titles": self._titles.top(prefix)[:limit],
+            "authors": self._authors.top(prefix)[:limit],
+        }
+
+    # --- lifecycle -----------------------------------------------------------
+
+    def _load_rows(self, rows: Iterable[Any]) -> int:
+        """Bulk-add `(serial_number, title, author)` rows into the empty index."""
+        count = 0
+        for serial_number, title, author in rows:
+            self._add(serial_number, title, author, keep_sorted=False)
+            count += 1
+        return count
+
+    def _finish_load(self) -> None:
+        """Sort, replay changes buffered during the load and start answering."""
+        self._titles.rebuild()
+        self._authors.rebuild()
+        buffered, self._buffer = self._buffer or [], None
+        for op, serial_number, row in buffered:
+            self._apply(op, serial_number, row)
+        self._fresh = True
+
+    async def _load(self, conn: asyncpg.Connection) -> None:
+        self._reset()
+        count = 0
+        async with conn.transaction(readonly=True):
+            async for serial_number, title, author in conn.cursor(
+                "SELECT serial_number, title, author FROM books", prefetch=LOAD_PREFETCH
+            ):
+                self._add(serial_number, title, author, keep_sorted=False)
+                count += 1
+        self._finish_load()
+        logger.info("Suggest index loaded (%d books)", count)
+
+    async def _fetch_pending(self, conn: asyncpg.Connection) -> None:
+        """Fetch title and author of the serials other workers announced."""
+        batch = dict(self._pending)
+        if not batch:
+            return
+        for serial_number, title, author in await conn.fetch(_FETCH, list(batch)):
+            if self._pending.get(serial_number) == batch[serial_number]:
+                self._add(serial_number, title, author)
+        for serial_number, sequence in batch.items():
+            # Re-announced while fetching: keep it for the next round
+            if self._pending.get(serial_number) == sequence:
+                del self._pending[serial_number]
+
+    async def run(self, database_url: str) -> None:
+        """Keep the index loaded and subscribed; reconnect with backoff.
+
+        Runs until cancelled (normally for the application's lifetime).
+
+        Args:
+            database_url (str): SQLAlchemy DSN reaching Postgres directly
+                (LISTEN does not work through transaction-mode pgbouncer).
+        """
+        import asyncpg
+
+        dsn = make_url(database_url).set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        delay = 0.5
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(dsn)
+                lost = asyncio.Event()
+
+                def on_lost(_: object) -> None:
+                    lost.set()
+                    self._wakeup.set()
+
+                conn.add_termination_listener(on_lost)
+                # Subscribe before loading so no change falls in between
+                self._buffer = []
+                await conn.add_listener(SERIAL_CHANNEL, self._on_notify)
+                await self._load(conn)
+                delay = 0.5
+                while not lost.is_set():
+                    await self._wakeup.wait()
+                    self._wakeup.clear()
+                    if not lost.is_set():
+                        await self._fetch_pending(conn)
+                logger.warning("Suggest index listener connection lost")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Suggest index unavailable; retrying in %.1fs", delay, exc_info=True)
+            finally:
+                self._fresh = False
+                self._buffer = None
+                self._pending.clear()
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY_S)
+
+    async def load_once(self, sessionmaker: async_sessionmaker[AsyncSession]) -> None:
+        """Load through SQLAlchemy and rely on local writes afterwards (SQLite).
+
+        Retries with backoff until the load succeeds.
+        """
+        delay = 0.5
+        while True:
+            self._buffer = []
+            try:
+                async with sessionmaker() as session:
+                    await session.connection(
+                        execution_options=scan_execution_options(session.get_bind().dialect.name)
+                    )
+                    self._reset()
+                    count = 0
+                    async for rows in book_repository(session).stream_catalog(batch_size=LOAD_PREFETCH):
+                        count += self._load_rows(
+                            (row.serial_number, row.title, row.author) for row in rows
+                        )
+                        await asyncio.sleep(0)
+                    await session.rollback()
+                self._finish_load()
+                logger.info("Suggest index loaded (%d books)", count)
+                return
+            except asyncio.CancelledError:
+                self._buffer = None
+                raise
+            except Exception:
+                self._buffer = None
+                logger.warning("Suggest index load failed; retrying in %.1fs", delay, exc_info=True)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY_S)
+
+
+_suggest_index = SuggestIndex()
+
+
+def get_suggest_index() -> SuggestIndex:
+    """Return this worker's suggest index."""
+    return _suggest_index
@@ -14,7 +14,9 @@ done
 echo "[entrypoint] Postgres is ready."
 
 echo "[entrypoint] Running migrations..."
-alembic upgrade head
+# Advisory-locked across replicas; returns immediately when already at head
+python -m app.db.migrate
 
-echo "[entrypoint] Starting API..."
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000
+echo "[entrypoint] Starting API (workers: ${UVICORN_WORKERS:-auto})..."
+# exec so SIGTERM reaches the server directly and triggers a graceful drain
+exec python -m app.server
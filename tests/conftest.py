@@ -12,10 +12,10 @@ import pytest_asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
-from app.db.session import engine, AsyncSessionLocal
+from app.db.session import get_engine, get_sessionmaker
 from app.db.base import Base
 from collections.abc import AsyncGenerator
-from app.api.deps import get_session
+from app.api.deps import get_read_session, get_session
 from httpx import AsyncClient, ASGITransport
 from app.main import app
 
@@ -45,6 +45,7 @@ async def prepare_database() -> AsyncGenerator[None, None]:
     Drops and recreates all tables to ensure test isolation.
     Disposes engine before and after to avoid cross-loop issues.
     """
+    engine = get_engine()
     # ensure no pooled connections from a different loop
     await engine.dispose()
     async with engine.begin() as conn:
@@ -61,7 +62,7 @@ async def db_session(prepare_database) -> AsyncGenerator[AsyncSession, None]:
 
     Rolls back at the end of each test to keep state clean.
     """
-    async with AsyncSessionLocal() as session:
+    async with get_sessionmaker()() as session:
         try:
             yield session
         finally:
@@ -75,13 +76,14 @@ async def db_session(prepare_database) -> AsyncGenerator[AsyncSession, None]:
 async def client(db_session):
     """Provide an HTTPX AsyncClient bound to the FastAPI app.
 
-    Overrides the DB session dependency to use the test session.
+    Overrides the DB session dependencies to use the test session.
     Handles compatibility with multiple httpx versions.
     """
     async def _override_get_session():
         yield db_session
 
     app.dependency_overrides[get_session] = _override_get_session
+    app.dependency_overrides[get_read_session] = _override_get_session
 
     # Build a transport that works across httpx versions
     try:
@@ -100,3 +100,135 @@ async def test_error_envelope_shape_on_conflict(client):
     assert "error" in body
     assert set(body["error"].keys()) == {"code", "message", "details"}
     assert body["error"]["code"] == "conflict"
+
+
+@pytest.mark.asyncio
+async def test_list_books_sparse_fieldset(client):
+    await client.post("/api/v1/books", json={"serial_number": "600001", "title": "Sparse", "author": "S"})
+
+    r = await client.get("/api/v1/books", params={"fields": "serial_number,title,is_borrowed"})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["total"] >= 1
+    assert all(set(item) == {"serial_number", "title", "is_borrowed"} for item in data["items"])
+
+    # Unknown field → 422
+    r2 = await client.get("/api/v1/books", params={"fields": "serial_number,isbn"})
+    assert r2.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_free_serials_and_allocate(client):
+    await client.post("/api/v1/books", json={"serial_number": "800000", "title": "Held", "author": "H"})
+
+    r = await client.get(
+        "/api/v1/books/serials/free", params={"count": 2, "start": "800000", "end": "800099"}
+    )
+    assert r.status_code == 200
+    assert r.json() == {"serial_numbers": ["800001", "800002"]}
+
+    r = await client.post(
+        "/api/v1/books/serials/allocate",
+        json={"items": [{"title": "A", "author": "X"}, {"title": "B", "author": "Y"}], "start": "800000"},
+    )
+    assert r.status_code == 201
+    assert [b["serial_number"] for b in r.json()["items"]] == ["800001", "800002"]
+
+    r = await client.get("/api/v1/books/serials/free", params={"count": 0})
+    assert r.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_batch_get_preserves_order_and_marks_not_found(client):
+    for serial in ("910001", "910002"):
+        await client.post("/api/v1/books", json={"serial_number": serial, "title": serial, "author": "B"})
+
+    r = await client.post(
+        "/api/v1/books:batchGet",
+        json={"serial_numbers": ["910002", "999998", "910001", "bad", "910002"]},
+    )
+    assert r.status_code == 200
+    items = r.json()["items"]
+    assert [(i["serial_number"], i["found"]) for i in items] == [
+        ("910002", True),
+        ("999998", False),
+        ("910001", True),
+        ("bad", False),
+        ("910002", True),
+    ]
+    assert items[0]["book"]["title"] == "910002"
+    assert items[1]["book"] is None
+
+    r = await client.post("/api/v1/books:batchGet", json={"serial_numbers": []})
+    assert r.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_list_books_sorted_with_cursor(client):
+    titles = ["Delta", "alpha", "Charlie", "Bravo", "Echo"]
+    for i, title in enumerate(titles):
+        await client.post("/api/v1/books", json={"serial_number": f"92000{i}", "title": title, "author": "S"})
+
+    seen: list[str] = []
+    params = {"sort": "title", "limit": 2, "fields": "title"}
+    while True:
+        r = await client.get("/api/v1/books", params=params)
+        assert r.status_code == 200
+        assert r.json()["total"] == 5
+        seen += [item["title"] for item in r.json()["items"]]
+        assert all(set(item) == {"title"} for item in r.json()["items"])
+        if "x-next-cursor" not in r.headers:
+            break
+        params["cursor"] = r.headers["x-next-cursor"]
+    # Paging by cursor yields exactly the single-page order (collation-defined)
+    r = await client.get("/api/v1/books", params={"sort": "title", "limit": 10})
+    assert seen == [item["title"] for item in r.json()["items"]]
+    assert sorted(seen) == sorted(titles)
+
+    # Whitelist, borrowed-only sorts and cursor/sort mismatch are validated
+    assert (await client.get("/api/v1/books", params={"sort": "updated_at"})).status_code == 422
+    assert (await client.get("/api/v1/books", params={"sort": "borrowed_at"})).status_code == 422
+    r = await client.get("/api/v1/books", params={"sort": "author", "cursor": params["cursor"]})
+    assert r.status_code == 422
+    assert (await client.get("/api/v1/books", params={"cursor": "!!"})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_list_books_sorted_by_borrowed_at(client):
+    for serial in ("930001", "930002", "930003"):
+        await client.post("/api/v1/books", json={"serial_number": serial, "title": serial, "author": "S"})
+    for serial in ("930003", "930001"):
+        await client.patch(f"/api/v1/books/{serial}/status", json={"action": "borrow", "borrower_card": "111111"})
+
+    r = await client.get("/api/v1/books", params={"sort": "borrowed_at", "is_borrowed": "true"})
+    assert r.status_code == 200
+    assert [b["serial_number"] for b in r.json()["items"]] == ["930003", "930001"]
+
+    r = await client.get(
+        "/api/v1/books", params={"sort": "-borrowed_at", "is_borrowed": "true", "limit": 1}
+    )
+    assert [b["serial_number"] for b in r.json()["items"]] == ["930001"]
+    r = await client.get(
+        "/api/v1/books",
+        params={"sort": "-borrowed_at", "is_borrowed": "true", "limit": 1, "cursor": r.headers["x-next-cursor"]},
+    )
+    assert [b["serial_number"] for b in r.json()["items"]] == ["930003"]
+
+
+@pytest.mark.asyncio
+async def test_book_stats(client):
+    for serial, author in [("000001", "A"), ("000002", "A"), ("000003", "B")]:
+        await client.post("/api/v1/books", json={"serial_number": serial, "title": "T", "author": author})
+    await client.patch("/api/v1/books/000002/status", json={"action": "borrow", "borrower_card": "654321"})
+
+    r = await client.get("/api/v1/books/stats")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["total"] == 3 and body["borrowed"] == 1 and body["available"] == 2
+    assert body["distinct_authors"] == 2
+    assert body["oldest_borrowed_at"] is not None
+
+    r = await client.get("/api/v1/books/stats", params={"author": "b"})
+    assert r.json() == {
+        "total": 1, "borrowed": 0, "available": 1, "distinct_authors": 1, "oldest_borrowed_at": None
+    }
@@ -0,0 +1,110 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.db.migrate import create_sqlite_schema
+from app.repositories.authors import author_key, prefix_bounds
+
+
+def test_author_key_normalizes_case_spacing_and_width():
+    assert author_key("  Jane\t Austen ") == "jane austen"
+    assert author_key("ＪＡＮＥ AUSTEN") == "jane austen"
+    assert author_key("Straße") == author_key("STRASSE")
+
+
+def test_prefix_bounds_cover_exactly_the_prefix():
+    lo, hi = prefix_bounds("jan")
+    assert lo == "jan" and hi == "jao"
+    assert all(lo <= key < hi for key in ("jan", "jane austen", "jan\U0010ffff"))
+    assert not any(lo <= key < hi for key in ("ja", "jao", "jb"))
+
+
+async def _add(client, serial, author, title="T"):
+    r = await client.post(
+        "/api/v1/books", json={"serial_number": serial, "title": title, "author": author}
+    )
+    assert r.status_code == 201
+    return r.json()
+
+
+@pytest.mark.asyncio
+async def test_authors_are_normalized_and_faceted(client):
+    first = await _add(client, "400001", "Jane Austen")
+    second = await _add(client, "400002", "jane   AUSTEN")
+    other = await _add(client, "400003", "Frank Herbert")
+    await _add(client, "400004", "Janet Frame")
+    assert first["author_id"] == second["author_id"] != other["author_id"]
+    assert second["author"] == "jane   AUSTEN"  # as written for that book
+    await client.patch(
+        "/api/v1/books/400002/status", json={"action": "borrow", "borrower_card": "123456"}
+    )
+
+    r = await client.get("/api/v1/books/facets/authors")
+    assert r.status_code == 200
+    assert [(f["name"], f["count"]) for f in r.json()["items"]] == [
+        ("Jane Austen", 2),
+        ("Frank Herbert", 1),
+        ("Janet Frame", 1),
+    ]
+    r = await client.get("/api/v1/books/facets/authors", params={"prefix": " JANE"})
+    assert [f["name"] for f in r.json()["items"]] == ["Jane Austen", "Janet Frame"]
+    r = await client.get(
+        "/api/v1/books/facets/authors", params={"prefix": "jane ", "is_borrowed": True}
+    )
+    assert [(f["name"], f["count"]) for f in r.json()["items"]] == [("Jane Austen", 1)]
+    r = await client.get("/api/v1/books/facets/authors", params={"limit": 1})
+    assert len(r.json()["items"]) == 1
+
+    author_id = first["author_id"]
+    r = await client.get("/api/v1/books", params={"author_id": author_id})
+    assert r.json()["total"] == 2
+    assert [b["serial_number"] for b in r.json()["items"]] == ["400002", "400001"]
+    r = await client.get(
+        "/api/v1/books", params={"author_id": author_id, "is_borrowed": False, "fields": "author_id"}
+    )
+    assert r.json()["items"] == [{"author_id": author_id}]
+    r = await client.get("/api/v1/books/stats", params={"author_id": author_id})
+    assert r.json()["total"] == 2 and r.json()["distinct_authors"] == 1
+    r = await client.get("/api/v1/books/stats")
+    assert r.json()["distinct_authors"] == 3
+
+    r = await client.get("/api/v1/books", params={"author_id": author_id, "branch": "*"})
+    assert r.status_code == 422
+
+
+def test_sqlite_schema_upgrade_links_existing_books(tmp_path):
+    pytest.importorskip("aiosqlite")
+    path = tmp_path / "legacy.db"
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE books (serial_number CHAR(6) PRIMARY KEY, title TEXT NOT NULL,"
+                " author TEXT NOT NULL, is_borrowed BOOLEAN NOT NULL DEFAULT 0,"
+                " borrower_card CHAR(6), borrowed_at TIMESTAMP,"
+                " created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,"
+                " updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO books (serial_number, title, author) VALUES (:s, 'T', :a)"),
+            [{"s": "000001", "a": "Ann Lee"}, {"s": "000002", "a": "ann lee"}, {"s": "000003", "a": "Bo"}],
+        )
+
+    url = f"sqlite+aiosqlite:///{path}"
+    assert create_sqlite_schema(url) is True
+    assert create_sqlite_schema(url) is False
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT b.serial_number, a.name FROM books AS b"
+                " JOIN authors AS a ON a.id = b.author_id ORDER BY 1"
+            )
+        ).all()
+        indexes = {row[1] for row in conn.execute(text("PRAGMA index_list(books)"))}
+    engine.dispose()
+    assert [tuple(row) for row in rows] == [
+        ("000001", "Ann Lee"),
+        ("000002", "Ann Lee"),
+        ("000003", "Bo"),
+    ]
+    assert "idx_books_author_listing" in indexes
@@ -0,0 +1,100 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.common.exceptions import ValidationError
+from app.core.config import get_settings
+from app.db.shards import DEFAULT_BRANCH, ShardRouter
+from app.repositories.books import _list_statements
+from app.schemas.books import BookCreate
+from app.services.books import BookService
+from app.services.branches import BranchFanout
+
+
+def test_shard_router_validates_branch_names():
+    assert ShardRouter({"north": "sqlite+aiosqlite://"}).branches == (DEFAULT_BRANCH, "north")
+    for name in (DEFAULT_BRANCH, "North", "a/b", ""):
+        with pytest.raises(ValueError):
+            ShardRouter({name: "sqlite+aiosqlite://"})
+
+
+@pytest.mark.asyncio
+async def test_fanout_merges_branches_in_order_with_totals(db_session):
+    service = BookService(db_session)
+    for serial, title in [("000003", "C"), ("000001", "A"), ("000002", "B")]:
+        await service.add_book(BookCreate(serial_number=serial, title=title, author="X"))
+    # A second branch on the same database: every book appears once per branch
+    shards = ShardRouter({"north": get_settings().get_async_database_url()})
+    fanout = BranchFanout(shards)
+    try:
+        page = await fanout.list_books_page(sort="title", limit=4, fields=["serial_number"])
+        assert page.total == 6
+        assert page.items == [
+            {"branch": "main", "serial_number": "000001"},
+            {"branch": "north", "serial_number": "000001"},
+            {"branch": "main", "serial_number": "000002"},
+            {"branch": "north", "serial_number": "000002"},
+        ]
+        rest = await fanout.list_books_page(
+            sort="title", limit=4, fields=["serial_number"], cursor=page.next_cursor
+        )
+        assert [(r["branch"], r["serial_number"]) for r in rest.items] == [
+            ("main", "000003"),
+            ("north", "000003"),
+        ]
+        assert rest.next_cursor is None
+
+        offset_page = await fanout.list_books_page(sort="title", limit=2, offset=3)
+        assert [(r["branch"], r["title"]) for r in offset_page.items] == [("north", "B"), ("main", "C")]
+
+        with pytest.raises(ValidationError):
+            await fanout.list_books_page(sort="author", cursor=page.next_cursor)
+    finally:
+        await shards.dispose()
+
+
+@pytest.mark.asyncio
+async def test_fanout_orders_text_by_code_point(db_session):
+    # Python compares str by code point; every branch must sort the same way,
+    # whatever its database collation, or heapq.merge interleaves wrongly
+    for sort in ("title", "author"):
+        _, page_stmt = _list_statements(
+            by_borrowed=False, by_title=False, by_author=False, columns=None, sort=sort
+        )
+        assert f'{sort} COLLATE "C"' in str(page_stmt.compile(dialect=postgresql.dialect()))
+
+    service = BookService(db_session)
+    titles = ["zoo", "Émile", "apple", "Zebra", "éclair", "Apple", "emu"]
+    for serial, title in enumerate(titles, start=1):
+        await service.add_book(BookCreate(serial_number=f"{serial:06d}", title=title, author=title))
+    shards = ShardRouter({"north": get_settings().get_async_database_url()})
+    fanout = BranchFanout(shards)
+    try:
+        for sort in ("title", "author"):
+            seen, cursor = [], None
+            while True:
+                page = await fanout.list_books_page(sort=sort, limit=3, cursor=cursor)
+                seen += [(r[sort], r["branch"]) for r in page.items]
+                if page.next_cursor is None:
+                    break
+                cursor = page.next_cursor
+            assert seen == sorted((t, b) for t in titles for b in ("main", "north"))
+    finally:
+        await shards.dispose()
+
+
+@pytest.mark.asyncio
+async def test_branch_parameter(client):
+    r = await client.post(
+        "/api/v1/books", json={"serial_number": "000001", "title": "T", "author": "A"}
+    )
+    assert r.status_code == 201
+
+    r = await client.get("/api/v1/books", params={"branch": "nowhere"})
+    assert r.status_code == 404
+
+    r = await client.delete("/api/v1/books/000001", params={"branch": "*"})
+    assert r.status_code == 422
+
+    r = await client.get("/api/v1/books", params={"branch": "*"})
+    assert r.status_code == 200
+    assert [(b["branch"], b["serial_number"]) for b in r.json()["items"]] == [("main", "000001")]
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from app.api.cancellation import cancel_on_disconnect
+from app.common.exceptions import ClientDisconnected
+
+
+class DummyRequest:
+    """Stand-in for a Starlette request exposing only `receive`."""
+    def __init__(self, disconnect: asyncio.Event):
+        self._disconnect = disconnect
+
+    async def receive(self):
+        await self._disconnect.wait()
+        return {"type": "http.disconnect"}
+
+
+@pytest.mark.asyncio
+async def test_returns_result_when_client_stays():
+    async def work():
+        return 42
+
+    assert await cancel_on_disconnect(DummyRequest(asyncio.Event()), work()) == 42
+
+
+@pytest.mark.asyncio
+async def test_cancels_work_when_client_disconnects():
+    disconnect = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def slow_query():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    asyncio.get_running_loop().call_later(0.01, disconnect.set)
+    with pytest.raises(ClientDisconnected):
+        await cancel_on_disconnect(DummyRequest(disconnect), slow_query())
+    assert cancelled.is_set()
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select, text
+
+from app.common.exceptions import Conflict
+from app.db.migrate import recount_card_loans
+from app.db.session import get_sessionmaker
+from app.models.card import CardLoans
+from app.schemas.books import BookCreate
+from app.services.books import BookService
+
+
+async def _active(session, card):
+    return await session.scalar(select(CardLoans.active).where(CardLoans.borrower_card == card))
+
+
+async def _add_books(session, serials):
+    service = BookService(session)
+    for serial in serials:
+        await service.add_book(BookCreate(serial_number=serial, title="Limit", author="L"))
+
+
+@pytest.mark.asyncio
+async def test_limit_counts_active_loans_per_card(db_session):
+    await _add_books(db_session, ["830001", "830002", "830003"])
+    service = BookService(db_session, max_loans_per_card=2)
+
+    await service.borrow_book("830001", "111111")
+    await service.borrow_book("830002", "111111")
+    await service.borrow_book("830002", "111111")  # idempotent, not counted again
+    with pytest.raises(Conflict, match="2 books"):
+        await service.borrow_book("830003", "111111")
+    await db_session.rollback()
+    assert await _active(db_session, "111111") == 2
+
+    await service.borrow_book("830003", "222222")  # other cards are unaffected
+    await service.return_book("830001")
+    await service.borrow_book("830001", "111111")
+    assert await _active(db_session, "111111") == 2
+    assert await _active(db_session, "222222") == 1
+
+    # Without a limit the counters are still kept
+    unlimited = BookService(db_session)
+    await unlimited.return_book("830003")
+    await unlimited.borrow_book("830003", "111111")
+    assert await _active(db_session, "111111") == 3
+    assert await _active(db_session, "222222") == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_checkouts_with_one_card_respect_the_limit(db_session):
+    serials = [f"{n:06d}" for n in range(831001, 831009)]
+    await _add_books(db_session, serials)
+    await db_session.rollback()  # release the SQLite write lock
+    sessionmaker = get_sessionmaker()
+
+    async def checkout(serial):
+        async with sessionmaker() as session:
+            try:
+                await BookService(session, max_loans_per_card=3).borrow_book(serial, "333333")
+                return True
+            except Conflict:
+                return False
+
+    results = await asyncio.gather(*(checkout(serial) for serial in serials))
+    assert sum(results) == 3
+    assert await _active(db_session, "333333") == 3
+
+
+@pytest.mark.asyncio
+async def test_recount_rebuilds_counters_from_books(db_session):
+    await _add_books(db_session, ["832001", "832002", "832003"])
+    service = BookService(db_session)
+    await service.borrow_book("832001", "444444")
+    await service.borrow_book("832002", "444444")
+    await db_session.execute(text("UPDATE card_loans SET active = 7"))
+    await db_session.execute(text("INSERT INTO card_loans (borrower_card, active) VALUES ('555555', 1)"))
+
+    connection = await db_session.connection()
+    assert await connection.run_sync(recount_card_loans) == 1
+    rows = (await db_session.execute(select(CardLoans.borrower_card, CardLoans.active))).all()
+    assert [tuple(row) for row in rows] == [("444444", 2)]
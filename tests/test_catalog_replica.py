@@ -0,0 +1,172 @@
+import pytest
+from sqlalchemy import text
+
+from app.db.session import get_sessionmaker
+from app.schemas.books import BookCreate
+from app.services.books import BookService
+from app.services.catalog_replica import CatalogReplica
+from app.services.serial_index import SerialIndex
+
+pytest.importorskip("numpy")
+
+
+def fresh_index(serials) -> SerialIndex:
+    index = SerialIndex()
+    for serial in serials:
+        index.add(serial)
+    index._fresh = True  # as after a completed load
+    return index
+
+
+async def seed(service: BookService) -> None:
+    for serial, title, author in [
+        ("000001", "Dune", "Frank Herbert"),
+        ("000002", "Dune Messiah", "Frank Herbert"),
+        ("000003", "Emma", "Jane Austen"),
+        ("000004", "Persuasion", "Jane Austen"),
+        ("000005", "100% Pure", "Someone"),
+    ]:
+        await service.add_book(BookCreate(serial_number=serial, title=title, author=author))
+    await service.borrow_book("000002", "654321")
+
+
+@pytest.mark.asyncio
+async def test_replica_lists_like_the_database(db_session):
+    service = BookService(db_session)
+    await seed(service)
+    index = fresh_index(f"00000{n}" for n in range(1, 6))
+    replica = CatalogReplica(index)
+    await replica.sync(get_sessionmaker())
+    assert replica.fresh
+
+    for filters in (
+        {},
+        {"is_borrowed": False},
+        {"title": " dune "},
+        {"author": "AUSTEN", "is_borrowed": False},
+        {"title": "nothing"},
+    ):
+        expected, expected_total = await service.list_books(limit=3, offset=1, **filters)
+        items, total = replica.list(limit=3, offset=1, **filters)
+        assert total == expected_total
+        assert [r["serial_number"] for r in items] == [b.serial_number for b in expected]
+
+    (row,), _ = replica.list(title="messiah")
+    book = await service.repo.get_by_serial("000002")
+    assert row == {c: getattr(book, c) for c in row}
+    # ILIKE wildcards are left to the database
+    assert replica.list(title="100%") is None
+
+    stats = replica.stats()
+    assert stats == dict(await service.repo.stats())
+    assert stats["total"] == 5 and stats["borrowed"] == 1 and stats["distinct_authors"] == 3
+
+
+@pytest.mark.asyncio
+async def test_replica_applies_updates_and_deletions(db_session):
+    service = BookService(db_session)
+    await seed(service)
+    index = fresh_index(f"00000{n}" for n in range(1, 6))
+    replica = CatalogReplica(index)
+    sessionmaker = get_sessionmaker()
+    await replica.sync(sessionmaker)
+
+    await service.return_book("000002")
+    await service.remove_book("000003")
+    index.discard("000003")
+    await service.add_book(BookCreate(serial_number="000006", title="Ulysses", author="James Joyce"))
+    index.add("000006")
+    await replica.sync(sessionmaker)
+
+    items, total = replica.list()
+    assert total == 5
+    assert items[0]["serial_number"] == "000006"
+    assert "000003" not in {r["serial_number"] for r in items}
+    assert replica.stats(is_borrowed=True)["total"] == 0
+
+    index._fresh = False
+    assert replica.list() is None
+
+
+@pytest.mark.asyncio
+async def test_rows_are_kept_until_the_index_hears_of_them(db_session):
+    service = BookService(db_session)
+    await seed(service)
+    index = fresh_index(f"00000{n}" for n in range(1, 6))
+    replica = CatalogReplica(index)
+    sessionmaker = get_sessionmaker()
+    await replica.sync(sessionmaker)
+
+    # The refresh scans the new book before its NOTIFY reaches the index
+    await service.add_book(BookCreate(serial_number="000006", title="Ulysses", author="James Joyce"))
+    await replica.sync(sessionmaker)
+    assert replica.list()[1] == 6
+    index.add("000006")
+    await replica.sync(sessionmaker)
+    assert replica.list()[1] == 6
+
+    # Deleted after the scan that wrote it: dropped once the index says so
+    await service.remove_book("000006")
+    index.discard("000006")
+    await replica.sync(sessionmaker)
+    items, total = replica.list()
+    assert total == 5 and "000006" not in {r["serial_number"] for r in items}
+
+
+@pytest.mark.asyncio
+async def test_service_uses_replica_for_default_listing_and_stats(db_session):
+    service = BookService(db_session)
+    await seed(service)
+    index = fresh_index(f"00000{n}" for n in range(1, 6))
+    replica = CatalogReplica(index)
+    await replica.sync(get_sessionmaker())
+    served = BookService(db_session, catalog=replica)
+
+    page = await served.list_books_page(limit=2, fields=["title"])
+    assert page.items == [{"title": "100% Pure"}, {"title": "Persuasion"}]
+    assert page.total == 5 and page.next_cursor is not None
+    # The cursor continues in the database
+    rest = await served.list_books_page(limit=10, fields=["title"], cursor=page.next_cursor)
+    assert [r["title"] for r in rest.items] == ["Emma", "Dune Messiah", "Dune"]
+
+    stats = await served.book_stats(author="herbert")
+    assert stats["total"] == 2 and stats["available"] == 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_waits_for_open_transactions_and_resync_fixes_drift(db_session):
+    if db_session.get_bind().dialect.name != "postgresql":
+        pytest.skip("The change horizon reads pg_stat_activity")
+    service = BookService(db_session)
+    await seed(service)
+    index = fresh_index(f"00000{n}" for n in range(1, 6))
+    replica = CatalogReplica(index)
+    sessionmaker = get_sessionmaker()
+    await replica.sync(sessionmaker)
+
+    async with sessionmaker() as late:
+        started = (await late.execute(text("SELECT now()"))).scalar()
+        await late.execute(
+            text("UPDATE books SET title = 'Late', updated_at = now() WHERE serial_number = '000001'")
+        )
+        # A newer change commits and is seen before the older transaction commits
+        await service.return_book("000002")
+        await replica.sync(sessionmaker)
+        assert replica.stats(is_borrowed=True)["total"] == 0
+        assert replica._since < started
+        await late.commit()
+    await replica.sync(sessionmaker)
+    assert replica.list(title="late")[1] == 1
+
+    # A write that leaves updated_at alone is only picked up by a reload
+    await db_session.execute(
+        text(
+            "UPDATE books SET title = 'Drifted', updated_at = updated_at - interval '1 hour'"
+            " WHERE serial_number = '000003'"
+        )
+    )
+    await db_session.commit()
+    await replica.sync(sessionmaker)
+    assert replica.list(title="drifted")[1] == 0
+    await replica.sync(sessionmaker, reload=True)
+    assert replica.fresh and replica.list(title="drifted")[1] == 1
@@ -0,0 +1,15 @@
+import pytest
+
+from app.db.session import _read_execution_options
+
+
+@pytest.mark.parametrize(
+    "mode,expected",
+    [
+        ("read_only", {"postgresql_readonly": True}),
+        ("autocommit", {"isolation_level": "AUTOCOMMIT"}),
+        ("default", {}),
+    ],
+)
+def test_read_execution_options(mode, expected):
+    assert _read_execution_options(mode) == expected
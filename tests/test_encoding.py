@@ -0,0 +1,60 @@
+import gzip
+import json
+
+import pytest
+
+from app.api.encoding import (
+    COLUMNAR,
+    JSON,
+    NDJSON,
+    EncodedBody,
+    encode_list,
+    negotiate_encoding,
+    negotiate_media_type,
+)
+
+ITEMS = [
+    {"serial_number": "000001", "title": "A", "is_borrowed": False},
+    {"serial_number": "000002", "title": "B", "is_borrowed": True},
+]
+
+
+@pytest.mark.parametrize(
+    "accept,expected",
+    [
+        (None, JSON),
+        ("*/*", JSON),
+        ("application/x-ndjson", NDJSON),
+        ("application/json;q=0.5, application/vnd.library.columnar+json", COLUMNAR),
+        ("text/html", JSON),
+    ],
+)
+def test_negotiate_media_type(accept, expected):
+    assert negotiate_media_type(accept) == expected
+
+
+def test_negotiate_encoding_identity_and_gzip():
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("gzip, deflate") in ("gzip", "zstd")
+
+
+def test_encode_list_shapes():
+    assert json.loads(encode_list(JSON, ITEMS, 2)) == {"items": ITEMS, "total": 2}
+    lines = encode_list(NDJSON, ITEMS, 2).splitlines()
+    assert [json.loads(line) for line in lines] == ITEMS
+    columnar = json.loads(encode_list(COLUMNAR, ITEMS, 2))
+    assert columnar["columns"]["serial_number"] == ["000001", "000002"]
+    assert columnar["total"] == 2
+
+
+def test_encoded_body_compresses_once_above_threshold():
+    payload = EncodedBody(body=b"x" * 10_000, media_type=JSON)
+    first, coding = payload.variant("gzip")
+    assert coding == "gzip"
+    assert gzip.decompress(first) == payload.body
+    second, _ = payload.variant("gzip")
+    assert second is first
+
+    small = EncodedBody(body=b"{}", media_type=JSON)
+    assert small.variant("gzip") == (b"{}", None)
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from app.common.exceptions import ValidationError
+from app.schemas.books import BookCreate
+from app.services import inventory
+from app.services.books import BookService
+from app.services.inventory import InventoryService
+
+
+async def _seed(db_session):
+    books = BookService(db_session)
+    for serial in ("100001", "100002", "100003", "100004"):
+        await books.add_book(BookCreate(serial_number=serial, title=f"Book {serial}", author="A"))
+    await books.borrow_book("100003", "654321")  # borrowed and away
+    await books.borrow_book("100004", "654321")  # borrowed, yet on the shelf
+
+
+@pytest.mark.asyncio
+async def test_audit_classifies_discrepancies(db_session):
+    await _seed(db_session)
+
+    report = await InventoryService(db_session).audit(
+        ["100001", " 100001 ", "100004", "999999", "12x", ""]
+    )
+    found = {(row["finding"], row["serial_number"]) for row in report.findings}
+    assert found == {
+        ("missing", "100002"),
+        ("unknown", "999999"),
+        ("unknown", "12x"),
+        ("borrowed_on_shelf", "100004"),
+    }
+    assert report.summary() == {
+        "scanned": 6,
+        "distinct": 4,
+        "missing": 1,
+        "unknown": 2,
+        "borrowed_on_shelf": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_audit_rejects_oversized_scan(db_session, monkeypatch):
+    monkeypatch.setattr(inventory, "MAX_AUDIT_SCANS", 2)
+    with pytest.raises(ValidationError):
+        await InventoryService(db_session).audit(["000001", "000002", "000003"])
+
+
+@pytest.mark.asyncio
+async def test_audit_endpoint_streams_ndjson(client, db_session):
+    await _seed(db_session)
+
+    r = await client.post("/api/v1/inventory/audit", json={"serials": ["100001", "100004", "555555"]})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert lines[:-1] == [
+        {"finding": "borrowed_on_shelf", "serial_number": "100004", "title": "Book 100004",
+         "author": "A", "borrower_card": "654321", "borrowed_at": lines[0]["borrowed_at"]},
+        {"finding": "missing", "serial_number": "100002", "title": "Book 100002", "author": "A"},
+        {"finding": "unknown", "serial_number": "555555"},
+    ]
+    assert lines[-1] == {
+        "summary": {"scanned": 3, "distinct": 3, "missing": 1, "unknown": 1, "borrowed_on_shelf": 1}
+    }
@@ -0,0 +1,182 @@
+import asyncio
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.core.config import get_settings
+from app.db.partitions import add_months, attached_partitions, month_start, partition_name
+from app.db.session import get_sessionmaker
+from app.models.job import Job
+from app.repositories.jobs import JobRepository
+from app.schemas.books import BookCreate
+from app.services.books import BookService
+from app.services.job_runner import JobRunner
+from app.services.jobs import JobService
+
+
+def _runner() -> JobRunner:
+    return JobRunner(
+        {"main": get_settings().get_async_database_url()},
+        concurrency=2,
+        poll_interval_s=0.05,
+        stale_after_s=60,
+        max_attempts=3,
+        retention_s=3600,
+    )
+
+
+async def _run_until_finished(job_ids, timeout_s=10.0):
+    """Run a runner until every job has finished; return their final states."""
+    task = asyncio.create_task(_runner().run())
+    try:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout_s
+        while True:
+            async with get_sessionmaker()() as session:
+                jobs = [await JobRepository(session).get(i) for i in job_ids]
+            if all(job["status"] in ("succeeded", "failed") for job in jobs):
+                return jobs
+            assert loop.time() < deadline, jobs
+            await asyncio.sleep(0.05)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+async def _result_lines(job_id):
+    async with get_sessionmaker()() as session:
+        result = await JobService(session).get_result(job_id)
+    return [json.loads(line) for line in gzip.decompress(result).splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_export_job_endpoints(client, db_session):
+    service = BookService(db_session)
+    for serial in ("850001", "850002", "850003"):
+        await service.add_book(BookCreate(serial_number=serial, title=f"T{serial}", author="A"))
+    await db_session.rollback()
+
+    r = await client.post("/api/v1/jobs/export")
+    assert r.status_code == 202
+    job = r.json()
+    assert job["status"] == "queued" and job["result_url"] is None
+    assert r.headers["location"] == f"/api/v1/jobs/{job['id']}"
+    assert (await client.get(f"/api/v1/jobs/{job['id']}/result")).status_code == 409
+    await db_session.rollback()
+
+    await _run_until_finished([job["id"]])
+    state = (await client.get(r.headers["location"])).json()
+    assert state["status"] == "succeeded"
+    assert state["done"] == state["total"] == 3
+    assert state["result_url"] == f"/api/v1/jobs/{job['id']}/result"
+
+    r = await client.get(state["result_url"], headers={"Accept-Encoding": "identity"})
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    assert "content-encoding" not in r.headers
+    books = sorted(json.loads(line)["serial_number"] for line in r.text.splitlines())
+    assert books == ["850001", "850002", "850003"]
+
+    r = await client.get(state["result_url"], headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert len(r.text.splitlines()) == 3  # httpx inflates it
+
+    assert (await client.get("/api/v1/jobs/999999")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_import_and_audit_jobs(db_session):
+    await BookService(db_session).add_book(BookCreate(serial_number="851001", title="Old", author="A"))
+    service = JobService(db_session)
+    items = [
+        BookCreate(serial_number=s, title="Imported", author="Importer")
+        for s in ("851001", "851002", "851003", "851002")
+    ]
+    imported = await service.enqueue_import(items)
+    audited = await service.enqueue_audit(["851002", "851999"])
+    await db_session.rollback()
+
+    # The audit may run before or alongside the import; only the import is checked
+    imported_state, _ = await _run_until_finished([imported["id"], audited["id"]])
+    assert imported_state["status"] == "succeeded"
+    assert imported_state["done"] == imported_state["total"] == 4
+    assert await _result_lines(imported["id"]) == [
+        {"serial_number": "851001", "created": False},
+        {"serial_number": "851002", "created": True},
+        {"serial_number": "851003", "created": True},
+        {"serial_number": "851002", "created": False},
+    ]
+    lines = await _result_lines(audited["id"])
+    assert {"finding": "unknown", "serial_number": "851999"} in lines
+    assert lines[-1]["summary"]["scanned"] == 2
+
+
+@pytest.mark.asyncio
+async def test_claims_skip_locked_jobs(db_session):
+    if db_session.get_bind().dialect.name == "sqlite":
+        pytest.skip("SQLite serializes writers; SKIP LOCKED is PostgreSQL-only")
+    service = JobService(db_session)
+    first = await service.enqueue_export()
+    second = await service.enqueue_export()
+    async with get_sessionmaker()() as a, get_sessionmaker()() as b:
+        claimed_a = await JobRepository(a).claim()  # row lock held until commit
+        claimed_b = await asyncio.wait_for(JobRepository(b).claim(), timeout=5)
+        assert [claimed_a["id"], claimed_b["id"]] == [first["id"], second["id"]]
+        assert await JobRepository(b).claim() is None
+        await a.rollback()
+        await b.rollback()
+
+
+@pytest.mark.asyncio
+async def test_stale_jobs_are_requeued_then_failed(db_session):
+    repo = JobRepository(db_session)
+    job = await repo.enqueue("export", {})
+    await repo.claim()
+    assert await repo.requeue_stale(60, 2) == 0  # heartbeat is current by the database's clock
+    long_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    await db_session.execute(update(Job).where(Job.id == job["id"]).values(heartbeat_at=long_ago))
+
+    assert await repo.requeue_stale(60, 2) == 1
+    assert (await repo.get(job["id"]))["status"] == "queued"
+
+    await repo.claim()  # second attempt
+    await db_session.execute(update(Job).where(Job.id == job["id"]).values(heartbeat_at=long_ago))
+    await repo.requeue_stale(60, 2)
+    state = await repo.get(job["id"])
+    assert state["status"] == "failed" and state["attempts"] == 2
+    assert not await repo.succeed(job["id"], b"")  # no longer ours
+
+    assert await repo.purge(3600) == 0
+    await db_session.execute(update(Job).where(Job.id == job["id"]).values(finished_at=long_ago - timedelta(hours=1)))
+    assert await repo.purge(3600) == 1
+    assert await repo.get(job["id"]) is None
+
+
+@pytest.mark.asyncio
+async def test_runner_creates_upcoming_loan_partitions(db_session, monkeypatch):
+    connection = await db_session.connection()
+    if connection.dialect.name != "postgresql":
+        pytest.skip("loans is only partitioned on PostgreSQL")
+    settings = get_settings()
+    monkeypatch.setattr(settings, "LOAN_PARTITIONS_AHEAD", settings.LOAN_PARTITIONS_AHEAD + 2)
+    last = partition_name(
+        add_months(month_start(datetime.now(timezone.utc).date()), settings.LOAN_PARTITIONS_AHEAD)
+    )
+
+    async def partitions():
+        async with get_sessionmaker()() as session:
+            return await (await session.connection()).run_sync(attached_partitions)
+
+    assert last not in await partitions()
+    task = asyncio.create_task(_runner().run())
+    try:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 10
+        while last not in await partitions():
+            assert loop.time() < deadline
+            await asyncio.sleep(0.05)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
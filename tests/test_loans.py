@@ -0,0 +1,109 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app.db.partitions import (
+    add_months,
+    attached_partitions,
+    ensure_loan_partitions,
+    partition_name,
+)
+
+
+def test_partition_months():
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partition_name(date(2026, 3, 1)) == "loans_2026_03"
+
+
+async def _cycle(client, serial, card):
+    r = await client.patch(
+        f"/api/v1/books/{serial}/status", json={"action": "borrow", "borrower_card": card}
+    )
+    assert r.status_code == 200
+    r = await client.patch(f"/api/v1/books/{serial}/status", json={"action": "return"})
+    assert r.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_borrow_and_return_are_recorded(client):
+    for serial in ("300001", "300002"):
+        await client.post(
+            "/api/v1/books", json={"serial_number": serial, "title": "Ledger", "author": "L"}
+        )
+    await _cycle(client, "300001", "111111")
+    await _cycle(client, "300002", "111111")
+    await _cycle(client, "300001", "222222")
+
+    r = await client.get("/api/v1/books/300001/loans")
+    assert r.status_code == 200
+    items = r.json()["items"]
+    assert [(e["action"], e["borrower_card"]) for e in items] == [
+        ("return", "222222"),
+        ("borrow", "222222"),
+        ("return", "111111"),
+        ("borrow", "111111"),
+    ]
+    assert items[0]["occurred_at"] >= items[-1]["occurred_at"]
+    assert "X-Next-Cursor" not in r.headers
+
+    r = await client.get("/api/v1/cards/111111/loans", params={"limit": 3})
+    first = r.json()["items"]
+    assert [(e["serial_number"], e["action"]) for e in first] == [
+        ("300002", "return"),
+        ("300002", "borrow"),
+        ("300001", "return"),
+    ]
+    r = await client.get(
+        "/api/v1/cards/111111/loans", params={"limit": 3, "cursor": r.headers["X-Next-Cursor"]}
+    )
+    assert [(e["serial_number"], e["action"]) for e in r.json()["items"]] == [("300001", "borrow")]
+
+    # History outlives the book
+    assert (await client.delete("/api/v1/books/300001")).status_code == 204
+    r = await client.get(
+        "/api/v1/books/300001/loans", params={"since": first[0]["occurred_at"]}
+    )
+    assert len(r.json()["items"]) == 2
+    r = await client.get("/api/v1/cards/333333/loans")
+    assert r.json()["items"] == []
+
+
+@pytest.mark.asyncio
+async def test_loan_history_validation(client):
+    assert (await client.get("/api/v1/books/12345/loans")).status_code == 422
+    assert (await client.get("/api/v1/cards/abcdef/loans")).status_code == 422
+    params = {"since": "2026-01-01T00:00:00"}
+    assert (await client.get("/api/v1/cards/111111/loans", params=params)).status_code == 422
+    params = {"since": "2026-02-01T00:00:00Z", "until": "2026-01-01T00:00:00Z"}
+    assert (await client.get("/api/v1/cards/111111/loans", params=params)).status_code == 422
+    params = {"cursor": "!!"}
+    assert (await client.get("/api/v1/cards/111111/loans", params=params)).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_ensure_loan_partitions_creates_missing_months(db_session):
+    connection = await db_session.connection()
+    if connection.dialect.name != "postgresql":
+        pytest.skip("loans is only partitioned on PostgreSQL")
+
+    def run(sync_connection):
+        before = set(attached_partitions(sync_connection))
+        created = ensure_loan_partitions(sync_connection, months=2, today=date(2031, 12, 15))
+        again = ensure_loan_partitions(sync_connection, months=2, today=date(2031, 12, 15))
+        return before, created, again, set(attached_partitions(sync_connection))
+
+    before, created, again, after = await connection.run_sync(run)
+    assert created == ["loans_2031_12", "loans_2032_01", "loans_2032_02"]
+    assert again == []
+    assert after == before | set(created)
+    # Rows route to their month's partition
+    await db_session.execute(
+        text(
+            "INSERT INTO loans (serial_number, borrower_card, action, occurred_at) "
+            "VALUES ('000001', '000001', 'borrow', '2032-01-31T23:59:59Z')"
+        )
+    )
+    count = await db_session.scalar(text("SELECT count(*) FROM loans_2032_01"))
+    assert count == 1
@@ -0,0 +1,102 @@
+"""Container-start migrations (`app.db.migrate`) against a scratch PostgreSQL database."""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from app.core.config import get_settings
+from app.db.migrate import ALEMBIC_INI, sync_database_url, upgrade_to_head
+from app.db.partitions import add_months, attached_partitions, month_start, partition_name
+
+
+@pytest.fixture
+def scratch_database_url():
+    url = make_url(get_settings().get_async_database_url())
+    if url.get_backend_name() != "postgresql":
+        pytest.skip("Alembic revisions are PostgreSQL-only")
+    name = f"{url.database}_migrate_test"
+    dsn = url.render_as_string(hide_password=False)
+    admin = create_engine(sync_database_url(dsn), isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+        conn.execute(text(f"CREATE DATABASE \"{name}\" ENCODING 'UTF8' TEMPLATE template0"))
+    yield url.set(database=name).render_as_string(hide_password=False)
+    with admin.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+    admin.dispose()
+
+
+def test_concurrent_upgrades_do_not_deadlock(scratch_database_url):
+    # The revisions build indexes CONCURRENTLY while the other runner waits
+    with ThreadPoolExecutor(2) as pool:
+        runs = [pool.submit(upgrade_to_head, url=scratch_database_url) for _ in range(2)]
+        results = [run.result(timeout=60) for run in runs]
+    assert sorted(results) == [False, True]
+    assert upgrade_to_head(url=scratch_database_url) is False
+
+
+def test_authors_revision_links_existing_books(scratch_database_url):
+    engine = create_engine(sync_database_url(scratch_database_url))
+    try:
+        config = Config(str(ALEMBIC_INI))
+        with engine.connect() as conn:
+            config.attributes["connection"] = conn
+            command.upgrade(config, "e6c2f8a09b13")  # before authors
+            partitions = attached_partitions(conn)
+        first = month_start(datetime.now(timezone.utc).date())
+        assert partitions == [partition_name(add_months(first, i)) for i in range(4)]
+        with engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO books (serial_number, title, author) VALUES (:s, 'T', :a)"),
+                [
+                    {"s": "000001", "a": "Jane Austen"},
+                    {"s": "000002", "a": "jane  austen"},
+                    {"s": "000003", "a": "Jane Austen"},
+                    {"s": "000004", "a": "Émile Zola"},
+                ],
+            )
+            conn.execute(
+                text(
+                    "UPDATE books SET is_borrowed = true, borrower_card = '111111',"
+                    " borrowed_at = now() WHERE serial_number IN ('000001', '000004')"
+                )
+            )
+        assert upgrade_to_head(url=scratch_database_url) is True
+
+        with engine.connect() as conn:
+            authors = conn.execute(
+                text(
+                    "SELECT b.serial_number, a.name FROM books AS b"
+                    " JOIN authors AS a ON a.id = b.author_id ORDER BY b.serial_number"
+                )
+            ).all()
+            constraints = conn.execute(
+                text(
+                    "SELECT conname, convalidated FROM pg_constraint"
+                    " WHERE conrelid = 'books'::regclass AND conname LIKE '%author_id%'"
+                )
+            ).all()
+            loans = conn.execute(text("SELECT borrower_card, active FROM card_loans")).all()
+            nullable = conn.execute(
+                text(
+                    "SELECT is_nullable FROM information_schema.columns"
+                    " WHERE table_name = 'books' AND column_name = 'author_id'"
+                )
+            ).scalar()
+    finally:
+        engine.dispose()
+    assert authors == [
+        ("000001", "Jane Austen"),
+        ("000002", "Jane Austen"),
+        ("000003", "Jane Austen"),
+        ("000004", "Émile Zola"),
+    ]
+    # The temporary CHECK is gone once the column itself is NOT NULL
+    assert constraints == [("fk_books_author_id_authors", True)]
+    assert nullable == "NO"
+    assert loans == [("111111", 2)]  # counted by the card_loans revision
@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import pytest
+
+from app.api import profiling
+from app.core.config import get_settings
+
+
+@pytest.fixture
+def profile_settings(monkeypatch, tmp_path):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "s3cret")
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILE_INTERVAL_MS", 1.0)
+    return settings
+
+
+@pytest.mark.asyncio
+async def test_profile_only_with_token(client, profile_settings, tmp_path):
+    r = await client.get("/api/v1/books")
+    assert r.status_code == 200 and "x-profile-file" not in r.headers
+    r = await client.get("/api/v1/books", headers={"X-Profile": "wrong"})
+    assert "x-profile-file" not in r.headers
+    assert not list(tmp_path.iterdir())
+
+    r = await client.get("/api/v1/books", headers={"X-Profile": "s3cret"})
+    assert r.status_code == 200
+    written = tmp_path / r.headers["x-profile-file"]
+    assert written.suffix == ".folded" and written.name.endswith(".folded")
+    for line in written.read_text().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack.startswith("app.api.profiling:ProfilingMiddleware._profiled") and int(count) > 0
+
+
+@pytest.mark.asyncio
+async def test_sampling_rate_profiles_without_header(client, profile_settings, monkeypatch, tmp_path):
+    monkeypatch.setattr(profile_settings, "PROFILE_SAMPLE_RATE", 1.0)
+    r = await client.get("/health")
+    assert "x-profile-file" not in r.headers  # only on-demand profiles are announced
+    assert len(list(tmp_path.glob("*-GET-health-*.folded"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_only_the_newest_profiles_are_kept(client, profile_settings, monkeypatch, tmp_path):
+    monkeypatch.setattr(profile_settings, "PROFILE_MAX_FILES", 2)
+    names = []
+    for _ in range(4):
+        r = await client.get("/health", headers={"X-Profile": "s3cret"})
+        names.append(r.headers["x-profile-file"])
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(names[-2:])
+
+
+@pytest.mark.asyncio
+async def test_sampler_follows_interval_changes(profile_settings, monkeypatch):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    middleware = profiling.ProfilingMiddleware(app)
+    scope = {"type": "http", "method": "GET", "path": "/x", "headers": [(b"x-profile", b"s3cret")]}
+    await middleware(scope, None, send)
+    assert middleware._sampler.interval_s == 0.001
+    monkeypatch.setattr(profile_settings, "PROFILE_INTERVAL_MS", 20.0)
+    await middleware(scope, None, send)
+    assert middleware._sampler.interval_s == 0.02
+
+
+def _spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_samples_cpu_and_awaits_of_child_tasks(profile_settings, tmp_path):
+    async def work():
+        _spin(0.05)
+        await asyncio.sleep(0.05)
+
+    async def app(scope, receive, send):
+        await asyncio.ensure_future(work())  # a task started by the request
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/x", "headers": [(b"x-profile", b"s3cret")]}
+    await profiling.ProfilingMiddleware(app)(scope, None, send)
+
+    (name,) = [v.decode() for k, v in messages[0]["headers"] if k == b"x-profile-file"]
+    stacks = {}
+    for line in (tmp_path / name).read_text().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        stacks[stack] = int(count)
+    spinning = sum(c for s, c in stacks.items() if s.endswith("test_profiling:_spin"))
+    waiting = sum(c for s, c in stacks.items() if "work" in s and s.endswith(profiling.AWAIT_FRAME))
+    assert spinning > 5 and waiting > 5
+    assert all(s.startswith("app.api.profiling:ProfilingMiddleware._profiled") for s in stacks)
+    assert asyncio.get_running_loop().get_task_factory() is None
@@ -0,0 +1,19 @@
+import pytest
+
+from app.repositories.authors import author_repository
+from app.repositories.books import book_repository
+
+
+@pytest.mark.asyncio
+async def test_prime_statements_touches_no_rows(db_session):
+    repo = book_repository(db_session)
+    author_ids = await author_repository(db_session).resolve(["P"])
+    await repo.create(serial_number="700001", title="Primed", author="P", author_id=author_ids["P"])
+
+    await repo.prime_statements()
+
+    book = await repo.get_by_serial("700001")
+    assert book is not None
+    assert book.is_borrowed is False
+    _, total = await repo.list()
+    assert total == 1
@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from app.common.exceptions import Conflict, NotFound
+from app.core.config import get_settings
+from app.schemas.books import BookCreate
+from app.services.books import BookService
+from app.services.serial_index import SerialIndex
+
+
+def fresh_index() -> SerialIndex:
+    index = SerialIndex()
+    index._fresh = True  # as after a completed load
+    return index
+
+
+def test_stale_index_defers_to_database():
+    index = SerialIndex()
+    index.add("123456")
+    assert index.contains("123456") is None
+
+
+def test_membership_and_notifications():
+    index = fresh_index()
+    assert index.contains("000000") is False
+    index.add("000000")
+    index.add("999999")
+    assert index.contains("000000") is True
+    assert index.contains("999999") is True
+
+    index._on_notify(None, 0, "books_serials", "-000000")
+    index._on_notify(None, 0, "books_serials", "+000001")
+    assert index.contains("000000") is False
+    assert index.contains("000001") is True
+    # neighbours in the same byte are untouched
+    assert index.contains("000002") is False
+    assert index.contains("12345") is False
+
+
+def test_notifications_buffered_during_load_are_replayed():
+    index = SerialIndex()
+    index._buffer = []
+    index._on_notify(None, 0, "books_serials", "+424242")
+    bits = bytearray(len(index._bits))
+    for payload in index._buffer:
+        index._apply(bits, payload)
+    index._bits, index._buffer, index._fresh = bits, None, True
+    assert index.contains("424242") is True
+
+
+def test_free_scans_clear_bits_within_range():
+    index = fresh_index()
+    for n in range(0, 20):
+        index.add(f"{n:06d}")
+    index.discard("000013")
+    assert index.free(3) == ["000013", "000020", "000021"]
+    assert index.free(2, 5, 12) == []
+    assert index.free(2, 999998) == ["999998", "999999"]
+    assert SerialIndex().free(1) is None
+
+
+@pytest.mark.asyncio
+async def test_service_keeps_index_current(db_session):
+    index = fresh_index()
+    service = BookService(db_session, serial_index=index)
+
+    with pytest.raises(NotFound):
+        await service.borrow_book("800001", "123456")
+
+    await service.add_book(BookCreate(serial_number="800001", title="Indexed", author="I"))
+    assert index.contains("800001") is True
+    with pytest.raises(Conflict):
+        await service.add_book(BookCreate(serial_number="800001", title="Indexed", author="I"))
+
+    await service.remove_book("800001")
+    assert index.contains("800001") is False
+
+
+@pytest.mark.asyncio
+async def test_writes_do_not_trust_a_lagging_index(db_session):
+    index = fresh_index()
+    service = BookService(db_session, serial_index=index)
+    # Created on another worker; its NOTIFY has not arrived yet
+    await BookService(db_session).add_book(BookCreate(serial_number="800002", title="Lag", author="L"))
+    assert index.contains("800002") is False
+    assert (await service.borrow_book("800002", "123456")).is_borrowed
+    assert not (await service.return_book("800002")).is_borrowed
+    await service.remove_book("800002")
+
+    # Deleted on another worker, still in the index here
+    index.add("800002")
+    book = await service.add_book(BookCreate(serial_number="800002", title="Again", author="L"))
+    assert book.title == "Again"
+
+
+async def _until(predicate, timeout_s=5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_s
+    while not predicate():
+        assert loop.time() < deadline
+        await asyncio.sleep(0.02)
+
+
+@pytest.mark.asyncio
+async def test_writes_outside_the_service_reach_the_index(db_session):
+    if db_session.get_bind().dialect.name != "postgresql":
+        pytest.skip("LISTEN/NOTIFY is PostgreSQL-only")
+    index = SerialIndex()
+    task = asyncio.create_task(index.run(get_settings().get_direct_database_url()))
+    try:
+        await _until(lambda: index.fresh)
+        # Plain SQL, as a script or another service would write
+        author_id = (
+            await db_session.execute(
+                text("INSERT INTO authors (name, name_key) VALUES ('Raw', 'raw') RETURNING id")
+            )
+        ).scalar()
+        await db_session.execute(
+            text(
+                "INSERT INTO books (serial_number, title, author, author_id)"
+                " VALUES ('800101', 'Raw', 'Raw', :a), ('800102', 'Raw', 'Raw', :a)"
+            ),
+            {"a": author_id},
+        )
+        await db_session.commit()
+        await _until(lambda: index.contains("800101") and index.contains("800102"))
+
+        await db_session.execute(text("DELETE FROM books WHERE serial_number = '800101'"))
+        await db_session.rollback()  # rolled back: never announced
+        await db_session.execute(text("DELETE FROM books WHERE serial_number = '800102'"))
+        await db_session.commit()
+        await _until(lambda: index.contains("800102") is False)
+        assert index.contains("800101") is True
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,26 @@
+from app.core.config import Settings
+from app.server import server_config, usable_cpus
+
+
+def test_server_config_defaults_workers_to_usable_cpus():
+    cfg = server_config(Settings(DATABASE_URL="postgresql+asyncpg://u:p@h/db"))
+    assert cfg["workers"] == usable_cpus()
+    assert cfg["factory"] is True
+    assert cfg["loop"] in ("uvloop", "asyncio")
+    assert cfg["http"] in ("httptools", "h11")
+
+
+def test_server_config_honours_settings():
+    cfg = server_config(
+        Settings(
+            DATABASE_URL="postgresql+asyncpg://u:p@h/db",
+            UVICORN_WORKERS=3,
+            SERVER_LOOP="asyncio",
+            SERVER_HTTP="h11",
+            SERVER_LIMIT_CONCURRENCY=200,
+        )
+    )
+    assert cfg["workers"] == 3
+    assert cfg["loop"] == "asyncio"
+    assert cfg["http"] == "h11"
+    assert cfg["limit_concurrency"] == 200
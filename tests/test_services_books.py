@@ -2,8 +2,8 @@ import pytest
 from datetime import datetime, timezone
 
 from app.services.books import BookService
-from app.schemas.books import BookCreate
-from app.common.exceptions import Conflict, NotFound
+from app.schemas.books import BookCreate, BookDraft
+from app.common.exceptions import Conflict, NotFound, ValidationError
 
 
 @pytest.mark.asyncio
@@ -92,3 +92,41 @@ async def test_list_books(db_session):
     items, total = await service.list_books(limit=2, offset=0)
     assert total >= 3
     assert len(items) == 2
+
+
+@pytest.mark.asyncio
+async def test_find_free_serials_fills_gaps(db_session):
+    service = BookService(db_session)
+    for serial in ("500000", "500001", "500003"):
+        await service.add_book(BookCreate(serial_number=serial, title="T", author="A"))
+
+    assert await service.find_free_serials(3, start="500000", end="500099") == [
+        "500002",
+        "500004",
+        "500005",
+    ]
+    assert await service.find_free_serials(5, start="500000", end="500001") == []
+    assert await service.find_free_serials(1, start="499999") == ["499999"]
+
+    with pytest.raises(ValidationError):
+        await service.find_free_serials(1, start="500010", end="500000")
+
+
+@pytest.mark.asyncio
+async def test_add_books_assigns_free_serials_in_order(db_session):
+    service = BookService(db_session)
+    await service.add_book(BookCreate(serial_number="700001", title="Taken", author="A"))
+
+    drafts = [BookDraft(title=f"Bulk {i}", author="B") for i in range(3)]
+    books = await service.add_books(drafts, start="700000", end="700009")
+    assert [b.serial_number for b in books] == ["700000", "700002", "700003"]
+    assert [b.title for b in books] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+    assert all(b.created_at is not None and not b.is_borrowed for b in books)
+
+    # Range exhausted → Conflict, nothing inserted
+    with pytest.raises(Conflict):
+        await service.add_books(drafts, start="700000", end="700005")
+    assert await service.find_free_serials(10, start="700000", end="700005") == [
+        "700004",
+        "700005",
+    ]
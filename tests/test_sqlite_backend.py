@@ -0,0 +1,111 @@
+"""SQLite backend: constraints, write serialization and repository variant.
+
+These run against a throwaway SQLite file regardless of `DATABASE_URL`; run
+the whole suite with `DATABASE_URL=sqlite+aiosqlite:///...` to exercise every
+endpoint on SQLite.
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.common.exceptions import Conflict
+from app.db.base import Base
+from app.db.session import _make_engine, _read_execution_options
+from app.models.book import Book
+from app.repositories.books_sqlite import SqliteBookRepository
+from app.schemas.books import BookCreate, BookDraft
+from app.services.books import BookService
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest_asyncio.fixture
+async def sqlite_engine(tmp_path):
+    engine = _make_engine(f"sqlite+aiosqlite:///{tmp_path / 'library.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+def test_read_execution_options_are_deferred_on_sqlite():
+    assert _read_execution_options("read_only", "sqlite") == {"sqlite_begin": "DEFERRED"}
+
+
+@pytest.mark.asyncio
+async def test_wal_mode_and_check_constraints(sqlite_engine):
+    async with sqlite_engine.connect() as conn:
+        assert (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar() == "wal"
+
+    async with sqlite_engine.begin() as conn:
+        await conn.execute(text("INSERT INTO authors (id, name, name_key) VALUES (1, 'a', 'a')"))
+    bad_rows = [
+        "('12345', 't', 'a', 1, 0, NULL, NULL)",  # five digits
+        "('12345x', 't', 'a', 1, 0, NULL, NULL)",  # not digits
+        "('123456', 't', 'a', 1, 1, NULL, NULL)",  # borrowed without card
+        "('123456', 't', 'a', 1, 0, '654321', NULL)",  # card while available
+        "('123456', 't', 'a', 2, 0, NULL, NULL)",  # unknown author (foreign keys are on)
+    ]
+    for row in bad_rows:
+        with pytest.raises(IntegrityError):
+            async with sqlite_engine.begin() as conn:
+                await conn.execute(
+                    text(
+                        "INSERT INTO books (serial_number, title, author, author_id, is_borrowed,"
+                        f" borrower_card, borrowed_at) VALUES {row}"
+                    )
+                )
+
+
+@pytest.mark.asyncio
+async def test_default_timestamps_compare_with_bound_datetimes(sqlite_engine):
+    async with AsyncSession(sqlite_engine, expire_on_commit=False) as session:
+        book = await BookService(session).add_book(
+            BookCreate(serial_number="000042", title="T", author="A")
+        )
+        # The DB-default value, bound back from Python, must match itself
+        res = await session.execute(
+            select(func.count()).where(Book.created_at >= book.created_at)
+        )
+        assert res.scalar() == 1
+
+
+@pytest.mark.asyncio
+async def test_service_on_sqlite_serializes_concurrent_borrows(sqlite_engine):
+    async with AsyncSession(sqlite_engine, expire_on_commit=False) as session:
+        service = BookService(session)
+        assert isinstance(service.repo, SqliteBookRepository)
+        book = await service.add_book(BookCreate(serial_number="000042", title="T", author="A"))
+        assert book.created_at.tzinfo is not None
+
+    async def borrow(card: str) -> str:
+        async with AsyncSession(sqlite_engine, expire_on_commit=False) as session:
+            try:
+                await BookService(session).borrow_book("000042", card)
+                return "ok"
+            except Conflict:
+                return "conflict"
+
+    results = await asyncio.gather(*(borrow(f"{n:06d}") for n in range(1, 9)))
+    assert sorted(results) == ["conflict"] * 7 + ["ok"]
+
+
+@pytest.mark.asyncio
+async def test_repository_variant_queries(sqlite_engine):
+    async with AsyncSession(sqlite_engine, expire_on_commit=False) as session:
+        service = BookService(session)
+        for serial in ("000001", "000003"):
+            await service.add_book(BookCreate(serial_number=serial, title=serial, author="A"))
+
+        assert await service.find_free_serials(3) == ["000000", "000002", "000004"]
+        books = await service.get_books(["000003", "999999", "000001"])
+        assert [b.serial_number if b else None for b in books] == ["000003", None, "000001"]
+        created = await service.add_books(
+            [BookDraft(title="x", author="y")], end="000009"
+        )
+        assert [b.serial_number for b in created] == ["000000"]
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+
+from app.common.exceptions import Conflict, NotFound
+from app.db.session import get_sessionmaker
+from app.models.book import Book
+from app.models.card import CardLoans
+from app.models.loan import Loan
+from app.schemas.books import BookCreate
+from app.services.books import BookService, StatusChange
+from app.services.status_batcher import StatusBatcher
+
+
+async def _add_books(session, serials):
+    service = BookService(session)
+    for serial in serials:
+        await service.add_book(BookCreate(serial_number=serial, title="Batch", author="B"))
+    await session.rollback()  # release the SQLite write lock
+
+
+@pytest.mark.asyncio
+async def test_batch_outcomes_match_sequential_semantics(db_session):
+    await _add_books(db_session, ["840001", "840002", "840003"])
+    service = BookService(db_session, max_loans_per_card=2)
+    outcomes = await service.apply_status_changes(
+        [
+            StatusChange("840001", "111111"),
+            StatusChange("840001", "222222"),  # already borrowed by another card
+            StatusChange("840001", "111111"),  # idempotent
+            StatusChange("840002", None),  # not borrowed
+            StatusChange("849999", "111111"),  # no such book
+            StatusChange("840002", "111111"),
+            StatusChange("840003", "111111"),  # card at its limit
+            StatusChange("840001", None),
+            StatusChange("840003", "111111"),  # the return freed a slot
+        ]
+    )
+    kinds = [type(o).__name__ if isinstance(o, Exception) else o.borrower_card for o in outcomes]
+    assert kinds == [
+        "111111", "Conflict", "111111", "Conflict", "NotFound", "111111", "Conflict", None, "111111",
+    ]
+
+    books = {b.serial_number: b for b in (await db_session.scalars(select(Book))).all()}
+    assert not books["840001"].is_borrowed
+    assert books["840002"].borrower_card == books["840003"].borrower_card == "111111"
+    active = await db_session.scalar(select(CardLoans.active).where(CardLoans.borrower_card == "111111"))
+    assert active == 2
+    events = (await db_session.execute(select(Loan.serial_number, Loan.action).order_by(Loan.id))).all()
+    assert [tuple(e) for e in events] == [
+        ("840001", "borrow"), ("840002", "borrow"), ("840001", "return"), ("840003", "borrow"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_batch_hands_a_book_to_another_card(db_session):
+    await _add_books(db_session, ["842001"])
+    service = BookService(db_session)
+    await service.apply_status_changes([StatusChange("842001", "111111")])
+    before = await db_session.scalar(select(Book.updated_at).where(Book.serial_number == "842001"))
+
+    # Borrowed before and after the batch, but by another card
+    outcomes = await service.apply_status_changes(
+        [StatusChange("842001", None), StatusChange("842001", "222222")]
+    )
+    assert [o.borrower_card for o in outcomes] == [None, "222222"]
+
+    db_session.expire_all()
+    book = await db_session.get(Book, "842001")
+    assert (book.is_borrowed, book.borrower_card) == (True, "222222")
+    assert book.borrowed_at == book.updated_at == outcomes[1].updated_at
+    assert book.updated_at > before
+    counts = dict((await db_session.execute(select(CardLoans.borrower_card, CardLoans.active))).all())
+    assert counts.get("111111", 0) == 0 and counts["222222"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batcher_coalesces_concurrent_requests(db_session):
+    serials = [f"{n:06d}" for n in range(841001, 841011)]
+    await _add_books(db_session, serials)
+    batcher = StatusBatcher(get_sessionmaker(), window_s=0.02, max_batch=100)
+    batches = []
+    apply = batcher._apply
+
+    async def counting_apply(batch):
+        batches.append(len(batch))
+        await apply(batch)
+
+    batcher._apply = counting_apply
+    service = BookService(db_session, status_batcher=batcher)
+
+    results = await asyncio.gather(
+        *(service.borrow_book(serial, "333333") for serial in serials),
+        service.return_book("841001"),  # queued after its borrow: same batch, applied in order
+        service.borrow_book("841999", "333333"),
+        return_exceptions=True,
+    )
+    assert batches == [12]
+    assert all(r.is_borrowed for r in results[:10])
+    assert results[10].is_borrowed is False
+    assert isinstance(results[11], NotFound)
+
+    with pytest.raises(Conflict):
+        await service.return_book("841001")
+    assert (await service.return_book("841002")).is_borrowed is False
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_fails_every_caller(db_session):
+    await _add_books(db_session, ["842001", "842002"])
+    batcher = StatusBatcher(get_sessionmaker(), window_s=0.01, max_batch=100)
+    results = await asyncio.gather(
+        batcher.submit(StatusChange("842001", "444444")),
+        batcher.submit(StatusChange("842002", "bad")),  # violates the card check constraint
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, DBAPIError) for r in results)
+    book = await db_session.get(Book, "842001")
+    assert book.is_borrowed is False
@@ -0,0 +1,138 @@
+import pytest
+
+from app.db.session import get_sessionmaker
+from app.schemas.books import BookCreate
+from app.services.books import BookService
+from app.services.suggest_index import SuggestIndex
+
+
+def loaded_index(rows=()) -> SuggestIndex:
+    index = SuggestIndex()
+    index._reset()
+    index._load_rows(rows)
+    index._buffer = []
+    index._finish_load()  # as after a completed load
+    return index
+
+
+def test_unloaded_index_defers_to_database():
+    index = SuggestIndex()
+    index.add("000001", "Dune", "Frank Herbert")
+    assert index.fresh is False
+    assert index.suggest("du") is None
+
+
+def test_prefix_completion_ranks_by_count():
+    index = loaded_index(
+        [
+            ("000001", "Dune", "Frank Herbert"),
+            ("000002", "dune ", "Frank Herbert"),
+            ("000003", "Dune Messiah", "Frank  HERBERT"),
+            ("000004", "Dubliners", "James Joyce"),
+            ("000005", "Emma", "Jane Austen"),
+        ]
+    )
+    assert index.suggest("DU") == {
+        "titles": [("Dune", 2), ("Dubliners", 1), ("Dune Messiah", 1)],
+        "authors": [],
+    }
+    assert index.suggest(" dune  m")["titles"] == [("Dune Messiah", 1)]
+    assert index.suggest("j", limit=1)["authors"] == [("James Joyce", 1)]
+    assert index.suggest("fr")["authors"] == [("Frank Herbert", 3)]
+    assert index.suggest("   ") == {"titles": [], "authors": []}
+
+    # Local writes update the counts and invalidate cached prefixes
+    index.add("000006", "Dubliners", "James Joyce")
+    index.add("000006", "Dubliners", "James Joyce")  # echoed by NOTIFY: no double count
+    index.discard("000001")
+    index.discard("000002")
+    assert index.suggest("du")["titles"] == [("Dubliners", 2), ("Dune Messiah", 1)]
+    index.discard("000005")
+    assert index.suggest("emma") == {"titles": [], "authors": []}
+
+
+def test_notifications_queue_fetches_and_deletions_cancel_them():
+    index = loaded_index([("000001", "Dune", "Frank Herbert")])
+    index._on_notify(None, 0, "books_serials", "+000002")
+    index._on_notify(None, 0, "books_serials", "+000003")
+    index._on_notify(None, 0, "books_serials", "+000001")  # already indexed
+    index._on_notify(None, 0, "books_serials", "-000003")
+    index._on_notify(None, 0, "books_serials", "-000001")
+    index._on_notify(None, 0, "books_serials", "+12345")
+    assert list(index._pending) == ["000002"]
+    assert index.suggest("dune")["titles"] == []
+
+
+@pytest.mark.asyncio
+async def test_fetch_keeps_serials_announced_again_meanwhile():
+    index = loaded_index()
+
+    class Conn:
+        async def fetch(self, _query, serials):
+            # Deleted and re-added by another worker while the fetch runs
+            index._on_notify(None, 0, "books_serials", "-000002")
+            index._on_notify(None, 0, "books_serials", "+000002")
+            return [(s, f"Title {s}", "A") for s in sorted(serials)]
+
+    index._on_notify(None, 0, "books_serials", "+000001")
+    index._on_notify(None, 0, "books_serials", "+000002")
+    await index._fetch_pending(Conn())
+    assert index.suggest("title")["titles"] == [("Title 000001", 1)]
+    assert list(index._pending) == ["000002"]
+
+
+def test_changes_during_load_are_replayed():
+    index = SuggestIndex()
+    index._buffer = []
+    index._reset()
+    index.add("000002", "Emma", "Jane Austen")
+    index.discard("000001")
+    index._on_notify(None, 0, "books_serials", "+000003")
+    index._load_rows([("000001", "Dune", "Frank Herbert")])
+    index._finish_load()
+    assert index.suggest("e")["titles"] == [("Emma", 1)]
+    assert index.suggest("d")["titles"] == []
+    assert list(index._pending) == ["000003"]
+
+
+@pytest.mark.asyncio
+async def test_service_keeps_index_current_and_load_reads_the_catalog(db_session):
+    service = BookService(db_session)
+    await service.add_book(BookCreate(serial_number="810001", title="Dune", author="Frank Herbert"))
+
+    index = SuggestIndex()
+    await index.load_once(get_sessionmaker())
+    assert index.suggest("dun")["titles"] == [("Dune", 1)]
+
+    service = BookService(db_session, suggest_index=index)
+    await service.add_book(BookCreate(serial_number="810002", title="Dune", author="F. Herbert"))
+    found = await service.suggest("DUNE", limit=5)
+    assert found["titles"] == [{"text": "Dune", "count": 2}]
+    await service.remove_book("810001")
+    await service.remove_book("810002")
+    assert await service.suggest("dune") == {"titles": [], "authors": []}
+
+
+@pytest.mark.asyncio
+async def test_suggest_endpoint_falls_back_to_database(client):
+    for serial, title, author in (
+        ("820001", "100% Cotton", "Ann Lee"),
+        ("820002", "100 Poems", "ann  lee"),
+        ("820003", "100 Poems", "Anne Carson"),
+    ):
+        r = await client.post(
+            "/api/v1/books", json={"serial_number": serial, "title": title, "author": author}
+        )
+        assert r.status_code == 201
+
+    r = await client.get("/api/v1/books/suggest", params={"q": "100"})
+    assert r.status_code == 200
+    assert r.json()["titles"] == [
+        {"text": "100 Poems", "count": 2},
+        {"text": "100% Cotton", "count": 1},
+    ]
+    r = await client.get("/api/v1/books/suggest", params={"q": "100%"})
+    assert [t["text"] for t in r.json()["titles"]] == ["100% Cotton"]
+    r = await client.get("/api/v1/books/suggest", params={"q": "ANN", "limit": 1})
+    assert r.json() == {"titles": [], "authors": [{"text": "Ann Lee", "count": 2}]}
+    assert (await client.get("/api/v1/books/suggest")).status_code == 422